@@ -9,7 +9,6 @@ import numpy as np
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -23,6 +22,8 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 )
 from geniusweb.progress.Progress import Progress
 from .acceptance_strategy import AcceptanceStrategy
+from agents.template_agent.utils.acceptance_conditions import AcceptanceConditions, UtilityLog
+from agents.template_agent.utils.domain_tables import get_domain_table
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
@@ -52,6 +53,9 @@ class Agent18(DefaultParty):
         self._last_received_bid: Bid = None
         # List of all received bids
         self._received_bids: list[Bid] = []
+        # Utilities of the received bids with the progress at which they were received, for the acceptance conditions
+        self._received_utilities = UtilityLog()
+        self._acceptance_conditions = AcceptanceConditions(self._received_utilities)
         # Stores the last sent bid
         self._last_sent_bid = None
         # Stores the best utility stored so far
@@ -89,8 +93,10 @@ class Agent18(DefaultParty):
                 info.getProfile().getURI(), self.getReporter()
             )
 
-            self._bid_list = sorted(AllBidsList(self._profile.getProfile().getDomain()),
-                                    key=self._profile.getProfile().getUtility, reverse=True)
+            # the sorted bids come from the domain table, which is shared between sessions and worker processes,
+            # the bids that were sent are marked by their table index and bids are only decoded when needed
+            self._table = get_domain_table(self._profile.getProfile())
+            self._sent = np.zeros(len(self._table), dtype=bool)
             self._opponent_model = freq_opp_mod.FrequencyOpponentModel(self._profile.getProfile().getDomain(), {}, 0,
                                                                        None).With(
                 self._profile.getProfile().getDomain(), None)
@@ -104,6 +110,8 @@ class Agent18(DefaultParty):
                 if self._last_sent_bid is None or bid != self._last_sent_bid:
                     self._last_received_bid = bid
                     self._received_bids.append(self._last_received_bid)
+                    self._received_utilities.append(self._profile.getProfile().getUtility(bid),
+                                                    self._progress.get(time.time() * 1000))
                     self._opponent_model = self._opponent_model.WithAction(action, self._progress)
         # YourTurn notifies you that it is your turn to act
         elif isinstance(info, YourTurn):
@@ -167,9 +175,8 @@ class Agent18(DefaultParty):
             # received bid
             action = Accept(self._me, self._last_received_bid)
         else:
-            # Otherwise, sent the bid, remove it so we do not send the same bid over and over
-            if next_sent_bid in self._bid_list:
-                self._bid_list.remove(next_sent_bid)
+            # Otherwise, sent the bid, mark it so we do not send the same bid over and over
+            self._sent[self._table.index(next_sent_bid)] = True
             self._last_sent_bid = next_sent_bid
             action = Offer(self._me, next_sent_bid)
 
@@ -185,7 +192,7 @@ class Agent18(DefaultParty):
         progress = self._progress.get(time.time() * 1000)
 
         # Create an acceptance profile and check the metrics used
-        ac = AcceptanceStrategy(progress, profile, self._received_bids, next_sent_bid, self._last_sent_bid)
+        ac = AcceptanceStrategy(progress, profile, self._acceptance_conditions, next_sent_bid, self._last_sent_bid)
         return ac.combi_max_w(self.thresholds[0], 1, 0)
 
     # Finds the next bid to send to the opponent
@@ -199,7 +206,7 @@ class Agent18(DefaultParty):
         opponent = self._opponent_model
         # Random Walker above specific threshold
         if progress < self.thresholds[4]:
-            return self._generateRandomBidAbove(lambda x: x >= self.thresholds[1], self._bid_list, profile.getUtility)
+            return self._generateRandomBidAbove(lambda x: x >= self.thresholds[1], self._available())
         # Agreeable agent based on ANAC 2018 agent
         if progress < self.thresholds[5]:
             return self._agreeable()
@@ -209,19 +216,29 @@ class Agent18(DefaultParty):
         # Send bids that we received and maximize our utility
         return self._sendReceived()
 
+    # Table indices of the bids that were not sent yet, from the highest to the lowest utility
+    # count -> only consider the count best bids
+    def _available(self, count=None) -> np.ndarray:
+        indices = self._table.order[:count]
+        return indices[~self._sent[indices]]
+
+    # The best bid that was not sent yet
+    def _bestBid(self) -> Bid:
+        available = self._available()
+        return self._table.bid(available[0] if len(available) > 0 else self._table.order[0])
+
     # Function to generate a random bid using a specific thresholding function
-    # threshold_function -> lambda function that returns a boolean used to filter bids
-    # bid_list -> list of bids to chose from
-    # utility_function -> lambda function that computes the utility of a bid
-    def _generateRandomBidAbove(self, threshold_function, bid_list, utility_function):
+    # threshold_function -> lambda function on the utility that returns a boolean used to filter bids
+    # indices -> table indices of the bids to chose from
+    def _generateRandomBidAbove(self, threshold_function, indices):
         for _ in range(50):
-            bid = self._getRandomBid(bid_list)
-            if threshold_function(utility_function(bid)):
-                return bid
-        return self._bid_list[0]
+            index = self._getRandomBid(indices)
+            if threshold_function(self._table.utilities[index]):
+                return self._table.bid(index)
+        return self._bestBid()
 
     # Generate a random element of the input list
-    def _getRandomBid(self, bid_list) -> Bid:
+    def _getRandomBid(self, bid_list):
         return bid_list[randint(0, len(bid_list) - 1)]
 
     # Finds the next bid in the behaviour of the agreeable agent
@@ -231,21 +248,22 @@ class Agent18(DefaultParty):
         # To collect enough data start by sending the best offers for us
         target_utility = min(self.thresholds[2], (1 - self._progress.get(time.time() * 1000)) * self.thresholds[3])
         profile = self._profile.getProfile()
-        bids = []
-        for bid in self._bid_list:
-            if profile.getUtility(bid) > target_utility:
-                bids.append(bid)
-        bids = sorted(bids, key=self._opponent_model.getUtility, reverse=True)
+        # only the bids above the target utility are decoded
+        indices = self._available(self._table.cutoff(float(target_utility)))
+        indices = indices[self._table.utilities[indices] > target_utility]
+        bids = sorted((self._table.bid(index) for index in indices), key=self._opponent_model.getUtility, reverse=True)
         if len(bids) == 0:
-            return self._bid_list[0]
+            return self._bestBid()
         weights = np.array(
             [float(profile.getUtility(bid)) + float(self._opponent_model.getUtility(bid)) for bid in bids])
         return choices(bids, weights=weights / np.sum(weights))[0]
 
     # Picks one bid from the bid list that maximizes a specific metric
     def _socialWelfare(self, metric):
-        best_bid = self._bid_list[0]
-        for bid in self._bid_list:
+        # the bids are decoded one at a time, only the best one is kept
+        best_bid = self._bestBid()
+        for index in self._available():
+            bid = self._table.bid(index)
             if metric(best_bid) < metric(bid):
                 best_bid = bid
         return best_bid
@@ -29,14 +29,14 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 )
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
-import numpy as np
+from agents.template_agent.utils.acceptance_conditions import UtilityLog
 
 
 class Acceptinator:
     def __init__(self, bid_window, acceptance_threshold, trajectory_threshold):
-        self.my_bids_utility = []
+        self.my_bids_utility = UtilityLog()
         self.my_bid_window_average = []
-        self.other_bids_utility = []
+        self.other_bids_utility = UtilityLog()
         self.other_bid_window_average = []
         self.min_bid = 1
         self.max_bid = 0
@@ -47,17 +47,16 @@ class Acceptinator:
         self.currentBid = None
 
     def process_bid_utility(self, my_utility, other_agent_utility):
-        self.my_bids_utility.append(float(my_utility))
-        self.other_bids_utility.append(float(other_agent_utility))
+        self.my_bids_utility.append(my_utility)
+        self.other_bids_utility.append(other_agent_utility)
         self.min_bid = min(self.min_bid, other_agent_utility)
         self.max_bid = max(self.max_bid, other_agent_utility)
 
     def get_current_window_average(self):
         """get the current window average of two agents based on the data stored by the process_bid utility"""
         if len(self.my_bids_utility) - self.bid_window > 1:
-            my_window_utility_bid_mean = np.mean(self.my_bids_utility[len(self.my_bids_utility) - self.bid_window:])
-            other_window_utility_bid_mean = np.mean(
-                self.other_bids_utility[len(self.my_bids_utility) - self.bid_window:])
+            my_window_utility_bid_mean = self.my_bids_utility.mean(len(self.my_bids_utility) - self.bid_window)
+            other_window_utility_bid_mean = self.other_bids_utility.mean(len(self.my_bids_utility) - self.bid_window)
             self.my_bid_window_average.append(my_window_utility_bid_mean)
             self.other_bid_window_average.append(other_window_utility_bid_mean)
 
@@ -67,8 +66,8 @@ class Acceptinator:
     def get_current_window_average_trend(self):
         """get the current window average trend of two agents based on the data stored by the process_bid utility"""
         if len(self.my_bids_utility) - self.bid_window > 1:
-            curr_window_bid = np.mean(self.my_bids_utility[len(self.my_bids_utility) - self.bid_window:])
-            curr_window_utility = np.mean(self.other_bids_utility[len(self.my_bids_utility) - self.bid_window:])
+            curr_window_bid = self.my_bids_utility.mean(len(self.my_bids_utility) - self.bid_window)
+            curr_window_utility = self.other_bids_utility.mean(len(self.my_bids_utility) - self.bid_window)
             self.my_bid_window_average.append(curr_window_bid)
             self.other_bid_window_average.append(curr_window_utility)
             # try to establish what is the trajectory of the other agent
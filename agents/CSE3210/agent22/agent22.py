@@ -1,9 +1,7 @@
 import logging
 import time
 import numpy as np
-import copy
 from geniusweb.progress.Progress import Progress
-from scipy.stats import chisquare
 from random import randint
 from typing import cast
 from time import time as clock
@@ -16,7 +14,6 @@ from geniusweb.inform.Inform import Inform
 from geniusweb.inform.Settings import Settings
 from geniusweb.inform.YourTurn import YourTurn
 from geniusweb.issuevalue.Bid import Bid
-from geniusweb.issuevalue.Value import Value
 from decimal import Decimal
 from geniusweb.party.Capabilities import Capabilities
 from geniusweb.party.DefaultParty import DefaultParty
@@ -28,6 +25,7 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 )
 from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
 
+from agents.template_agent.utils.window_analyzer import WindowAnalyzer
 from .extended_util_space import ExtendedUtilSpace
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
@@ -47,8 +45,7 @@ class Agent22(DefaultParty):
         self.bidListOpp: list[Bid] = []
         self.weightList: dict[str, Decimal] = {}
         self.weightListOpp: dict[str, Decimal] = {}
-        self.issue_value_frequencies = {}
-        self.prev_issue_value_frequencies = {}
+        self.issue_value_frequencies: WindowAnalyzer = None
         self.cc = 1  # concession constant
 
     def notifyChange(self, info: Inform):
@@ -77,7 +74,7 @@ class Agent22(DefaultParty):
             self.issue_names = list(self.weightList.keys())
             n = len(self.issue_names)
             self.weightListOpp = dict(zip(self.issue_names, np.full(n, Decimal(round(1 / n, 6)))))
-            self.issue_value_frequencies = dict(zip(self.issue_names, {}))
+            self.issue_value_frequencies = WindowAnalyzer(profile.getDomain(), window_size=10)
         # ActionDone is an action send by an opponent (an offer or an accept)
         elif isinstance(info, ActionDone):
             action: Action = cast(ActionDone, info).getAction()
@@ -161,24 +158,17 @@ class Agent22(DefaultParty):
 
     def _getTheirUtility(self, bid: Bid):
         value_estimation = self.val_estimation()
+        frequencies = self.issue_value_frequencies.table
         utility = 0
-        for issue in bid.getIssues():
-            value = bid.getValue(issue)
-            if issue in value_estimation and value in value_estimation[issue]:
-                utility += float(self.weightListOpp[issue]) * value_estimation[issue][value]
+        for i, issue in enumerate(frequencies.issues):
+            index = frequencies.value_index[issue].get(bid.getValue(issue))
+            if index is not None:
+                utility += float(self.weightListOpp[issue]) * value_estimation[frequencies.offsets[i] + index]
 
         return Decimal(utility)
 
     def _updateFrequencies(self, bid: Bid):
-        issue_values = bid.getIssueValues()
-        for issue in issue_values.keys():
-            value = issue_values[issue]
-            if not (issue in self.issue_value_frequencies):
-                self.issue_value_frequencies[issue] = {}
-            if not (value in self.issue_value_frequencies[issue]):
-                self.issue_value_frequencies[issue][value] = 0
-
-            self.issue_value_frequencies[issue][value] += 1
+        self.issue_value_frequencies.add(bid)
 
     def _evaluate_bid(self, bid: Bid):
         profile = self._profile.getProfile()
@@ -276,20 +266,20 @@ class Agent22(DefaultParty):
         return options.get(randint(0, options.size() - 1))
 
     def update_weight_every_window(self):
-        k = 10
+        k = self.issue_value_frequencies.window_size
         if len(self.bidListOpp) % k == 0:
             self.weightListOpp = self.oppWeights()
-            self.prev_issue_value_frequencies = copy.deepcopy(self.issue_value_frequencies)
 
-    def val_estimation(self) -> dict[str, dict[Value, float]]:
+    def val_estimation(self) -> np.ndarray:
+        # estimated utility of every value, in the flat layout of the frequency table.
+        # Values that were never offered get a utility of 0
         gamma = 0.5
-        freqs = copy.deepcopy(self.issue_value_frequencies)
-        value_func = copy.deepcopy(self.issue_value_frequencies)
-        for issue in freqs.keys():
-            max_value = max(freqs[issue], key=freqs[issue].get)
-            for value in freqs[issue].keys():
-                value_func[issue][value] = ((1 + freqs[issue][value]) ** gamma) / (
-                            (1 + freqs[issue][max_value]) ** gamma)
+        frequencies = self.issue_value_frequencies.table
+        value_func = np.zeros(len(frequencies.counts))
+        for i, issue in enumerate(frequencies.issues):
+            freqs = frequencies.issue_counts(issue)
+            value_func[frequencies.offsets[i]:frequencies.offsets[i + 1]] = np.where(
+                freqs > 0, ((1 + freqs) ** gamma) / ((1 + freqs.max()) ** gamma), 0.0)
 
         return value_func
 
@@ -298,41 +288,25 @@ class Agent22(DefaultParty):
         beta = 5  # beta denotes how much this importance matters over time
         e = []  # list of issues that did not change significantly in frequency
         concession = False
-        new_weights: dict[str, Decimal] = copy.deepcopy(self.weightListOpp)
-        issue_list = self.prev_issue_value_frequencies.keys()
-        value_func = self.val_estimation()
+        new_weights: dict[str, Decimal] = dict(self.weightListOpp)
+        window = self.issue_value_frequencies
+        issue_list = []
+        if window.num_bids > window.window_size:
+            issue_list = window.issues
         progress = self._progress.get(round(clock() * 1000))
         n = len(issue_list)
-        for issue in issue_list:
-            # Calculate the frequencies from the currently found values
-            frequencies = copy.deepcopy(self.issue_value_frequencies[issue])
-            N = sum(frequencies.values())
-            for value in frequencies.keys():
-                frequencies[value] /= float(N)
-
-            prev_frequencies = copy.deepcopy(self.prev_issue_value_frequencies[issue])
-            # Add the newly found values to the previous dictionary
-            for value in frequencies.keys():
-                if value not in prev_frequencies:
-                    prev_frequencies[value] = 0
-            # Calculate the frequencies from the previous found values
-            N = sum(prev_frequencies.values())
-            for value in prev_frequencies.keys():
-                prev_frequencies[value] /= float(N)
-
-            # Do a chi squared distribution test on the frequencies to check if they have changed significantly
-            obs = list(frequencies.values())
-            exp = list(prev_frequencies.values())
-            _, p_val = chisquare(f_obs=obs, f_exp=exp)
+
+        # Do a chi squared test per issue on the frequencies of the last window against the frequencies
+        # of all bids before it, to check if they have changed significantly
+        _, p_vals = window.test(reference="history")
+        # Calculate the expected value for the utility for each issue value and compare with the previous found one
+        expected, prev_expected = window.expected_value_utilities(self.val_estimation(), reference="history")
+        for i, issue in enumerate(issue_list):
             # If our frequencies did not change significantely add this issue to e
-            if p_val > 0.05:
+            if p_vals[i] > 0.05:
                 e.append(issue)
-            else:
-                # Calculate the expected value for the utility for each issue value and compare with the previous found one
-                prev_expected = {k: prev_frequencies[k] * value_func[issue][k] for k in prev_frequencies}
-                expected = {k: frequencies[k] * value_func[issue][k] for k in frequencies}
-                if sum(expected.values()) < sum(prev_expected.values()):
-                    concession = True
+            elif expected[i] < prev_expected[i]:
+                concession = True
 
         if len(e) != len(issue_list) and concession:
             for issue in e:
@@ -24,6 +24,8 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+from agents.template_agent.utils.window_analyzer import WindowAnalyzer
+
 
 class Agent29(DefaultParty):
     """
@@ -57,7 +59,7 @@ class Agent29(DefaultParty):
         self._log_times = [np.log(i / 200) for i in range(1, 201)]
         self._log_times.insert(0, 0)
         self._e = 1.0
-        self._last_ten_bids_counts = {}
+        self._last_ten_bids: WindowAnalyzer = None
         self._all_possible_bids: AllBidsList
         self._all_possible_bids_utils = []
         self._all_possible_bids_ord: list[Bid] = []
@@ -149,9 +151,6 @@ class Agent29(DefaultParty):
     def _myTurn(self):
         if self._last_received_bid is not None:
             self._all_opponent_bids.append(self._last_received_bid)
-        if len(self._all_opponent_bids) != 0:
-            if len(self._all_opponent_bids) > 10:
-                self._uncount_oldest_bid()
             self._count_last_bid()
         # check if the last received offer of the opponent is good enough
         if self._isGood(self._last_received_bid):
@@ -252,10 +251,8 @@ class Agent29(DefaultParty):
         if len(self._all_opponent_bids) == 0:
             return False
 
-        # numpy average computation
-        get_util = lambda x: float(self._profile.getProfile().getUtility(x))
-        vgu = np.vectorize(get_util)
-        average = np.average(vgu(self._all_opponent_bids))
+        # running average over all received bids, kept by the histogram
+        average = self._last_ten_bids.utility_mean("all")
 
         return float(self._profile.getProfile().getUtility(bid)) > average + significance and \
                float(self._profile.getProfile().getUtility(bid)) > self._reservation_value
@@ -270,11 +267,8 @@ class Agent29(DefaultParty):
 
         self._num_possible_bids = 1
         for issue in domain_issues:
-            self._last_ten_bids_counts[issue] = {}
-            issue_values = domain.getValues(issue)
-            self._num_possible_bids *= issue_values.size()
-            for issue_value in issue_values:
-                self._last_ten_bids_counts[issue][issue_value] = 0
+            self._num_possible_bids *= domain.getValues(issue).size()
+        self._last_ten_bids = WindowAnalyzer(domain, window_size=10)
 
     """
     Initializes a list of bids in the agent's bid space, and sorts them as well. 
@@ -305,31 +299,13 @@ class Agent29(DefaultParty):
             self._reservation_value = self._profile.getProfile().getUtility(reservation_bid)
 
     """
-    If the last received bid is not empty, add it to the histogram
+    If the last received bid is not empty, add it to the histogram. The histogram only counts the 10 most recent bids,
+    the bid that drops out of this window is removed from it automatically.
     """
 
     def _count_last_bid(self):
-        domain = self._profile.getProfile().getDomain()
-        domain_issues = domain.getIssues()
-
-        for issue in domain_issues:
-            opponent_bid = self._last_received_bid
-            opp_bid_value = opponent_bid.getValue(issue)
-            if opp_bid_value is not None:  # measure against the stupid agent
-                self._last_ten_bids_counts[issue][opp_bid_value] += 1
-
-    """
-    Remove the 11th most recent (i.e. the no longer relevant) bid from the histogram
-    """
-
-    def _uncount_oldest_bid(self):
-        domain = self._profile.getProfile().getDomain()
-        domain_issues = domain.getIssues()
-
-        for issue in domain_issues:
-            oldest_relevant_opp_bid = self._all_opponent_bids[-10]
-            opp_bid_value = oldest_relevant_opp_bid.getValue(issue)
-            self._last_ten_bids_counts[issue][opp_bid_value] -= 1
+        opponent_bid = self._last_received_bid
+        self._last_ten_bids.add(opponent_bid, float(self._profile.getProfile().getUtility(opponent_bid)))
 
     """
     Return a number between 0 and 1 indicating how close the given bid is to the current opponent preference model.
@@ -344,7 +320,7 @@ class Agent29(DefaultParty):
 
         for issue in domain_issues:
             opp_bid_value = bid.getValue(issue)
-            similarity += (self._last_ten_bids_counts[issue][opp_bid_value] / 10.0) / num_issues
+            similarity += (self._last_ten_bids.window_count(issue, opp_bid_value) / 10.0) / num_issues
 
         return similarity
 
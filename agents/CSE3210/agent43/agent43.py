@@ -26,6 +26,7 @@ from decimal import Context
 from typing import Dict, Optional
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from geniusweb.bidspace.BidsWithUtility import BidsWithUtility
+from agents.template_agent.utils.acceptance_conditions import SlidingWindow, UtilityLog
 from .extended_util_space_group_43 import ExtendedUtilSpace
 from .frequency_opponent_model_group_43 import FrequencyOpponentModel
 from tudelft_utilities_logging.Reporter import Reporter
@@ -50,7 +51,8 @@ class Agent43(DefaultParty):
         self._util_space : LinearAdditive = None
         self._extended_space: ExtendedUtilSpace = None
         self._frequency_opponent_model : FrequencyOpponentModel = None
-        self._tracker = []
+        self._tracker = UtilityLog()
+        self._tracker_window = SlidingWindow(self._tracker)
         # self._our_utilities = None
         self._number_of_potential_bids = 0
         self._conceding_parameter = 0.1
@@ -223,8 +225,9 @@ class Agent43(DefaultParty):
         length = len(self._tracker)
         lower = round(length * window[0])
         higher = round(length * window[1])
-        utilitiesWindow = self._tracker[lower:higher]
-        maxUtil = max(utilitiesWindow)
+        maxUtil = self._tracker_window.max(lower, higher)
+        if maxUtil is None:
+            return False
         util_recieved_last = self._profile.getProfile().getUtility(self._last_received_bid)
         self._progress.get(time.time() * 1000)
 
@@ -43,9 +43,13 @@ class Agent50(DefaultParty):
         self._last_received_bid: Bid = None
         self._last_send_bid: Bid = None
         self._incoming_bids: list[(Bid, Decimal)] = []
+        self._unique_incoming_bids: set[Bid] = set()
+        self._issue_changes: dict[str, int] = {}
         self._aspiration_level: Decimal = 1.0
         self._asp_c = 0
-        self._ordered_issue_values: dict[str, list[str]] = {}
+        self._ordered_issue_values: dict[str, list[Value]] = {}
+        self._issue_value_ranks: dict[str, dict[Value, int]] = {}
+        self._weighted_value_utilities: dict[str, list[Decimal]] = {}
         self._ordered_issue_values_is_initialized = False
 
     def notifyChange(self, info: Inform):
@@ -125,7 +129,7 @@ class Agent50(DefaultParty):
         utility_value: Decimal = self._calculateUtilityValue(self._last_received_bid)
 
         # log the incoming bid
-        self._incoming_bids.append((self._last_received_bid, utility_value))
+        self._logIncomingBid(self._last_received_bid, utility_value)
 
         # Check for a deadlock (when the utility value of the incoming bid is lower than that of the previous incoming bid)
         # If so, decrease aspiration level (can be time-dependent) -> this is where the concession is made
@@ -147,11 +151,22 @@ class Agent50(DefaultParty):
 
         return action
 
+    # Logs the incoming bid and updates the opponent statistics with it
+    def _logIncomingBid(self, bid: Bid, utility_value: Decimal):
+        # Count the issues that changed since the previous incoming bid, once per received bid
+        previous_bid = self._incoming_bids[-1][0] if self._incoming_bids else None
+        if bid and previous_bid:
+            for issue in self._issue_changes:
+                if bid.getValue(issue) != previous_bid.getValue(issue):
+                    self._issue_changes[issue] += 1
+
+        self._incoming_bids.append((bid, utility_value))
+        self._unique_incoming_bids.add(bid)
+
     # Get the fraction of unique incoming bids
     def _getFractionUniqueIncomingBids(self):
-        unique_received_bids = set([x[0] for x in self._incoming_bids])
         return (
-            len(unique_received_bids) / len(self._incoming_bids)
+            len(self._unique_incoming_bids) / len(self._incoming_bids)
             if len(self._incoming_bids) >= 1
             else 1
         )
@@ -193,24 +208,8 @@ class Agent50(DefaultParty):
         if len(self._incoming_bids) < 2:
             return 0
 
-        # Get the total of changes between successive bids
-        changes = 0
-        n = len(self._incoming_bids) - 1
-        for i in range(n):
-            if (
-                not self._incoming_bids[n - 1]
-                or not self._incoming_bids[n - 1][0]
-                or not self._incoming_bids[n - (i + 1)]
-                or not self._incoming_bids[n - (i + 1)][0]
-            ):
-                continue
-            if self._incoming_bids[n - i][0].getValue(issue) != self._incoming_bids[
-                n - (i + 1)
-            ][0].getValue(issue):
-                changes += 1
-
-        # Variability is total changes divided by total bids
-        return changes / n
+        # Variability is total changes between successive bids divided by total bids
+        return self._issue_changes[issue] / (len(self._incoming_bids) - 1)
 
     # Bid generator for the trade-off agent
     def _generateBid(self) -> Bid:
@@ -232,22 +231,30 @@ class Agent50(DefaultParty):
         if len(bid_values) < len(variabilities):
             bid_values = dict()
             for issue in issues_sorted_by_variance:
-                bid_values[issue] = list(self._ordered_issue_values[issue])[-1]
-
-        new_proposed_bid = Bid(bid_values)
+                bid_values[issue] = self._ordered_issue_values[issue][-1]
+
+        # Rank of the value of each issue, and the utility of the bid as the sum of the weighted value utilities
+        ranks = {
+            issue: self._issue_value_ranks[issue][value]
+            for issue, value in bid_values.items()
+        }
+        utility_value = sum(
+            (self._weighted_value_utilities[issue][rank] for issue, rank in ranks.items()),
+            Decimal(0),
+        )
 
         # Raise the value of each issue incrementally until the aspiration level has been reached
         # Max out the first issue, if that does not reach the aspiration level, continue to the next issue
         for issue in issues_sorted_by_variance:
-            ordered_values = list(self._ordered_issue_values[issue])
-            current_value = bid_values[issue]
-            index = ordered_values.index(current_value)
-            while (index < len(ordered_values)) & (
-                self._calculateUtilityValue(new_proposed_bid) < self._aspiration_level
-            ):
-                bid_values[issue] = ordered_values[index]
-                new_proposed_bid = Bid(bid_values)
+            weighted_utilities = self._weighted_value_utilities[issue]
+            index = ranks[issue]
+            while index + 1 < len(weighted_utilities) and utility_value < self._aspiration_level:
                 index += 1
+                utility_value += weighted_utilities[index] - weighted_utilities[ranks[issue]]
+                ranks[issue] = index
+            bid_values[issue] = self._ordered_issue_values[issue][ranks[issue]]
+
+        new_proposed_bid = Bid(bid_values)
 
         # Decrease aspiration level if new proposed bid is the same as last proposed bid
         if self._last_send_bid and new_proposed_bid == self._last_send_bid:
@@ -273,8 +280,16 @@ class Agent50(DefaultParty):
             values_sorted_by_utility = dict(
                 sorted(utility_values.items(), key=lambda item: item[1])
             )
-            # Store the results
-            self._ordered_issue_values[issue] = values_sorted_by_utility.keys()
+            # Store the results, with the rank of every value and its utility weighted by the issue weight
+            weight = profile.getWeight(issue)
+            self._ordered_issue_values[issue] = list(values_sorted_by_utility.keys())
+            self._issue_value_ranks[issue] = {
+                value: rank for rank, value in enumerate(values_sorted_by_utility)
+            }
+            self._weighted_value_utilities[issue] = [
+                weight * utility for utility in values_sorted_by_utility.values()
+            ]
+            self._issue_changes.setdefault(issue, 0)
 
         # Change the state variable to note that the data structure has been initialized
         self._ordered_issue_values_is_initialized = True
@@ -1,19 +1,11 @@
-from geniusweb.opponentmodel import FrequencyOpponentModel
 from decimal import Decimal
-from geniusweb.issuevalue.Domain import Domain
 from geniusweb.issuevalue.Bid import Bid
-from typing import Dict, Optional
-from geniusweb.issuevalue.Value import Value
-from geniusweb.utils import val
 import numpy as np
 
+from agents.template_agent.utils.frequency_table import MutableFrequencyOpponentModel
 
-class FreqModelWeighted(FrequencyOpponentModel.FrequencyOpponentModel):
 
-    def __init__(self, domain: Optional[Domain],
-                 freqs: Dict[str, Dict[Value, int]], total: int,
-                 resBid: Optional[Bid]):
-        super.__init__(domain, freqs, total, resBid)
+class FreqModelWeighted(MutableFrequencyOpponentModel):
 
     # Override
     def getUtility(self, bid: Bid) -> Decimal:
@@ -23,10 +15,24 @@ class FreqModelWeighted(FrequencyOpponentModel.FrequencyOpponentModel):
             return Decimal(1)
         sum = Decimal(0)
 
-        for issue in val(self._domain).getIssues():
+        for issue in self._domain.getIssues():
             if issue in bid.getIssues():
-                sum = sum + Decimal(self._issueWeights[issue]) * self._getFraction(issue, val(bid.getValue(issue)))
-        return round(sum / len(self._bidFrequencies), FrequencyOpponentModel.FrequencyOpponentModel._DECIMALS)
+                sum = sum + Decimal(self._issueWeights[issue]) * self._getFraction(issue, bid.getValue(issue))
+        return round(sum / len(self._table.issues), MutableFrequencyOpponentModel._DECIMALS)
+
+    """
+    Utilities of encoded bids as floats, without the rounding of getUtility. Every row of codes holds the
+    value index per issue, with the issues sorted and the values in domain order (the layout of the table)
+    """
+    def getUtilities(self, codes: np.ndarray) -> np.ndarray:
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+        if self._totalBids == 0:
+            return np.ones(len(codes))
+
+        weights = np.array([self._issueWeights[issue] for issue in self._table.issues], dtype=np.float64)
+        fractions = self._table.counts[codes + self._table.offsets[:-1]] / self._totalBids
+        return fractions @ weights / len(self._table.issues)
 
     """
     Find issue weights by considering count of most occurring value in each domain and scaling their sum to be 1
@@ -34,21 +40,16 @@ class FreqModelWeighted(FrequencyOpponentModel.FrequencyOpponentModel):
     def updateIssueWeights(self):
         self._issueWeights = {}
         totalWeights = 0.0
-        for issue in val(self._domain).getIssues():
-            freqs = []
+        for issue in self._table.issues:
+            counts = self._table.issue_counts(issue)
 
-            for value, count in self._bidFrequencies.get(issue).items():
-                freqs.append(count)
-
-            if len(freqs) <= 1:
+            if np.count_nonzero(counts) <= 1:
                 self._issueWeights[issue] = 1
             else:
-                freqs = np.array(freqs) / self._totalBids
-                self._issueWeights[issue] = np.max(freqs)
+                self._issueWeights[issue] = counts.max() / self._totalBids
             totalWeights += self._issueWeights[issue]
 
         for issue, weight in self._issueWeights.items():
             self._issueWeights[issue] = weight / totalWeights
 
         return self._issueWeights
-
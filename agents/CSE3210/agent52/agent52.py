@@ -1,14 +1,12 @@
 import logging
 import time
 from typing import cast
-from operator import itemgetter
 import numpy as np
 from decimal import Decimal
 
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -22,6 +20,8 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 )
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from .FreqModelWeighted import FreqModelWeighted
+from agents.template_agent.utils.acceptance_conditions import SlidingWindow, UtilityLog
+from agents.template_agent.utils.domain_tables import get_domain_table
 from tudelft_utilities_logging.Reporter import Reporter
 
 """
@@ -37,8 +37,13 @@ class Agent52(DefaultParty):
         self._last_received_action = None
         self._opp_model = None
         self._window_size = 10 # last 10 opponent bids are stored window below
-        self._opp_bids_window = []
+        self._opp_utilities = UtilityLog()  # utilities of all opponent bids, the window is its tail
+        self._opp_window = SlidingWindow(self._opp_utilities)
         self._opp_best_bid = None
+        # opponent utilities of the bids in order of our utility, valid for a version of the frequency model
+        self._opp_utility_cache = None
+        self._opp_utility_version = None
+        self._opp_utility_count = 0
 
     def notifyChange(self, info: Inform):
         """This is the entry point of all interaction with your agent after is has been initialised.
@@ -63,19 +68,18 @@ class Agent52(DefaultParty):
 
             # Create the weighted frequency model
             self._opp_model = FreqModelWeighted.create().With(self._profile.getProfile().getDomain(), None)
-            self._opp_model.__class__ = FreqModelWeighted
 
 
-            # Generate sorted (decr.) list of all possible bids with their corresponding utility values
+            # Get the table of all possible bids sorted (decr.) by their utility values
             # Create reservation value after
             profile = self._profile.getProfile()
-            allBids = AllBidsList(self._profile.getProfile().getDomain())
-            self._bid_utility_tuple = [(bid, profile.getUtility(bid)) for bid in allBids]
-            self._bid_utility_tuple.sort(key=itemgetter(1), reverse=True)
+            self._domain_table = get_domain_table(profile)
+            self._max_util = profile.getUtility(self._domain_table.bid(self._domain_table.order[0]))
+            min_util = profile.getUtility(self._domain_table.bid(self._domain_table.order[-1]))
 
             # set reservation value to maximum of (0.4, worst bid utility in domain)
             alpha = 0.4
-            self._rsv_val = alpha if alpha > self._bid_utility_tuple[-1][1] else self._bid_utility_tuple[-1][1]
+            self._rsv_val = alpha if alpha > min_util else min_util
 
         # ActionDone is an action send by an opponent (an offer or an accept)
         elif isinstance(info, ActionDone):
@@ -128,7 +132,6 @@ class Agent52(DefaultParty):
     def _myTurn(self):
         # Update the frequency model and the issue weights with the last received bid
         self._opp_model = self._opp_model.WithAction(self._last_received_action, self._progress)
-        self._opp_model.__class__ = FreqModelWeighted
         self._opp_model.updateIssueWeights()
 
         # Update the best bid offered by the opponent if the last received bid is better for us
@@ -139,9 +142,7 @@ class Agent52(DefaultParty):
 
         # Update the bids in the window of last received bids (window has size self._window_size)
         if self._last_received_bid is not None:
-            self._opp_bids_window.append(profile.getUtility(self._last_received_bid))
-        if len(self._opp_bids_window) > self._window_size:
-            self._opp_bids_window.pop(0)
+            self._opp_utilities.append(profile.getUtility(self._last_received_bid))
 
         bid = self._findBid()
         action = Offer(self._me, bid)
@@ -179,12 +180,13 @@ class Agent52(DefaultParty):
     def _window_max(self):
         # check if better than maximum utility in past window
         profile = self._profile.getProfile()
-        return profile.getUtility(self._last_received_bid) >= np.max(self._opp_bids_window)
+        return profile.getUtility(self._last_received_bid) >= self._opp_window.last(self._window_size)
 
     def _window_avg(self):
         # check if better than average utility in past window
         profile = self._profile.getProfile()
-        return profile.getUtility(self._last_received_bid) >= np.mean(self._opp_bids_window)
+        n = len(self._opp_utilities)
+        return profile.getUtility(self._last_received_bid) >= self._opp_utilities.mean(max(n - self._window_size, 0), n)
 
     def _overall_max(self):
         # check if better than maximum utility received in entire negotiation
@@ -198,32 +200,47 @@ class Agent52(DefaultParty):
     def _findBid(self) -> Bid:
         # e value determines concession rate by influencing the shape of the target utility curve
         e = 0.3
-        max_util = self._bid_utility_tuple[0][1]
-        target_util = self._getUtilityGoal(self._progress.get(time.time() * 1000), e, Decimal(self._rsv_val), max_util)
+        target_util = self._getUtilityGoal(self._progress.get(time.time() * 1000), e, Decimal(self._rsv_val), self._max_util)
         # Allow for some additional (10% of target utility) randomness in the possible bids to send to opponent
         # in the first half of the negotiation. Otherwise, will send mostly the same bid constantly at first.
         if self._progress.get(time.time() * 1000) < 0.5:
             target_util = target_util - Decimal(np.random.uniform(0, 0.1 * float(target_util)))
 
-        candidates = []
-        opp_utilities = []
-        # Find all bids above target utility and store along with the associated opponent utilities of the bids
-        for items in self._bid_utility_tuple:
-            if items[1] < target_util:
-                break
-            candidates.append(items[0])
-            opp_utilities.append(float(self._opp_model.getUtility(items[0])))
+        # Find all bids above target utility (a prefix of the sorted bids, at least the best bid)
+        # along with the associated opponent utilities of the bids
+        count = max(self._domain_table.cutoff(float(target_util)), 1)
+        opp_utilities = self._getOppUtilities(count)
 
         # apply roulette wheel selection to the bids to choose one using exponential fitness function
-        return self._roulette_selection(candidates, opp_utilities, self._fitness_exp)
+        index = self._roulette_selection(opp_utilities, self._fitness_exp)
+        return self._domain_table.bid(self._domain_table.order[index])
 
     """
-    Roulette wheel selection to select a random bid to send.
+    Opponent utilities of the first count bids in order of our utility. They are cached until the frequency
+    model changes, and only the bids beyond the cached prefix are computed when the candidate set grows.
+    """
+    def _getOppUtilities(self, count):
+        version = self._opp_model.getTable().version
+        if self._opp_utility_cache is None:
+            self._opp_utility_cache = np.empty(len(self._domain_table), dtype=np.float64)
+        if version != self._opp_utility_version:
+            self._opp_utility_version = version
+            self._opp_utility_count = 0
+
+        if count > self._opp_utility_count:
+            codes = self._domain_table.codes[self._domain_table.order[self._opp_utility_count:count]]
+            self._opp_utility_cache[self._opp_utility_count:count] = self._opp_model.getUtilities(codes)
+            self._opp_utility_count = count
+        return self._opp_utility_cache[:count]
+
+    """
+    Roulette wheel selection to select the index of a random bid to send.
     Scale opponent utilities to [0, 1], apply fitness function to it and use fitness values as probabilities 
         for choosing each bid.
     """
-    def _roulette_selection(self, candidates, utilities, fitness_func, eps=0.0001):
-        normalised_utils = np.array(utilities)
+    def _roulette_selection(self, utilities, fitness_func, eps=0.0001):
+        normalised_utils = np.asarray(utilities)
+        candidates = len(normalised_utils)
 
         # if same utilities, choose random bid, otherwise continue scaling to [0, 1]
         if np.max(normalised_utils) - np.min(normalised_utils) < eps:
@@ -0,0 +1,144 @@
+from random import randint
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+from geniusweb.issuevalue.Value import Value
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+from .Group55OpponentModel import FrequencyOpponentModel
+
+
+class NashCandidateStore:
+    '''
+    Keeps the best candidate bids by estimated Nash product.
+    <p>
+    Every kept bid gets an integer id and is stored as a row of value indices in
+    a contiguous code matrix. Our own utility of a bid never changes during a
+    session, so it is computed once when the bid is added. The opponent utility
+    is re-estimated for all kept bids at once on {@link #recalibrate}, using
+    per-issue float tables taken from the opponent model, followed by an
+    argpartition that prunes the store to the best bids.
+    '''
+
+    def __init__(self, domain: Domain, profile: LinearAdditive, capacity: int):
+        '''
+        @param domain   the domain of the negotiation.
+        @param profile  our own profile, used to compute our utility of a bid.
+        @param capacity the amount of bids kept after a recalibration.
+        '''
+        self._profile = profile
+        self._capacity = max(capacity, 1)
+        self._issues: List[str] = sorted(domain.getIssues())
+        self._valueIndex: Dict[str, Dict[Value, int]] = {
+            issue: {value: i for i, value in enumerate(domain.getValues(issue))}
+            for issue in self._issues}
+
+        """
+        Parallel arrays indexed by the slot of a kept bid. Only the first '_size'
+        slots are in use. '_slotOfBid' maps a bid to its slot, so a bid that is
+        added twice is kept only once.
+        """
+        self._bids: List[Bid] = []
+        self._slotOfBid: Dict[Bid, int] = {}
+        self._codes = np.zeros((max(capacity, 1) + 1, len(self._issues)), dtype=np.int32)
+        self._ownUtilities = np.zeros(len(self._codes), dtype=np.float64)
+        self._nashProducts = np.zeros(len(self._codes), dtype=np.float64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, bid: Bid, nashProduct) -> None:
+        '''
+        Adds a bid to the store, or updates its Nash product if it is already
+        kept.
+
+        @param bid         the bid to keep.
+        @param nashProduct the current estimate of the Nash product of the bid.
+        '''
+        slot = self._slotOfBid.get(bid)
+        if slot is not None:
+            self._nashProducts[slot] = float(nashProduct)
+            return
+
+        if self._size == len(self._codes):
+            self._grow()
+
+        slot = self._size
+        for column, issue in enumerate(self._issues):
+            self._codes[slot, column] = self._valueIndex[issue][bid.getValue(issue)]
+        self._ownUtilities[slot] = float(self._profile.getUtility(bid))
+        self._nashProducts[slot] = float(nashProduct)
+        self._bids.append(bid)
+        self._slotOfBid[bid] = slot
+        self._size += 1
+
+    def recalibrate(self, opponentModel: FrequencyOpponentModel) -> None:
+        '''
+        Re-estimates the Nash product of all kept bids in a single vectorized
+        pass and prunes the store to the best `capacity` bids.
+
+        @param opponentModel the opponent model to estimate the opponent
+                             utility with.
+        '''
+        if self._size == 0:
+            return
+
+        codes = self._codes[:self._size]
+        opponentUtilities = np.zeros(self._size, dtype=np.float64)
+        for column, issue in enumerate(self._issues):
+            opponentUtilities += self._issueTable(opponentModel, issue)[codes[:, column]]
+        nashProducts = self._ownUtilities[:self._size] * opponentUtilities
+        self._nashProducts[:self._size] = nashProducts
+
+        if self._size > self._capacity:
+            keep = np.argpartition(-nashProducts, self._capacity - 1)[:self._capacity]
+            keep.sort()
+            self._compact(keep)
+
+    def pickOneOfBest(self, nBest: int) -> Tuple[Optional[Bid], float]:
+        '''
+        @param nBest the amount of best bids to choose from.
+        @return a random bid among the `nBest` bids with the highest Nash product
+                and its Nash product, or (None, 0) if the store is empty.
+        '''
+        if self._size == 0:
+            return None, 0
+
+        nBest = max(1, min(nBest, self._size))
+        nashProducts = self._nashProducts[:self._size]
+        if nBest < self._size:
+            best = np.argpartition(-nashProducts, nBest - 1)[:nBest]
+        else:
+            best = np.arange(self._size)
+        slot = int(best[randint(0, nBest - 1)])
+        return self._bids[slot], float(nashProducts[slot])
+
+    def _issueTable(self, opponentModel: FrequencyOpponentModel, issue: str) -> np.ndarray:
+        '''
+        @return the weighted estimated opponent utility of every value of the
+                issue, ordered like the value indices in the code matrix.
+        '''
+        table = np.zeros(len(self._valueIndex[issue]), dtype=np.float64)
+        for value, utility in opponentModel.getValueUtilities(issue).items():
+            index = self._valueIndex[issue].get(value)
+            if index is not None:
+                table[index] = utility
+        return table
+
+    def _compact(self, keep: np.ndarray) -> None:
+        size = len(keep)
+        self._codes[:size] = self._codes[keep]
+        self._ownUtilities[:size] = self._ownUtilities[keep]
+        self._nashProducts[:size] = self._nashProducts[keep]
+        self._bids = [self._bids[slot] for slot in keep]
+        self._slotOfBid = {bid: slot for slot, bid in enumerate(self._bids)}
+        self._size = size
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self._codes)
+        self._codes = np.resize(self._codes, (capacity, self._codes.shape[1]))
+        self._ownUtilities = np.resize(self._ownUtilities, capacity)
+        self._nashProducts = np.resize(self._nashProducts, capacity)
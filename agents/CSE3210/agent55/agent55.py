@@ -21,9 +21,9 @@ from geniusweb.party.DefaultParty import DefaultParty
 from geniusweb.profileconnection.ProfileConnectionFactory import ProfileConnectionFactory
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
-import heapq
 from decimal import *
 from .Group55OpponentModel import FrequencyOpponentModel
+from .NashCandidateStore import NashCandidateStore
 
 
 class Agent55(DefaultParty):
@@ -84,8 +84,8 @@ class Agent55(DefaultParty):
         """
         Matas: These variables enable our bidding strategy
         """
-        self.ourBestBids = []
-        self.opponentsBestBids = []
+        self.ourBestBids: NashCandidateStore = None
+        self.opponentsBestBids: NashCandidateStore = None
         self.roundsSinceBidRecalibration = 0
         self.reCalibrateEveryRounds = 10
         self.randomBidDiscoveryAttemptsPerTurn = 500
@@ -123,6 +123,12 @@ class Agent55(DefaultParty):
             self.opponentModel = self.opponentModel.With(
                 profile.getDomain(), profile.getReservationBid())
 
+            # create the stores of candidate bids, scored by their nash product
+            self.ourBestBids = NashCandidateStore(
+                profile.getDomain(), profile, self.amountOfBestBidsToKeep)
+            self.opponentsBestBids = NashCandidateStore(
+                profile.getDomain(), profile, self.amountOfBestBidsToKeep)
+
         # ActionDone is an action send by an opponent (an offer or an accept)
         elif isinstance(info, ActionDone):
             action: Action = cast(ActionDone, info).getAction()
@@ -343,48 +349,29 @@ class Agent55(DefaultParty):
 
         return goodBid, nash
 
-    def _updateBidsAndGetBestBid(self, bestBids, bestBidFromThisTurn, nashProduct, nBestBids) -> Bid:
+    def _updateBidsAndGetBestBid(self, bestBids: NashCandidateStore, bestBidFromThisTurn, nashProduct, nBestBids) -> tuple[Bid, float]:
         self.roundsSinceBidRecalibration += 1
 
         # Must at least pick one option
         if nBestBids < 1:
             nBestBids = 1
 
-        # After a certain amount of rounds has passed, we recallibrate our bid storage
+        # After a certain amount of rounds has passed, we recallibrate our bid storage.
+        # This rescores all kept bids against the current opponent model and prunes the store.
         if self.roundsSinceBidRecalibration >= self.reCalibrateEveryRounds:
             self.roundsSinceBidRecalibration = 0
+            bestBids.recalibrate(self.opponentModel)
 
-            # Update and prune
-            updatedRaw = [self._popAndUpdate(bestBids)
-                          for i in range(min(len(bestBids), self.amountOfBestBidsToKeep))]
-
-            bestBids.clear()
-            [heapq.heappush(bestBids, x)
-             for x in updatedRaw]
-
-        # Invert the nash product since heapq is a min queue
-        invertedNashProduct = 1 - nashProduct
-        heapq.heappush(bestBids,
-                       (invertedNashProduct, MaxHeapObj(bestBidFromThisTurn)))
+        bestBids.add(bestBidFromThisTurn, nashProduct)
 
         # Pick a bid close to the Nash Equilibrium
-        toPickFrom = heapq.nsmallest(min(nBestBids, len(bestBids)), bestBids)
-
-        (currentBestInvertedNashProduct,
-         currentBestBid) = toPickFrom[randint(0, len(toPickFrom) - 1)]
-
-        # Invert nash product and return
-        return currentBestBid.val, 1 - currentBestInvertedNashProduct
+        return bestBids.pickOneOfBest(nBestBids)
 
     def _getNashProduct(self, bid) -> Decimal:
         utility = self._profile.getProfile().getUtility(bid)
         opponentUtility = self.opponentModel.getUtility(bid)
         return utility * opponentUtility
 
-    def _popAndUpdate(self, bestBids):
-        x = heapq.heappop(bestBids)
-        return (self._getNashProduct(x[1].val), x[1])
-
     def _updateUtilSpace(self) -> LinearAdditive:
         newutilspace = self._profile.getProfile()
         if not newutilspace == self._utilspace:
@@ -447,11 +434,3 @@ class Agent55(DefaultParty):
             self.ourUtilityLastTimeByTheirBids = ourUtilityThisBid
             self.theirUtilityLastTimeByTheirBids = theirUtilityThisBid
             ###End of calculation: ourAverageUtilityChangeByTheirBids and TheirAverageUtilityChangeByTheirBids ########
-
-# helper for heap
-
-
-class MaxHeapObj(object):
-    def __init__(self, val): self.val = val
-    def __lt__(self, other): return True
-    def __eq__(self, other): return True
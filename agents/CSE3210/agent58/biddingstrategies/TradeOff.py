@@ -4,6 +4,8 @@ from typing import cast
 
 from geniusweb.bidspace.AllBidsList import AllBidsList
 
+from agents.template_agent.utils.domain_tables import get_domain_table
+
 from ..Constants import Constants
 
 
@@ -15,27 +17,17 @@ class TradeOff:
         self._tolerance = Constants.iso_bids_tolerance
         self._domain = domain
         self._issues = domain.getIssues()
-        self._sorted_bids = self._sort_bids(AllBidsList(self._domain))
-
-    # sort bids on Utility descending
-    def _sort_bids(self, all_bids):
-        bids = []
-        for b in all_bids:
-            bid = {"bid": b, "utility": self._profile.getUtility(b)}
-            bids.append(bid)
-        return sorted(bids, key=lambda d: d['utility'], reverse=True)
+        # the domain table is shared between sessions and worker processes, bids are only decoded when picked
+        self._table = get_domain_table(self._profile)
 
-    # return set of iso curve bids
+    # return set of iso curve bids, the first n bids in descending utility within the tolerance of the offer
     def _iso_bids(self, n=5):
-        bids = []
-        i = 0
-        for bid in self._sorted_bids:
-            if self._offer + self._tolerance > bid["utility"] > self._offer - self._tolerance:
-                bids.append(bid["bid"])
-                i += 1
-            if i == n:
-                break
-        return bids
+        table = self._table
+        # the bids along table.order are sorted on utility descending, so the iso curve bids are a slice of it
+        candidates = table.order[table.cutoff(self._offer + self._tolerance):table.cutoff(self._offer - self._tolerance)]
+        utilities = table.utilities[candidates]
+        inside = (self._offer + self._tolerance > utilities) & (utilities > self._offer - self._tolerance)
+        return [table.bid(i) for i in candidates[inside][:n]]
 
     # return a random bid
     def _get_random_bid(self):
@@ -1,9 +1,9 @@
-import copy
 import logging
 import time
-from random import randint, choice
+from random import choice
 from typing import cast, Dict
 
+import numpy as np
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
@@ -15,7 +15,6 @@ from geniusweb.inform.Settings import Settings
 from geniusweb.inform.YourTurn import YourTurn
 from geniusweb.issuevalue import Value
 from geniusweb.issuevalue.Bid import Bid
-from geniusweb.opponentmodel.FrequencyOpponentModel import FrequencyOpponentModel
 from geniusweb.party.Capabilities import Capabilities
 from geniusweb.party.DefaultParty import DefaultParty
 from geniusweb.profile.utilityspace import LinearAdditiveUtilitySpace
@@ -25,22 +24,27 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+from agents.template_agent.utils.frequency_table import MutableFrequencyOpponentModel
+
 
 class Agent61(DefaultParty):
     """
     Template agent that offers random bids until a bid with sufficient utility is offered.
     """
 
+    # number of mutants of the ideal bid that are scored per turn
+    _MUTANTS = 1000
+
     def __init__(self, reporter: Reporter = None):
         super().__init__(reporter)
         self.getReporter().log(logging.INFO, "party is initialized")
         self._profile = None
         self._received_bids = list()
-        self._sent_bids = list()
+        self._sent_bid_ids = list()
         self._best_bid = None
         self._last_received_bid: Bid = None
         self._last_sent_bid: Bid = None
-        self._opponent_model: FrequencyOpponentModel = None
+        self._opponent_model: MutableFrequencyOpponentModel = None
         self._reservation_value = None
 
     def notifyChange(self, info: Inform):
@@ -73,14 +77,10 @@ class Agent61(DefaultParty):
 
                 # Add the action to the opponent model, create one if it doesn't exist
                 if self._opponent_model is None:
-                    self._opponent_model = FrequencyOpponentModel.create()
+                    self._opponent_model = MutableFrequencyOpponentModel.create()
                     self._opponent_model = self._opponent_model \
                         .With(newDomain=(self._profile.getProfile()).getDomain(), newResBid=None)
-                    self._opponent_model = FrequencyOpponentModel.WithAction(self._opponent_model, action,
-                                                                             self._progress)
-                else:
-                    self._opponent_model = FrequencyOpponentModel.WithAction(self._opponent_model, action,
-                                                                             self._progress)
+                self._opponent_model = self._opponent_model.WithAction(action, self._progress)
 
         # YourTurn notifies you that it is your turn to act
         elif isinstance(info, YourTurn):
@@ -133,6 +133,50 @@ class Agent61(DefaultParty):
             bidVals[issue] = max(utilvals.getUtilities(), key=utilvals.getUtilities().get)
 
         self._best_bid = Bid(bidVals)
+        self._createEncoding()
+
+    # Encodes bids as one value index per issue, with the issues sorted and the values in domain order
+    # (the layout of the frequency table of the opponent model), so that bids can be scored in batch
+    def _createEncoding(self):
+        own_prof = self._profile.getProfile()
+        domain = own_prof.getDomain()
+
+        self._issues = sorted(domain.getIssues())
+        self._values = {issue: list(domain.getValues(issue)) for issue in self._issues}
+        self._value_index = {
+            issue: {value: i for i, value in enumerate(values)} for issue, values in self._values.items()
+        }
+        self._sizes = [len(self._values[issue]) for issue in self._issues]
+        self._offsets = np.concatenate(([0], np.cumsum(self._sizes)[:-1])).astype(np.int64)
+
+        # weighted utility of every value, flat in the same layout as the value counts of the opponent model
+        self._own_utilities = np.array([
+            float(own_prof.getWeight(issue) * own_prof.getUtilities()[issue].getUtility(value))
+            for issue in self._issues for value in self._values[issue]
+        ])
+
+        # mutation order: issue positions from the lowest to the highest weight
+        bw = own_prof.getWeights()
+        self._mutation_order = [self._issues.index(issue) for issue in sorted(bw, key=bw.get)]
+        self._best_codes = self._encode(self._best_bid)
+
+    def _encode(self, bid: Bid) -> np.ndarray:
+        return np.array([self._value_index[issue][bid.getValue(issue)] for issue in self._issues], dtype=np.int64)
+
+    def _decode(self, codes: np.ndarray) -> Bid:
+        return Bid({issue: self._values[issue][code] for issue, code in zip(self._issues, codes)})
+
+    # Utility of each encoded bid for the agent and for the opponent model
+    def _scoreBids(self, codes: np.ndarray):
+        flat = codes + self._offsets
+        own = self._own_utilities[flat].sum(axis=1)
+
+        table = self._opponent_model.getTable()
+        if table.total == 0:
+            opponent = np.ones(len(codes))
+        else:
+            opponent = table.counts[flat].sum(axis=1) / (table.total * len(self._issues))
+        return own, opponent
 
     # execute a turn
     def _myTurn(self):
@@ -187,55 +231,63 @@ class Agent61(DefaultParty):
             selected_bid = self._findCounterBidMutate()
 
         self._last_sent_bid = selected_bid
-        self._sent_bids.append(copy.deepcopy(selected_bid))
+        self._sent_bid_ids.append(int(np.ravel_multi_index(self._encode(selected_bid), self._sizes)))
         return selected_bid
     
-    # Creates a bid by mutating the agent's ideal bid to fit closer
+    # Creates bids by mutating the agent's ideal bid to fit closer
     # to what the opponent model believes is beneficial to the other
-    # party. The more time has passed, the more the ideal bid is mutated
-    def _mutateBid(self, bid: Bid) -> Bid:
-
-        own_prof = self._profile.getProfile()
-        bw = own_prof.getWeights()
-
-        sorted_weights = sorted(bw, key=bw.get)
-        issues_vals = copy.deepcopy(bid.getIssueValues())
-        current_index = int((len(sorted_weights) - 1.0) * self._progress.get(time.time() * 1000))
-
-        while current_index >= 0 and own_prof.getUtility(Bid(issues_vals)) > self._reservation_value:
-            sel_issue_vals = own_prof.getDomain().getIssuesValues()[sorted_weights[current_index]]
-            issues_vals[sorted_weights[current_index]] = sel_issue_vals.get(randint(0, sel_issue_vals.size() - 1))
-            current_index = current_index - 1
+    # party. The more time has passed, the more the ideal bid is mutated.
+    # All mutants are generated at once, as rows of value indices
+    def _mutateBids(self, count: int) -> np.ndarray:
+        num_issues = len(self._issues)
+        current_index = int((num_issues - 1.0) * self._progress.get(time.time() * 1000))
+
+        codes = np.tile(self._best_codes, (count, 1))
+        own = np.full(count, self._own_utilities[self._best_codes + self._offsets].sum())
+
+        # Replace the values of the least important issues by random values, from the issue at the
+        # current index down to the least important one, until a mutant drops to the reservation value
+        for position in reversed(self._mutation_order[:current_index + 1]):
+            mutate = own > self._reservation_value
+            if not mutate.any():
+                break
+            new_codes = np.random.randint(0, self._sizes[position], size=int(mutate.sum()))
+            offset = self._offsets[position]
+            own[mutate] += self._own_utilities[new_codes + offset] - self._own_utilities[codes[mutate, position] + offset]
+            codes[mutate, position] = new_codes
+
+        return codes
 
-        return Bid(issues_vals)
-   
     # Finds an intelligent counter bid, relying on opponent modelling and the
-    # mutateBid function to find a bid that maximizes the Nash product, tries
+    # mutateBids function to find a bid that maximizes the Nash product, tries
     # to equalize both parties' utility value and that is above reservation
     def _findCounterBidMutate(self) -> Bid:
 
-        own_prof = self._profile.getProfile()
-
-        selected_bid = copy.deepcopy(self._last_sent_bid)
-        max_nash_prod = (own_prof.getUtility(selected_bid) * self._opponent_model.getUtility(selected_bid))
-
-        for _ in range(50):
-            newbid = self._mutateBid(copy.deepcopy(self._best_bid))
-            new_nash_prod = (own_prof.getUtility(newbid) * self._opponent_model.getUtility(newbid))
+        selected_codes = self._encode(self._last_sent_bid if self._last_sent_bid is not None else self._best_bid)
+        own, opponent = self._scoreBids(selected_codes[np.newaxis])
+        max_nash_prod = own[0] * opponent[0]
+        selected_opponent_utility = opponent[0]
 
-            diff = (self._opponent_model.getUtility(newbid) - own_prof.getUtility(newbid))
-
-            if new_nash_prod > max_nash_prod and diff < 0.1 and own_prof.getUtility(newbid) > self._reservation_value:
-                # print("OLD: " + str(max_nash_prod) + ", NEW: " + str(new_nash_prod))
-
-                max_nash_prod = new_nash_prod
-                selected_bid = copy.deepcopy(newbid)
-
-        if self._progress.get(time.time() * 1000) > 0.95:
-            for bid in self._sent_bids:
-                if abs(self._opponent_model.getUtility(bid) - own_prof.getUtility(bid)) < 0.1 and \
-                        self._opponent_model.getUtility(bid) > self._opponent_model.getUtility(selected_bid) and \
-                        own_prof.getUtility(bid) > self._reservation_value:
-                    selected_bid = bid
+        # Score all mutants in batch, and take the one with the highest Nash product that qualifies
+        mutants = self._mutateBids(self._MUTANTS)
+        own, opponent = self._scoreBids(mutants)
+        nash_prod = np.where(
+            (opponent - own < 0.1) & (own > self._reservation_value), own * opponent, -np.inf
+        )
+        best = int(np.argmax(nash_prod))
+        if nash_prod[best] > max_nash_prod:
+            selected_codes = mutants[best]
+            selected_opponent_utility = opponent[best]
+
+        if self._progress.get(time.time() * 1000) > 0.95 and self._sent_bid_ids:
+            # The best sent bid for the opponent, with about equal utility for both parties
+            sent = np.stack(np.unravel_index(np.array(self._sent_bid_ids), self._sizes), axis=1)
+            own, opponent = self._scoreBids(sent)
+            opponent = np.where(
+                (np.abs(opponent - own) < 0.1) & (own > self._reservation_value), opponent, -np.inf
+            )
+            best = int(np.argmax(opponent))
+            if opponent[best] > selected_opponent_utility:
+                selected_codes = sent[best]
 
-        return selected_bid
+        return self._decode(selected_codes)
@@ -14,7 +14,7 @@ from geniusweb.inform.Inform import Inform
 from geniusweb.inform.Settings import Settings
 from geniusweb.inform.YourTurn import YourTurn
 from geniusweb.issuevalue.Bid import Bid
-from geniusweb.opponentmodel.FrequencyOpponentModel import FrequencyOpponentModel
+from agents.template_agent.utils.frequency_table import MutableFrequencyOpponentModel
 from geniusweb.party.Capabilities import Capabilities
 from geniusweb.party.DefaultParty import DefaultParty
 from geniusweb.profileconnection.ProfileConnectionFactory import (ProfileConnectionFactory)
@@ -36,7 +36,7 @@ class Agent64(DefaultParty):
         self._profile = None
         self._last_received_bid: Bid = None
         self._last_received_action: Action = None
-        self._opponent_model: FrequencyOpponentModel = None
+        self._opponent_model: MutableFrequencyOpponentModel = None
         # Keeping track of best bid up until now for later usage
         self._best_bid: Bid = None
         self._lowest_bid: Bid = None
@@ -246,4 +246,4 @@ class Agent64(DefaultParty):
 
     def _createFrequencyOpponentModelling(self):
         domain = self._profile.getProfile().getDomain()
-        self._opponent_model: FrequencyOpponentModel = FrequencyOpponentModel.create().With(domain, newResBid=None)
+        self._opponent_model: MutableFrequencyOpponentModel = MutableFrequencyOpponentModel.create().With(domain, newResBid=None)
@@ -1,5 +1,6 @@
 from agents.charging_boul.extended_util_space import ExtendedUtilSpace
 from agents.charging_boul.utils.opponent_model import OpponentModel
+from agents.template_agent.utils.knowledge_store import KnowledgeStore
 from decimal import Decimal
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
@@ -19,7 +20,6 @@ from geniusweb.profileconnection.ProfileConnectionFactory import ProfileConnecti
 from geniusweb.profileconnection.ProfileInterface import ProfileInterface
 from geniusweb.progress.Progress import Progress
 from geniusweb.references.Parameters import Parameters
-from json import dump, load
 from random import randint
 from statistics import mean
 from time import time as clock
@@ -36,8 +36,8 @@ class ChargingBoul(DefaultParty):
         self.domain: Domain = None
         self.e: float = 0.1
         self.extended_space: ExtendedUtilSpace = None
-        self.filepath: str = None
         self.final_rounds: int = 90
+        self.knowledge: KnowledgeStore = None
         self.last_received_bid: Bid = None
         self.last_received_util: Decimal = None
         self.max_util = Decimal(1)
@@ -78,13 +78,16 @@ class ChargingBoul(DefaultParty):
                 self.util_space = self.profile_int.getProfile()
                 self.domain = self.util_space.getDomain()
                 self.extended_space = ExtendedUtilSpace(self.util_space)
-                self.detect_strategy()
+                # load the summaries of all opponents, the opponent is only known after its first action
+                if self.storage_dir is not None:
+                    self.knowledge = KnowledgeStore(self.storage_dir)
+                    self.knowledge.load()
             elif isinstance(info, ActionDone):
                 other_act: Action = info.getAction()
                 actor = other_act.getActor()
-                if actor != self.me:
+                if actor != self.me and self.other is None:
                     self.other = str(actor).rsplit("_", 1)[0]
-                    self.filepath = f"{self.storage_dir}/{self.other}.json"
+                    self.detect_strategy()
                 if isinstance(other_act, Offer):
                     # create opponent model if it was not yet initialised
                     if self.opponent_model is None:
@@ -129,9 +132,9 @@ class ChargingBoul(DefaultParty):
     ##################### private support funcs #########################
 
     def detect_strategy(self):
-        if self.filepath is not None:
-            with open(self.filepath, "w") as f:
-                self.summary = load(f)
+        if self.knowledge is not None:
+            self.summary = self.knowledge.get(self.other, "summary")
+        if self.summary is not None:
             if self.summary["ubi"] >= 5:
                 self.opponent_strategy = "boulware"
                 self.e = 0.2 * 2**(5 - self.summary["ubi"])
@@ -213,14 +216,18 @@ class ChargingBoul(DefaultParty):
         if self.profile_int != None:
             self.profile_int.close()
             self.profile_int = None
+        if self.knowledge is not None:
+            self.knowledge.close()
+            self.knowledge = None
 
     def save_data(self):
+        if self.knowledge is None or self.other is None:
+            return
         ubi, aui = self.summarize_opponent()
-        with open(self.filepath, "w") as f:
-            dump({
-                "ubi": ubi,
-                "aui": aui
-            }, f)
+        self.knowledge.put(self.other, "summary", {
+            "ubi": ubi,
+            "aui": aui
+        })
 
     def summarize_opponent(self):
         # Detect how much the number of unique bids is increasing
@@ -1,7 +1,5 @@
 import logging
-from pandas import array
 from random import randint
-from sklearn.linear_model import LinearRegression
 from time import time
 from typing import cast
 
@@ -29,6 +27,7 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.template_agent.utils.last_moment import LastMoment, ResponseTimeEstimator
 from agents.template_agent.utils.opponent_model import OpponentModel
 
 
@@ -57,7 +56,8 @@ class ExperimentAgent(DefaultParty):
         self.bids_given: list = None
         self.bids_received: list = None
         self.proposal_time: float = None
-        self.opponent_bid_times: list = None
+        self.opponent_bid_times: ResponseTimeEstimator = None
+        self.last_moment: LastMoment = None
 
     def notifyChange(self, data: Inform):
         """MUST BE IMPLEMENTED
@@ -88,7 +88,8 @@ class ExperimentAgent(DefaultParty):
             self.domain = self.profile.getDomain()
             profile_connection.close()
 
-            self.opponent_bid_times = []
+            self.opponent_bid_times = ResponseTimeEstimator(window_size=10)
+            self.last_moment = LastMoment(self.progress)
 
         # ActionDone informs you of an action (an offer or an accept)
         # that is performed by one of the agents (including yourself).
@@ -107,13 +108,15 @@ class ExperimentAgent(DefaultParty):
         elif isinstance(data, YourTurn):
             # execute a turn
             if self.proposal_time is not None:
-                self.opponent_bid_times.append(self.progress.get(time() * 1000) - self.proposal_time)
+                self.opponent_bid_times.add(self.progress.get(time() * 1000) - self.proposal_time)
             self.my_turn()
             self.proposal_time = self.progress.get(time() * 1000)
 
         # Finished will be send if the negotiation has ended (through agreement or deadline)
         elif isinstance(data, Finished):
             self.save_data()
+            if self.last_moment is not None:
+                self.logger.log(logging.INFO, "last moment bidding " + self.last_moment.report())
             # terminate the agent MUST BE CALLED
             self.logger.log(logging.INFO, "party is terminating:")
             super().terminate()
@@ -183,11 +186,9 @@ class ExperimentAgent(DefaultParty):
             # TIMED BIDDING
             t = self.progress.get(time() * 1000)
             bid = self.find_bid()
-            # Wait for final bid
+            # Wait for final bid, until only the predicted response time of the opponent is left
             if t >= 0.95:
-                t_o = self.predict_bid_time(self.opponent_bid_times[-10:])
-                while t < 1 - t_o:
-                    t = self.progress.get(time() * 1000)
+                self.last_moment.wait_for_response(self.opponent_bid_times)
             action = Offer(self.me, bid)
 
         # send the action
@@ -265,8 +266,3 @@ class ExperimentAgent(DefaultParty):
 
         return our_utility
         return score
-
-    def predict_bid_time(self, bid_times):
-        regr = LinearRegression()
-        regr.fit(array(range(len(bid_times))).reshape(-1, 1), array(bid_times).reshape(-1, 1))
-        return regr.predict(array([len(bid_times)]).reshape(1, 1))
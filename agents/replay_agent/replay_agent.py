@@ -0,0 +1,146 @@
+import json
+import logging
+from typing import Dict, List, Optional, Tuple, cast
+
+from geniusweb.actions.Accept import Accept
+from geniusweb.actions.Action import Action
+from geniusweb.actions.Offer import Offer
+from geniusweb.inform.ActionDone import ActionDone
+from geniusweb.inform.Finished import Finished
+from geniusweb.inform.Inform import Inform
+from geniusweb.inform.Settings import Settings
+from geniusweb.inform.YourTurn import YourTurn
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.party.Capabilities import Capabilities
+from geniusweb.party.DefaultParty import DefaultParty
+from geniusweb.profileconnection.ProfileConnectionFactory import (
+    ProfileConnectionFactory,
+)
+from pyson.ObjectMapper import ObjectMapper
+from tudelft_utilities_logging.Reporter import Reporter
+
+# recorded offers and the bid the party accepted at the end, by trace path and position
+_recordings: Dict[Tuple[str, int], Tuple[List[Bid], Optional[Bid]]] = {}
+
+
+def load_trace(path: str) -> dict:
+    # results trace of a session, from a session_results_trace.json or a session cache entry
+    with open(path, encoding="utf-8") as f:
+        trace = json.load(f)
+    trace = trace["trace"] if "trace" in trace else trace
+    # only bilateral SAOP sessions can be replayed, MOPAC sessions have other phases and any number of parties
+    if "SAOPSettings" not in trace["settings"]:
+        raise ValueError(f"{path} is not a recording of a SAOP session, only SAOP sessions can be replayed")
+    return trace
+
+
+def load_recording(path: str, position: int) -> Tuple[List[Bid], Optional[Bid]]:
+    """Offers of the party at a position (1 or 2) in a recorded session, and the bid it accepted, if any."""
+    key = (path, position)
+    if key not in _recordings:
+        trace = load_trace(path)
+        actor = trace["connections"][position - 1]
+        bids, accepted = [], None
+        for action in trace["actions"]:
+            if "Offer" in action and action["Offer"]["actor"] == actor:
+                bids.append(ObjectMapper().parse(action["Offer"]["bid"], Bid))
+            elif "Accept" in action and action["Accept"]["actor"] == actor:
+                accepted = ObjectMapper().parse(action["Accept"]["bid"], Bid)
+        _recordings[key] = (bids, accepted)
+    return _recordings[key]
+
+
+class ReplayAgent(DefaultParty):
+    """
+    Replays the offers of a party in a recorded session, for cheap and deterministic evaluation of an opponent.
+
+    Parameters:
+        trace: path of the recorded results trace (session_results_trace.json or a session cache entry)
+        position: position of the recorded party in the session, 1 or 2. Defaults to 1.
+        accept: acceptance policy, one of
+            "never": never accept, the last recorded offer is repeated once the recording runs out
+            "recorded": after the last recorded offer, accept bids that are at least as good for this profile as
+                the bid the recorded party accepted there, if it accepted (default)
+            "next": also accept offers that are at least as good as the next recorded offer, for this profile
+
+    The offers are replayed turn by turn, regardless of the time they were made in the recording.
+    """
+
+    def __init__(self, reporter: Reporter = None):
+        super().__init__(reporter)
+        self.getReporter().log(logging.INFO, "party is initialized")
+        self._me = None
+        self._profile = None
+        self._bids: List[Bid] = []
+        self._accepted: Optional[Bid] = None
+        self._accept = "recorded"
+        self._turn = 0
+        self._last_received_bid: Optional[Bid] = None
+
+    # Override
+    def getCapabilities(self) -> Capabilities:
+        return Capabilities(
+            set(["SAOP"]),
+            set(["geniusweb.profile.utilityspace.LinearAdditive"]),
+        )
+
+    # Override
+    def getDescription(self) -> str:
+        return "Replays the offers of a party in a recorded session"
+
+    # Override
+    def notifyChange(self, info: Inform):
+        if isinstance(info, Settings):
+            settings = cast(Settings, info)
+            self._me = settings.getID()
+            parameters = settings.getParameters()
+            self._accept = parameters.get("accept") or "recorded"
+            if self._accept not in ("never", "recorded", "next"):
+                raise ValueError(f"unknown acceptance policy {self._accept}")
+            self._bids, self._accepted = load_recording(parameters.get("trace"), parameters.get("position") or 1)
+
+            # the profile is only needed to compare offers
+            if self._accept != "never":
+                self._profile = ProfileConnectionFactory.create(
+                    settings.getProfile().getURI(), self.getReporter()
+                )
+        elif isinstance(info, ActionDone):
+            action: Action = cast(ActionDone, info).getAction()
+            if isinstance(action, Offer) and action.getActor() != self._me:
+                self._last_received_bid = cast(Offer, action).getBid()
+        elif isinstance(info, YourTurn):
+            self.getConnection().send(self._myTurn())
+            self._turn += 1
+        elif isinstance(info, Finished):
+            self.terminate()
+        else:
+            self.getReporter().log(
+                logging.WARNING, "Ignoring unknown info " + str(info)
+            )
+
+    # Override
+    def terminate(self):
+        super().terminate()
+        if self._profile is not None:
+            self._profile.close()
+            self._profile = None
+
+    def _myTurn(self) -> Action:
+        next_bid = self._bids[min(self._turn, len(self._bids) - 1)] if self._bids else None
+        if self._last_received_bid is not None and self._isGood(self._last_received_bid, next_bid):
+            return Accept(self._me, self._last_received_bid)
+        if next_bid is None:
+            raise ValueError("the recorded party made no offers to replay")
+        return Offer(self._me, next_bid)
+
+    def _isGood(self, bid: Bid, next_bid: Optional[Bid]) -> bool:
+        if self._accept == "never":
+            return False
+        profile = self._profile.getProfile()
+        # the recorded party accepted after its last offer, or made no offers at all, but only bids as good as
+        # the one it accepted, so that stalling until the recording runs out does not pay off
+        if self._accepted is not None and self._turn >= len(self._bids):
+            return profile.getUtility(bid) >= profile.getUtility(self._accepted)
+        if self._accept == "next" and next_bid is not None:
+            return profile.getUtility(bid) >= profile.getUtility(next_bid)
+        return False
@@ -0,0 +1,181 @@
+from bisect import bisect_left
+from collections import deque
+from typing import List, Optional
+
+
+class UtilityLog:
+    """Append-only log of bid utilities with the time at which they were received.
+
+    Next to the utilities, the log keeps their prefix sums and running maximum, so the mean of
+    any range and the overall maximum are O(1). Sliding maxima are provided by `SlidingWindow`.
+    """
+
+    def __init__(self):
+        self.utilities: List[float] = []
+        self.times: List[float] = []
+        self._prefix: List[float] = [0.0]
+        self._max: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.utilities)
+
+    def append(self, utility: float, time: float = 0.0):
+        utility = float(utility)
+        self.utilities.append(utility)
+        self.times.append(time)
+        self._prefix.append(self._prefix[-1] + utility)
+        if self._max is None or utility > self._max:
+            self._max = utility
+
+    @property
+    def last(self) -> Optional[float]:
+        return self.utilities[-1] if self.utilities else None
+
+    def max(self) -> Optional[float]:
+        # maximum over the whole log, None if it is empty
+        return self._max
+
+    def sum(self, start: int = 0, end: Optional[int] = None) -> float:
+        end = len(self.utilities) if end is None else end
+        return self._prefix[end] - self._prefix[start]
+
+    def mean(self, start: int = 0, end: Optional[int] = None) -> Optional[float]:
+        # mean of utilities[start:end], None if the range is empty
+        end = len(self.utilities) if end is None else end
+        if end <= start:
+            return None
+        return (self._prefix[end] - self._prefix[start]) / (end - start)
+
+    def index_at(self, time: float) -> int:
+        # index of the first utility received at or after the time
+        return bisect_left(self.times, time)
+
+
+class SlidingWindow:
+    """Maximum of a window over a `UtilityLog` whose bounds only move forward.
+
+    The window keeps a monotonic deque of indices with decreasing utilities. When both bounds of
+    consecutive queries are non-decreasing, as for windows that trail the negotiation, every
+    utility is pushed and popped at most once, so a query is O(1) amortized. A query whose start
+    moves back rebuilds the deque.
+    """
+
+    def __init__(self, log: UtilityLog):
+        self.log = log
+        self._deque = deque()
+        self._start = 0
+        self._end = 0
+
+    def max(self, start: int, end: int) -> Optional[float]:
+        # maximum of utilities[start:end], None if the range is empty
+        start, end = max(start, 0), min(end, len(self.log))
+        if start < self._start or end < self._end:
+            self._deque.clear()
+            self._end = start
+        utilities = self.log.utilities
+
+        for index in range(max(self._end, start), end):
+            while self._deque and utilities[self._deque[-1]] <= utilities[index]:
+                self._deque.pop()
+            self._deque.append(index)
+        self._start, self._end = start, max(end, self._end)
+
+        while self._deque and self._deque[0] < start:
+            self._deque.popleft()
+        return utilities[self._deque[0]] if self._deque else None
+
+    def last(self, size: int) -> Optional[float]:
+        # maximum of the last `size` utilities
+        return self.max(len(self.log) - size, len(self.log))
+
+
+class TimeCursor:
+    """Finds the first utility in a `UtilityLog` received at or after a time, for non-decreasing times.
+
+    The cursor only moves forward, so finding the index is O(1) amortized. A time before the
+    previous one falls back to a binary search.
+    """
+
+    def __init__(self, log: UtilityLog):
+        self.log = log
+        self._index = 0
+
+    def index(self, time: float) -> int:
+        times = self.log.times
+        if self._index > 0 and times[self._index - 1] >= time:
+            self._index = self.log.index_at(time)
+        while self._index < len(times) and times[self._index] < time:
+            self._index += 1
+        return self._index
+
+
+class AcceptanceConditions:
+    """Acceptance conditions from "Acceptance Conditions in Automated Negotiation" (Baarslag et al.).
+
+    The conditions take the utility (for us) of the offer under consideration and of our own bids as
+    floats, the history of received utilities comes from the `UtilityLog`. Windowed conditions use the
+    time-scaled window of the paper: at time t, the window holds the offers received in [t - (1 - t), t),
+    the same amount of time as there is left in the negotiation.
+
+    Args:
+        received (UtilityLog): utilities of the offers received so far, with their progress as time
+    """
+
+    def __init__(self, received: UtilityLog):
+        self.received = received
+        self._window = SlidingWindow(received)
+        self._window_start = TimeCursor(received)
+        self._window_end = TimeCursor(received)
+
+    def next(self, offered: float, next_utility: float, scale: float = 1.0, gap: float = 0.0) -> bool:
+        """AC_next: accept if the offer is at least as good as the bid we are about to send."""
+        return scale * offered + gap >= next_utility
+
+    def prev(self, offered: float, prev_utility: float, scale: float = 1.0, gap: float = 0.0) -> bool:
+        """AC_prev: accept if the offer is at least as good as the last bid we sent."""
+        return scale * offered + gap >= prev_utility
+
+    def gap(self, offered: float, prev_utility: float, gap: float) -> bool:
+        """AC_gap: accept if the offer is within `gap` of the last bid we sent."""
+        return self.prev(offered, prev_utility, 1.0, gap)
+
+    def time(self, progress: float, threshold: float) -> bool:
+        """AC_time: accept after a fraction `threshold` of the negotiation."""
+        return progress >= threshold
+
+    def const(self, offered: float, threshold: float) -> bool:
+        """AC_const: accept offers above a fixed utility."""
+        return offered > threshold
+
+    def window_bounds(self, progress: float):
+        # indices of the offers received in the time-scaled window before the current offer
+        return self._window_start.index(2 * progress - 1), self._window_end.index(progress)
+
+    def window_max(self, progress: float) -> Optional[float]:
+        return self._window.max(*self.window_bounds(progress))
+
+    def window_avg(self, progress: float) -> Optional[float]:
+        return self.received.mean(*self.window_bounds(progress))
+
+    def combi(self, offered: float, next_utility: float, progress: float, threshold: float, alpha: float,
+              scale: float = 1.0, gap: float = 0.0) -> bool:
+        """AC_combi: AC_next before `threshold`, afterwards also accept offers of at least `alpha`."""
+        return self.next(offered, next_utility, scale, gap) or (self.time(progress, threshold) and offered >= alpha)
+
+    def combi_max_w(self, offered: float, next_utility: float, progress: float, threshold: float,
+                    scale: float = 1.0, gap: float = 0.0) -> bool:
+        """AC_combi(MAX^W): alpha is the best offer received in the time-scaled window."""
+        alpha = self.window_max(progress)
+        return self.combi(offered, next_utility, progress, threshold, alpha if alpha is not None else 0.0, scale, gap)
+
+    def combi_avg_w(self, offered: float, next_utility: float, progress: float, threshold: float,
+                    scale: float = 1.0, gap: float = 0.0) -> bool:
+        """AC_combi(AVG^W): alpha is the average offer received in the time-scaled window."""
+        alpha = self.window_avg(progress)
+        return self.combi(offered, next_utility, progress, threshold, alpha if alpha is not None else 0.0, scale, gap)
+
+    def combi_max_t(self, offered: float, next_utility: float, progress: float, threshold: float,
+                    scale: float = 1.0, gap: float = 0.0) -> bool:
+        """AC_combi(MAX^T): alpha is the best offer received so far."""
+        alpha = self.received.max()
+        return self.combi(offered, next_utility, progress, threshold, alpha if alpha is not None else 0.0, scale, gap)
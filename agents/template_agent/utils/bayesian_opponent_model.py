@@ -0,0 +1,142 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+
+from agents.template_agent.utils.frequency_table import FrequencyTable
+
+
+class BayesianOpponentModel:
+    """Bayesian opponent model over a fixed grid of linear additive utility hypotheses.
+
+    Every hypothesis is a combination of issue weights and a value ordering per issue.
+    A hypothesis is stored as one row of a (num_hypotheses, num_values) matrix, holding the
+    weighted utility of every value in the flat value layout of a `FrequencyTable`. The
+    utility of a bid under all hypotheses is then a gather of the bid's value columns followed
+    by a row sum.
+
+    The opponent is assumed to concede from its best bid along `target(progress) = 1 - concession * progress`.
+    A received bid makes hypotheses that assign it a utility close to the target more likely,
+    so the posterior update is one Gaussian log-likelihood over all hypotheses.
+    """
+
+    def __init__(
+        self,
+        domain: Domain,
+        num_hypotheses: int = 5000,
+        concession: float = 0.4,
+        sigma: float = 0.15,
+        seed: Optional[int] = None,
+    ):
+        self.domain = domain
+        self.offers: List[Bid] = []
+        self.concession = concession
+        self.sigma = sigma
+
+        # the table provides the flat value layout and counts the received values
+        self.table = FrequencyTable(domain)
+        self.issues = self.table.issues
+        self.offsets = self.table.offsets
+
+        rng = np.random.default_rng(seed)
+
+        # issue weights are sampled uniformly from the simplex
+        self.weights = rng.dirichlet(np.ones(len(self.issues)), size=num_hypotheses)
+
+        # every issue gets a random value ordering per hypothesis, the best value has utility 1
+        self.hypotheses = np.empty((num_hypotheses, len(self.table.counts)), dtype=np.float64)
+        for i, issue in enumerate(self.issues):
+            num_values = len(self.table.values[issue])
+            if num_values > 1:
+                ranks = rng.random((num_hypotheses, num_values)).argsort(axis=1).argsort(axis=1)
+                value_utilities = ranks / (num_values - 1)
+            else:
+                value_utilities = np.ones((num_hypotheses, num_values))
+            self.hypotheses[:, self.offsets[i]:self.offsets[i + 1]] = self.weights[:, i, None] * value_utilities
+
+        self.log_posterior = np.full(num_hypotheses, -np.log(num_hypotheses))
+        self.posterior = np.full(num_hypotheses, 1 / num_hypotheses)
+
+        # expected utility of every value under the posterior, recomputed lazily after an update
+        self._expected_values: Optional[np.ndarray] = None
+
+    def encode(self, bids: Sequence[Bid]) -> np.ndarray:
+        """Encodes bids as flat value indices, one row per bid and one column per issue.
+
+        Args:
+            bids (Sequence[Bid]): bids to encode
+
+        Returns:
+            np.ndarray: (len(bids), num_issues) array of column indices into `hypotheses`
+        """
+        codes = np.empty((len(bids), len(self.issues)), dtype=np.int64)
+        for i, issue in enumerate(self.issues):
+            value_index = self.table.value_index[issue]
+            offset = self.offsets[i]
+            codes[:, i] = [offset + value_index[bid.getValue(issue)] for bid in bids]
+        return codes
+
+    def update(self, bid: Bid, progress: float = 0.0):
+        """Updates the posterior with a bid received from the opponent.
+
+        Args:
+            bid (Bid): bid received from the opponent
+            progress (float): progress of the negotiation in [0, 1] at the time the bid was received
+        """
+        self.offers.append(bid)
+        self.table.update(bid)
+
+        codes = self.encode([bid])[0]
+        utilities = self.hypotheses[:, codes].sum(axis=1)
+        target = 1.0 - self.concession * progress
+
+        self.log_posterior -= (utilities - target) ** 2 / (2 * self.sigma ** 2)
+        # normalise in log space to avoid underflow of unlikely hypotheses
+        self.log_posterior -= self.log_posterior.max()
+        np.exp(self.log_posterior, out=self.posterior)
+        total = self.posterior.sum()
+        self.posterior /= total
+        self.log_posterior -= np.log(total)
+        self._expected_values = None
+
+    def expected_values(self) -> np.ndarray:
+        # expected weighted utility of every value, in the flat value layout
+        if self._expected_values is None:
+            self._expected_values = self.posterior @ self.hypotheses
+        return self._expected_values
+
+    def predict_codes(self, codes: np.ndarray) -> np.ndarray:
+        """Expected opponent utility of already encoded bids.
+
+        Args:
+            codes (np.ndarray): (num_bids, num_issues) array as returned by `encode`
+
+        Returns:
+            np.ndarray: expected opponent utility per bid
+        """
+        return self.expected_values()[codes].sum(axis=1)
+
+    def predict_many(self, bids: Sequence[Bid]) -> np.ndarray:
+        """Expected opponent utility of a set of candidate bids.
+
+        Args:
+            bids (Sequence[Bid]): candidate bids
+
+        Returns:
+            np.ndarray: expected opponent utility per bid
+        """
+        if len(bids) == 0:
+            return np.zeros(0)
+        return self.predict_codes(self.encode(bids))
+
+    def get_predicted_utility(self, bid: Bid) -> float:
+        if len(self.offers) == 0 or bid is None:
+            return 0
+
+        return float(self.predict_many([bid])[0])
+
+    def issue_weights(self) -> dict:
+        # expected issue weight under the posterior
+        expected = self.posterior @ self.weights
+        return {issue: float(expected[i]) for i, issue in enumerate(self.issues)}
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Value import Value
+from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
+    LinearAdditiveUtilitySpace,
+)
+from pyson.ObjectMapper import ObjectMapper
+
+# directory with published tables, set by the tournament runner for its worker processes
+TABLES_DIR_ENV = "DOMAIN_TABLES_DIR"
+
+# tables that were built or attached in this process, by profile key
+_tables: Dict[str, "DomainTable"] = {}
+
+
+def profile_key(profile: LinearAdditiveUtilitySpace) -> str:
+    # content hash of a profile, equal for the publisher and every agent that parsed the same file
+    profile_json = json.dumps(ObjectMapper().toJson(profile), sort_keys=True)
+    return hashlib.sha256(profile_json.encode()).hexdigest()
+
+
+class DomainTable:
+    """Encoded bids and utilities of all bids in the domain of a profile.
+
+    Bid `i` is the `i`-th combination of values in row-major order over the sorted issues,
+    with the values of an issue in domain order. `codes[i]` holds the value index per
+    issue, `utilities[i]` the utility of the bid and `order` the bid indices sorted from
+    the highest to the lowest utility.
+
+    The arrays are either built in the process, or attached read-only from files
+    published with `publish_table`. Attached arrays are memory mapped, so all processes
+    on a machine share one copy of them in the page cache.
+    """
+
+    def __init__(self, profile: LinearAdditiveUtilitySpace, codes: np.ndarray, utilities: np.ndarray, order: np.ndarray):
+        domain = profile.getDomain()
+        self.profile = profile
+        self.issues: List[str] = sorted(domain.getIssues())
+        self.values = {issue: list(domain.getValues(issue)) for issue in self.issues}
+        self.codes = codes
+        self.utilities = utilities
+        self.order = order
+        # negated utilities along `order`, ascending for binary searches, computed on first use
+        self._descending: Optional[np.ndarray] = None
+        # index of every value per issue, computed on first use
+        self._value_indices: Optional[Dict[str, Dict[Value, int]]] = None
+
+    @staticmethod
+    def build_arrays(profile: LinearAdditiveUtilitySpace):
+        domain = profile.getDomain()
+        issues = sorted(domain.getIssues())
+        value_utilities = profile.getUtilities()
+
+        # weighted utility of every value per issue
+        issue_utilities = [
+            np.array(
+                [
+                    float(profile.getWeight(issue) * value_utilities[issue].getUtility(value))
+                    for value in domain.getValues(issue)
+                ]
+            )
+            for issue in issues
+        ]
+        sizes = [len(utilities) for utilities in issue_utilities]
+
+        num_bids = int(np.prod(sizes))
+        dtype = np.int16 if max(sizes) < 2 ** 15 else np.int32
+        codes = np.stack(np.unravel_index(np.arange(num_bids), sizes), axis=1).astype(dtype)
+        utilities = np.zeros(num_bids, dtype=np.float64)
+        for i, issue_utility in enumerate(issue_utilities):
+            utilities += issue_utility[codes[:, i]]
+        # stable sort keeps the domain order between bids of equal utility
+        order = np.argsort(-utilities, kind="stable")
+
+        return codes, utilities, order
+
+    @classmethod
+    def build(cls, profile: LinearAdditiveUtilitySpace) -> "DomainTable":
+        return cls(profile, *cls.build_arrays(profile))
+
+    @classmethod
+    def attach(cls, profile: LinearAdditiveUtilitySpace, directory: str) -> Optional["DomainTable"]:
+        # memory maps the published arrays of the profile, None if they were not published
+        path = Path(directory, profile_key(profile))
+        if not path.joinpath("order.npy").exists():
+            return None
+        return cls(
+            profile,
+            np.load(path.joinpath("codes.npy"), mmap_mode="r"),
+            np.load(path.joinpath("utilities.npy"), mmap_mode="r"),
+            np.load(path.joinpath("order.npy"), mmap_mode="r"),
+        )
+
+    def __len__(self) -> int:
+        return len(self.utilities)
+
+    def bid(self, index: int) -> Bid:
+        codes = self.codes[index]
+        return Bid({issue: self.values[issue][codes[i]] for i, issue in enumerate(self.issues)})
+
+    def index(self, bid: Bid) -> int:
+        """Index of a bid in the table, the inverse of `bid`."""
+        if self._value_indices is None:
+            self._value_indices = {
+                issue: {value: i for i, value in enumerate(values)} for issue, values in self.values.items()
+            }
+        codes = tuple(self._value_indices[issue][bid.getValue(issue)] for issue in self.issues)
+        return int(np.ravel_multi_index(codes, [len(self.values[issue]) for issue in self.issues]))
+
+    def cutoff(self, min_utility: float) -> int:
+        """Number of bids with at least `min_utility`, found with a binary search."""
+        # the utilities along `order` are descending, so the bids above the threshold are a prefix
+        if self._descending is None:
+            self._descending = -self.utilities[self.order]
+        return int(np.searchsorted(self._descending, -min_utility, side="right"))
+
+    def sorted_bids(self, min_utility: float = 0.0) -> List[Bid]:
+        """Bids with at least `min_utility`, from the highest to the lowest utility."""
+        return [self.bid(index) for index in self.order[:self.cutoff(min_utility)]]
+
+
+def get_domain_table(profile: LinearAdditiveUtilitySpace) -> DomainTable:
+    """Domain table of a profile, attached from the published tables if possible.
+
+    Tables are reused by all agents and sessions in a process. If the tournament runner
+    published the profile, the table is attached without copying, otherwise it is built
+    in this process.
+    """
+    key = profile_key(profile)
+    if key not in _tables:
+        table = None
+        if os.environ.get(TABLES_DIR_ENV):
+            table = DomainTable.attach(profile, os.environ[TABLES_DIR_ENV])
+        _tables[key] = table if table is not None else DomainTable.build(profile)
+    return _tables[key]
+
+
+def publish_table(profile: LinearAdditiveUtilitySpace, directory: str) -> Path:
+    """Writes the domain table of a profile to a directory, so that other processes can attach it.
+
+    Args:
+        profile (LinearAdditiveUtilitySpace): profile to publish
+        directory (str): directory of the published tables
+
+    Returns:
+        Path: directory of the table of the profile
+    """
+    path = Path(directory, profile_key(profile))
+    if path.joinpath("order.npy").exists():
+        return path
+    path.mkdir(parents=True, exist_ok=True)
+
+    codes, utilities, order = DomainTable.build_arrays(profile)
+    # order.npy is written last, its presence marks a complete table
+    for name, array in (("codes", codes), ("utilities", utilities), ("order", order)):
+        tmp_path = path.joinpath(f"{name}.{os.getpid()}.tmp.npy")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, path.joinpath(f"{name}.npy"))
+    return path
@@ -0,0 +1,190 @@
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+from geniusweb.actions.Action import Action
+from geniusweb.actions.Offer import Offer
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+from geniusweb.issuevalue.Value import Value
+from geniusweb.opponentmodel.OpponentModel import OpponentModel
+from geniusweb.profile.utilityspace.UtilitySpace import UtilitySpace
+from geniusweb.progress.Progress import Progress
+from geniusweb.references.Parameters import Parameters
+
+
+class FrequencyTable:
+    """Counts how often every value of every issue was offered.
+
+    The counts of all issues are kept in a single contiguous integer array, where
+    issue `i` occupies the slice `offsets[i]:offsets[i + 1]` and values are ordered
+    as in the domain. The table is mutable, `update` only increments counters.
+    A frozen copy can be taken on demand with `snapshot`, every update bumps `version`
+    so that callers can cache derived values.
+    """
+
+    def __init__(self, domain: Domain):
+        self.domain = domain
+        self.issues: List[str] = sorted(domain.getIssues())
+        self.values: Dict[str, List[Value]] = {
+            issue: list(domain.getValues(issue)) for issue in self.issues
+        }
+        self.value_index: Dict[str, Dict[Value, int]] = {
+            issue: {value: i for i, value in enumerate(values)}
+            for issue, values in self.values.items()
+        }
+
+        sizes = [len(self.values[issue]) for issue in self.issues]
+        self.offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        self._slices = {
+            issue: slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+            for i, issue in enumerate(self.issues)
+        }
+
+        self.counts = np.zeros(int(self.offsets[-1]), dtype=np.int64)
+        self.total = 0
+        self.version = 0
+
+    def update(self, bid: Bid):
+        # increment the counter of the offered value of every issue, values that
+        # are not part of the domain are ignored
+        for issue in self.issues:
+            index = self.value_index[issue].get(bid.getValue(issue))
+            if index is not None:
+                self.counts[self._slices[issue].start + index] += 1
+
+        self.total += 1
+        self.version += 1
+
+    def issue_counts(self, issue: str) -> np.ndarray:
+        # view on the counts of the values of an issue, ordered as in `values[issue]`
+        return self.counts[self._slices[issue]]
+
+    def count(self, issue: str, value: Value) -> int:
+        index = self.value_index[issue].get(value)
+        if index is None:
+            return 0
+        return int(self.counts[self._slices[issue].start + index])
+
+    def fraction(self, issue: str, value: Value) -> float:
+        if self.total == 0:
+            return 0.0
+        return self.count(issue, value) / self.total
+
+    def get_counts(self, issue: str) -> Dict[Value, int]:
+        # counts of the values that were offered at least once, as a fresh dict
+        if issue not in self._slices:
+            return {}
+        return {
+            value: int(count)
+            for value, count in zip(self.values[issue], self.issue_counts(issue))
+            if count > 0
+        }
+
+    def snapshot(self) -> "FrequencyTable":
+        # frozen copy of the current counts, the domain indexing is shared
+        snapshot = object.__new__(FrequencyTable)
+        snapshot.__dict__.update(self.__dict__)
+        snapshot.counts = self.counts.copy()
+        snapshot.counts.flags.writeable = False
+        return snapshot
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, FrequencyTable)
+            and self.issues == other.issues
+            and self.total == other.total
+            and np.array_equal(self.counts, other.counts)
+        )
+
+    __hash__ = None
+
+
+class MutableFrequencyOpponentModel(UtilitySpace, OpponentModel):
+    """Drop-in replacement for geniusweb's `FrequencyOpponentModel` on top of a `FrequencyTable`.
+
+    The geniusweb model is immutable and copies all frequency dictionaries on every
+    `WithAction`. This model updates its table in place and returns itself instead,
+    so receiving an offer does not copy anything. Utilities are computed the same
+    way: every issue has an equal weight and a value scores the fraction of bids
+    it was offered in.
+    """
+
+    _DECIMALS = 4  # accuracy of our computations.
+
+    def __init__(self, domain: Optional[Domain], resBid: Optional[Bid]):
+        self._domain = domain
+        self._resBid = resBid
+        self._table: Optional[FrequencyTable] = (
+            FrequencyTable(domain) if domain is not None else None
+        )
+        self._totalBids = 0
+
+    @classmethod
+    def create(cls) -> "MutableFrequencyOpponentModel":
+        return cls(None, None)
+
+    # Override
+    def With(self, newDomain: Domain, newResBid: Optional[Bid]) -> "MutableFrequencyOpponentModel":
+        if newDomain is None:
+            raise ValueError("domain is not initialized")
+        return type(self)(newDomain, newResBid)
+
+    # Override
+    def WithParameters(self, parameters: Parameters) -> OpponentModel:
+        return self  # ignore parameters
+
+    # Override
+    def WithAction(self, action: Action, progress: Progress) -> "MutableFrequencyOpponentModel":
+        if self._domain is None:
+            raise ValueError("domain is not initialized")
+
+        if isinstance(action, Offer):
+            self._table.update(action.getBid())
+            self._totalBids = self._table.total
+
+        return self
+
+    # Override
+    def getUtility(self, bid: Bid) -> Decimal:
+        if self._domain is None:
+            raise ValueError("domain is not initialized")
+        if self._totalBids == 0:
+            return Decimal(1)
+
+        total = Decimal(0)
+        for issue in self._table.issues:
+            total += self._getFraction(issue, bid.getValue(issue))
+        return round(total / len(self._table.issues), self._DECIMALS)
+
+    def getTable(self) -> FrequencyTable:
+        return self._table
+
+    def getCounts(self, issue: str) -> Dict[Value, int]:
+        if self._domain is None:
+            raise ValueError("domain is not initialized")
+        return self._table.get_counts(issue)
+
+    # Override
+    def getName(self) -> str:
+        if self._domain is None:
+            raise ValueError("domain is not initialized")
+        return "FreqOppModel" + str(id(self)) + "For" + str(self._domain)
+
+    # Override
+    def getDomain(self) -> Domain:
+        return self._domain
+
+    # Override
+    def getReservationBid(self) -> Optional[Bid]:
+        return self._resBid
+
+    def _getFraction(self, issue: str, value: Value) -> Decimal:
+        if self._totalBids == 0:
+            return Decimal(1)
+        return round(
+            Decimal(self._table.count(issue, value)) / self._totalBids, self._DECIMALS
+        )
+
+    def __repr__(self) -> str:
+        return f"MutableFrequencyOpponentModel[{self._totalBids}]"
@@ -0,0 +1,122 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS knowledge (
+    opponent TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (opponent, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    opponent TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_by_opponent ON records (opponent, kind, id);
+"""
+
+
+class KnowledgeStore:
+    """Learning data of an agent, shared by all its sessions through an SQLite database in `storage_dir`.
+
+    The store holds two kinds of data per opponent: values under a key, such as a summary of the
+    opponent's strategy, and append-only records, such as the bids it offered. Both are stored as JSON
+    and indexed by opponent, so a lookup is a B-tree search instead of a scan over all data.
+
+    The database runs in WAL mode, so sessions that run in parallel read without blocking and their
+    writes are serialized by SQLite, with writers waiting up to `timeout_s` for the lock. Records are
+    buffered in memory and written in one transaction by `flush`, values are written immediately.
+    `load` reads all values at once, after which `get` is answered from memory.
+
+    Args:
+        storage_dir (str): storage directory of the agent
+        name (str, optional): name of the database file, without extension. Defaults to "knowledge".
+        timeout_s (float, optional): time to wait for a lock held by another session. Defaults to 30.0.
+    """
+
+    def __init__(self, storage_dir: str, name: str = "knowledge", timeout_s: float = 30.0):
+        Path(storage_dir).mkdir(parents=True, exist_ok=True)
+        self.path = Path(storage_dir, f"{name}.sqlite")
+        # autocommit mode, transactions are started explicitly
+        self._connection = sqlite3.connect(
+            str(self.path), timeout=timeout_s, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+        self._values: Optional[Dict[str, Dict[str, Any]]] = None
+        self._pending: List[Tuple[str, str, str]] = []
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Reads all values, by opponent and key, and keeps them in memory for `get`."""
+        self._values = {}
+        for opponent, key, value in self._connection.execute("SELECT opponent, key, value FROM knowledge"):
+            self._values.setdefault(opponent, {})[key] = json.loads(value)
+        return self._values
+
+    def get(self, opponent: str, key: str, default: Any = None) -> Any:
+        if self._values is not None:
+            return self._values.get(opponent, {}).get(key, default)
+        row = self._connection.execute(
+            "SELECT value FROM knowledge WHERE opponent = ? AND key = ?", (opponent, key)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else default
+
+    def put(self, opponent: str, key: str, value: Any):
+        self._connection.execute(
+            "INSERT INTO knowledge (opponent, key, value) VALUES (?, ?, ?) "
+            "ON CONFLICT (opponent, key) DO UPDATE SET value = excluded.value",
+            (opponent, key, json.dumps(value)),
+        )
+        if self._values is not None:
+            self._values.setdefault(opponent, {})[key] = value
+
+    def update(self, opponent: str, key: str, function: Callable[[Any], Any], default: Any = None) -> Any:
+        """Replaces a value by `function(value)` atomically, so that no update of a parallel session is lost."""
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._connection.execute(
+                "SELECT value FROM knowledge WHERE opponent = ? AND key = ?", (opponent, key)
+            ).fetchone()
+            value = function(json.loads(row[0]) if row is not None else default)
+            self.put(opponent, key, value)
+            self._connection.execute("COMMIT")
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        return value
+
+    def append(self, opponent: str, kind: str, data: Any):
+        # buffered until the next flush
+        self._pending.append((opponent, kind, json.dumps(data)))
+
+    def records(self, opponent: str, kind: str) -> List[Any]:
+        """Records of an opponent in the order they were appended, including the ones not flushed yet."""
+        rows = self._connection.execute(
+            "SELECT data FROM records WHERE opponent = ? AND kind = ? ORDER BY id", (opponent, kind)
+        )
+        stored = [json.loads(data) for data, in rows]
+        return stored + [json.loads(data) for o, k, data in self._pending if o == opponent and k == kind]
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._connection.executemany(
+                "INSERT INTO records (opponent, kind, data) VALUES (?, ?, ?)", self._pending
+            )
+            self._connection.execute("COMMIT")
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._pending.clear()
+
+    def close(self):
+        self.flush()
+        self._connection.close()
@@ -0,0 +1,130 @@
+import time
+from collections import deque
+from typing import Optional
+
+from geniusweb.progress.Progress import Progress
+from geniusweb.progress.ProgressTime import ProgressTime
+
+
+class ResponseTimeEstimator:
+    """Predicts the next response time of the opponent with a linear regression over the last gaps.
+
+    The regression is fitted on the last `window_size` gaps against their index. Instead of
+    refitting on every prediction, the estimator keeps the sums of the least squares solution
+    and updates them when a gap enters or leaves the window, so both `add` and `predict` are O(1).
+
+    Args:
+        window_size (int, optional): number of recent gaps the regression is fitted on. Defaults to 10.
+    """
+
+    def __init__(self, window_size: int = 10):
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+
+        self.window_size = window_size
+        self._gaps = deque()
+        self._count = 0
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+        self._sum_xx = 0.0
+        self._sum_xy = 0.0
+
+    def __len__(self) -> int:
+        return len(self._gaps)
+
+    def add(self, gap: float):
+        x = self._count
+        self._gaps.append((x, gap))
+        self._count += 1
+        self._sum_x += x
+        self._sum_y += gap
+        self._sum_xx += x * x
+        self._sum_xy += x * gap
+
+        if len(self._gaps) > self.window_size:
+            x, gap = self._gaps.popleft()
+            self._sum_x -= x
+            self._sum_y -= gap
+            self._sum_xx -= x * x
+            self._sum_xy -= x * gap
+
+    def predict(self) -> Optional[float]:
+        # expected next gap, None before the first gap is known
+        n = len(self._gaps)
+        if n == 0:
+            return None
+
+        mean_y = self._sum_y / n
+        variance = self._sum_xx - self._sum_x * self._sum_x / n
+        if n < 2 or variance <= 0:
+            return max(mean_y, 0.0)
+        slope = (self._sum_xy - self._sum_x * self._sum_y / n) / variance
+        intercept = mean_y - slope * self._sum_x / n
+        return max(intercept + slope * self._count, 0.0)
+
+
+class LastMoment:
+    """Sleeps until a moment in a time-based negotiation, such as just before the deadline.
+
+    Waiting with `time.sleep` leaves the CPU to the opponent and to other sessions, where polling
+    the progress in a loop keeps a core busy for the whole wait. The scheduler sleeps until shortly
+    before the target and then in ever shorter steps, so it wakes up within about `precision_s` of
+    it. It keeps track of the wall time it waited and of the CPU time the process used meanwhile,
+    the difference is the CPU time that polling would have wasted.
+
+    Only a time deadline has a moment to wait for, with any other progress the waits return immediately.
+
+    Args:
+        progress (Progress): progress of the negotiation
+        precision_s (float, optional): the last part of a wait that is not slept. Defaults to 0.0005.
+    """
+
+    def __init__(self, progress: Progress, precision_s: float = 0.0005):
+        self.progress = progress
+        self.precision_s = precision_s
+        self.waited_s = 0.0
+        self.cpu_s = 0.0
+        self.waits = 0
+
+    def moment(self, target: float) -> float:
+        # wall clock time in seconds at which the progress reaches the target
+        if not isinstance(self.progress, ProgressTime):
+            raise ValueError(f"the moment of a progress is only known for a time deadline, not {self.progress}")
+        duration_s = self.progress.getDuration() / 1000
+        return self.progress.getTerminationTime().timestamp() - (1 - target) * duration_s
+
+    def wait_until(self, target: float):
+        """Sleeps until the progress reaches the target, returns immediately if it already has."""
+        if not isinstance(self.progress, ProgressTime):
+            return
+        moment = self.moment(target)
+        start, start_cpu = time.time(), time.process_time()
+        remaining = moment - start
+        if remaining <= 0:
+            return
+
+        while remaining > self.precision_s:
+            # sleeps overshoot by the scheduler latency, so only sleep part of short waits
+            time.sleep(remaining if remaining > 0.01 else remaining / 2)
+            remaining = moment - time.time()
+
+        self.waited_s += time.time() - start
+        self.cpu_s += time.process_time() - start_cpu
+        self.waits += 1
+
+    def wait_for_response(self, estimator: ResponseTimeEstimator, margin: float = 0.0):
+        """Waits until the predicted response time of the opponent (plus margin) is left before the deadline."""
+        response = estimator.predict()
+        if response is not None:
+            self.wait_until(1 - response - margin)
+
+    @property
+    def saved_cpu_s(self) -> float:
+        # CPU time that polling the progress would have used during the waits
+        return max(self.waited_s - self.cpu_s, 0.0)
+
+    def report(self) -> str:
+        return (
+            f"waited {self.waited_s:.3f}s in {self.waits} waits using {self.cpu_s:.3f}s CPU, "
+            f"polling would have wasted {self.saved_cpu_s:.3f}s CPU"
+        )
@@ -0,0 +1,223 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+from scipy.stats import chi2
+
+from agents.template_agent.utils.frequency_table import FrequencyTable
+
+
+class WindowAnalyzer:
+    """Sliding-window statistics over the bids received from the opponent.
+
+    The analyzer keeps a ring buffer with the last `2 * window_size` bids, stored as
+    flat value indices into the layout of a `FrequencyTable`. From this buffer it
+    maintains the value counts of the current window (the last `window_size` bids),
+    of the previous window (the `window_size` bids before that) and, through the
+    table, of the whole history. Adding a bid moves at most one bid from the current
+    to the previous window and drops at most one bid from the previous window, so
+    every update costs O(issues) regardless of the history length.
+
+    Significance tests compare the value distribution of the current window against
+    a reference distribution for all issues in a single vectorized call.
+    """
+
+    def __init__(self, domain: Domain, window_size: int = 10):
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+
+        self.window_size = window_size
+        self.table = FrequencyTable(domain)
+        self.issues = self.table.issues
+
+        num_issues = len(self.issues)
+        num_values = len(self.table.counts)
+
+        # ring buffer of flat value indices (-1 for a missing value), changed issues and utilities
+        self._ring = np.full((2 * window_size, num_issues), -1, dtype=np.int64)
+        self._ring_changed = np.zeros((2 * window_size, num_issues), dtype=np.int64)
+        self._ring_utility = np.zeros(2 * window_size, dtype=np.float64)
+        self._position = 0
+        self._last_codes: Optional[np.ndarray] = None
+
+        self.window_counts = np.zeros(num_values, dtype=np.int64)
+        self.previous_counts = np.zeros(num_values, dtype=np.int64)
+        self._window_changes = np.zeros(num_issues, dtype=np.int64)
+        self._window_utility = 0.0
+        self._previous_utility = 0.0
+        self._total_utility = 0.0
+
+        # segment starts of the issues in the flat count arrays, used to reduce per issue
+        self._segments = self.table.offsets[:-1]
+
+    @property
+    def num_bids(self) -> int:
+        return self.table.total
+
+    @property
+    def window_length(self) -> int:
+        return min(self.num_bids, self.window_size)
+
+    @property
+    def previous_length(self) -> int:
+        return min(max(self.num_bids - self.window_size, 0), self.window_size)
+
+    def add(self, bid: Bid, utility: float = 0.0):
+        # encode the bid as flat indices into the count arrays
+        codes = np.full(len(self.issues), -1, dtype=np.int64)
+        for i, issue in enumerate(self.issues):
+            index = self.table.value_index[issue].get(bid.getValue(issue))
+            if index is not None:
+                codes[i] = self._segments[i] + index
+        present = codes >= 0
+
+        if self._last_codes is None:
+            changed = np.zeros(len(self.issues), dtype=np.int64)
+        else:
+            changed = (codes != self._last_codes).astype(np.int64)
+        self._last_codes = codes
+
+        n = self.num_bids
+        size = self.window_size
+
+        # the bid that was added `2 * window_size` bids ago leaves the previous window
+        if n >= 2 * size:
+            dropped = self._ring[self._position]
+            np.subtract.at(self.previous_counts, dropped[dropped >= 0], 1)
+            self._previous_utility -= self._ring_utility[self._position]
+
+        # the bid that was added `window_size` bids ago moves from the current to the previous window
+        if n >= size:
+            moved_position = (self._position - size) % (2 * size)
+            moved = self._ring[moved_position]
+            moved = moved[moved >= 0]
+            np.subtract.at(self.window_counts, moved, 1)
+            np.add.at(self.previous_counts, moved, 1)
+            self._window_changes -= self._ring_changed[moved_position]
+            self._window_utility -= self._ring_utility[moved_position]
+            self._previous_utility += self._ring_utility[moved_position]
+
+        # the new bid enters the current window
+        np.add.at(self.window_counts, codes[present], 1)
+        self._window_changes += changed
+        self._window_utility += utility
+        self._total_utility += utility
+        self._ring[self._position] = codes
+        self._ring_changed[self._position] = changed
+        self._ring_utility[self._position] = utility
+        self._position = (self._position + 1) % (2 * size)
+
+        self.table.update(bid)
+
+    def window_count(self, issue: str, value) -> int:
+        # number of bids in the current window that offered the value for the issue
+        index = self.table.value_index[issue].get(value)
+        if index is None:
+            return 0
+        return int(self.window_counts[self._segments[self.issues.index(issue)] + index])
+
+    def history_counts(self) -> np.ndarray:
+        # counts of all bids that are no longer part of the current window
+        return self.table.counts - self.window_counts
+
+    def test(self, reference: str = "previous", method: str = "chi2") -> Tuple[np.ndarray, np.ndarray]:
+        """Tests per issue whether the values in the current window follow the reference distribution.
+
+        Args:
+            reference (str): "previous" to compare against the previous window, "history" to compare against
+                all bids before the current window.
+            method (str): "chi2" for Pearson's chi-square test, "g" for the G-test (log-likelihood ratio).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: test statistic and p-value per issue, ordered as `issues`.
+                Issues without reference data get a statistic of 0 and a p-value of 1.
+        """
+        if reference == "previous":
+            reference_counts = self.previous_counts
+        elif reference == "history":
+            reference_counts = self.history_counts()
+        else:
+            raise ValueError(f"unknown reference: {reference}")
+
+        observed = self.window_counts.astype(np.float64)
+        reference_counts = reference_counts.astype(np.float64)
+        observed_totals = np.add.reduceat(observed, self._segments)
+        reference_totals = np.add.reduceat(reference_counts, self._segments)
+        issue_of_value = np.repeat(np.arange(len(self.issues)), np.diff(self.table.offsets))
+
+        # scale the reference distribution to the size of the current window
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.where(reference_totals > 0, observed_totals / reference_totals, 0.0)
+            expected = reference_counts * scale[issue_of_value]
+
+            # only values that occur in either distribution take part in the test
+            used = (observed > 0) | (expected > 0)
+            if method == "chi2":
+                terms = np.where(used, (observed - expected) ** 2 / expected, 0.0)
+            elif method == "g":
+                terms = np.where(observed > 0, 2 * observed * np.log(observed / expected), 0.0)
+            else:
+                raise ValueError(f"unknown method: {method}")
+
+        statistic = np.add.reduceat(terms, self._segments)
+        dof = np.add.reduceat(used.astype(np.int64), self._segments) - 1
+
+        valid = (reference_totals > 0) & (observed_totals > 0) & (dof > 0)
+        statistic = np.where(valid, statistic, 0.0)
+        p_value = np.where(valid, chi2.sf(statistic, np.maximum(dof, 1)), 1.0)
+        return statistic, p_value
+
+    def expected_value_utilities(self, value_utilities: np.ndarray, reference: str = "previous") -> Tuple[np.ndarray, np.ndarray]:
+        """Expected value utility per issue in the current window and in the reference.
+
+        Args:
+            value_utilities (np.ndarray): estimated utility of every value, in the flat layout of `table.counts`.
+            reference (str): "previous" for the previous window, "history" for all bids before the current window.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: expected utility per issue in the current window and in the reference.
+        """
+        if reference == "previous":
+            reference_counts, reference_length = self.previous_counts, self.previous_length
+        elif reference == "history":
+            reference_counts, reference_length = self.history_counts(), self.num_bids - self.window_length
+        else:
+            raise ValueError(f"unknown reference: {reference}")
+
+        current = np.add.reduceat(self.window_counts * value_utilities, self._segments)
+        previous = np.add.reduceat(reference_counts * value_utilities, self._segments)
+        if self.window_length > 0:
+            current = current / self.window_length
+        if reference_length > 0:
+            previous = previous / reference_length
+        return current, previous
+
+    def change_rates(self) -> np.ndarray:
+        # fraction of the bids in the current window that changed the value of each issue
+        transitions = min(self.window_length, self.num_bids - 1)
+        if transitions <= 0:
+            return np.zeros(len(self.issues))
+        return self._window_changes / transitions
+
+    def stubbornness(self) -> float:
+        # 1.0 if the opponent repeated its bid throughout the window, 0.0 if it changed every issue every bid
+        return float(1.0 - self.change_rates().mean()) if len(self.issues) > 0 else 1.0
+
+    def utility_mean(self, scope: str = "window") -> float:
+        # mean of the utilities passed to `add`, over the current window, the previous window or all bids
+        if scope == "window":
+            total, count = self._window_utility, self.window_length
+        elif scope == "previous":
+            total, count = self._previous_utility, self.previous_length
+        elif scope == "all":
+            total, count = self._total_utility, self.num_bids
+        else:
+            raise ValueError(f"unknown scope: {scope}")
+        return total / count if count > 0 else 0.0
+
+    def concession(self) -> float:
+        # increase of the mean utility (for us) of the opponent's bids between the previous and the current window
+        if self.previous_length == 0:
+            return 0.0
+        return self.utility_mean("window") - self.utility_mean("previous")
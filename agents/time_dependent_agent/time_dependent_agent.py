@@ -90,6 +90,9 @@ class TimeDependentAgent(DefaultParty):
         self._e: float = 1.2
         self._lastvotes: Votes = None  # type:ignore
         self._settings: Settings = None  # type:ignore
+        # utilities of the bids seen so far, for the profile they were computed with
+        self._utilities: Dict[Bid, Decimal] = {}
+        self._utilitiesProfile: LinearAdditive = None  # type:ignore
         self.getReporter().log(logging.INFO, "party is initialized")
 
     # Override
@@ -135,10 +138,10 @@ class TimeDependentAgent(DefaultParty):
                 self.terminate()
                 # stop this party and free resources.
             elif isinstance(info, Voting):
-                lastvotes = self._vote(info)
-                val(self.getConnection()).send(lastvotes)
+                self._lastvotes = self._vote(info)
+                val(self.getConnection()).send(self._lastvotes)
             elif isinstance(info, OptIn):
-                val(self.getConnection()).send(lastvotes)
+                val(self.getConnection()).send(self._lastvotes)
         except Exception as ex:
             self.getReporter().log(logging.CRITICAL, "Failed to handle info", ex)
         self._updateRound(info)
@@ -280,9 +283,8 @@ class TimeDependentAgent(DefaultParty):
         maxpower = val if isinstance(val, int) else sys.maxsize
 
         votes: Set[Vote] = {
-            Vote(self._me, offer.getBid(), minpower, maxpower)
-            for offer in set(voting.getOffers())
-            if self._isGood(offer.getBid())
+            Vote(self._me, bid, minpower, maxpower)
+            for bid in self._goodBids({offer.getBid() for offer in voting.getOffers()})
         }
 
         return Votes(self._me, votes)
@@ -292,17 +294,42 @@ class TimeDependentAgent(DefaultParty):
         @param bid the bid to check
         @return true iff bid is good for us.
         """
-        if bid == None or self._profileint == None:
-            return False
-        profile = cast(LinearAdditive, self._profileint.getProfile())
+        return bid in self._goodBids({bid})
+
+    def _goodBids(self, bids: Set[Bid]) -> Set[Bid]:
+        """
+        Evaluates a batch of bids against a single utility goal, so the progress
+        is read and the goal computed once for all offers of a voting round.
+        Utilities are cached per bid, as the same bids are offered again in
+        later rounds.
+
+        @param bids the bids to check
+        @return the bids that are good for us.
+        """
+        bids = {bid for bid in bids if bid != None}
+        if not bids or self._profileint == None:
+            return set()
         # the profile MUST contain UtilitySpace
+        profile = self._updateUtilSpace()
+        if profile is not self._utilitiesProfile:
+            self._utilities = {}
+            self._utilitiesProfile = profile
+
         time = self._progress.get(round(clock() * 1000))
-        return profile.getUtility(bid) >= self._getUtilityGoal(
+        goal = self._getUtilityGoal(
             time,
             self.getE(),
             self._extendedspace.getMin(),
             self._extendedspace.getMax(),
         )
+        good: Set[Bid] = set()
+        for bid in bids:
+            utility = self._utilities.get(bid)
+            if utility is None:
+                utility = self._utilities[bid] = profile.getUtility(bid)
+            if utility >= goal:
+                good.add(bid)
+        return good
 
     def _delayResponse(self):  # throws InterruptedException
         """
@@ -1,6 +1,4 @@
 import logging
-import sys
-from pathlib import Path
 from random import randint
 from time import time
 from typing import cast
@@ -29,11 +27,9 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.template_agent.utils.knowledge_store import KnowledgeStore
 from agents.template_agent.utils.opponent_model import OpponentModel
 
-#os imported for empty file check
-import os
-
 class YetAnotherAgent(DefaultParty):
     """
     Template of a Python geniusweb agent.
@@ -51,6 +47,7 @@ class YetAnotherAgent(DefaultParty):
         self.other: str = None
         self.settings: Settings = None
         self.storage_dir: str = None
+        self.knowledge: KnowledgeStore = None
 
         self.last_received_bid: Bid = None
         self.opponent_model: OpponentModel = None
@@ -85,6 +82,11 @@ class YetAnotherAgent(DefaultParty):
             self.domain = self.profile.getDomain()
             profile_connection.close()
 
+            # the bids of earlier sessions are shared with the sessions that run in parallel
+            if self.storage_dir is not None:
+                self.knowledge = KnowledgeStore(self.storage_dir)
+                self.knowledge.load()
+
         # ActionDone informs you of an action (an offer or an accept)
         # that is performed by one of the agents (including yourself).
         elif isinstance(data, ActionDone):
@@ -183,25 +185,25 @@ class YetAnotherAgent(DefaultParty):
         for learning capabilities. Note that no extensive calculations can be done within this method.
         Taking too much time might result in your agent being killed, so use it for storage only.
         """
-        data = "Which data should be saved? What is useful for later learnings? What learning?"
-        self_dir = "agents/experiment_agent/data.md"
-        with open(self_dir, "w") as f:
-            f.write(data)
+        if self.knowledge is None:
+            return
+        if self.other is not None:
+            self.knowledge.update(self.other, "sessions", lambda sessions: sessions + 1, 0)
+        self.knowledge.close()
+        self.knowledge = None
 
     ###########################################################################################
     ################################## Example methods below ##################################
     ###########################################################################################
     #New functions for storing and returning bids
     def storelastbid(self, lastbid):
-        datafile = os.path.join(sys.path[0], "agents\\yet_another_agent\\bids.txt")
-        datafileobj = open(datafile, "a")
-        datafileobj.write(f"{lastbid}\n")
+        if self.knowledge is not None and self.other is not None:
+            self.knowledge.append(self.other, "bid", lastbid)
 
     def returncollectionofbids(self):
-        datafile = os.path.join(sys.path[0], "agents\\yet_another_agent\\bids.txt")
-        datafileobj = open(datafile, "r")
-        turnsbyfar = datafileobj.readlines()
-        return turnsbyfar
+        if self.knowledge is None or self.other is None:
+            return []
+        return self.knowledge.records(self.other, "bid")
 
 
     def accept_condition(self, bid: Bid) -> bool:
@@ -211,39 +213,9 @@ class YetAnotherAgent(DefaultParty):
         # progress of the negotiation session between 0 and 1 (1 is deadline)
         progress = self.progress.get(time() * 1000)
 
-        datafile = os.path.join(sys.path[0], "agents\\yet_another_agent\\data.md")
-        #Check if the data.md file is empty, add 1 for first line
-        if os.stat(datafile).st_size == 0:
-            datafileobj = open(datafile, "w")
-            datafileobj.write("1\n")
-        else:
-            datafileobj = open(datafile, "r")
-            last_line = datafileobj.readlines()[-1:]
-            print(last_line[0])
-            _r = int(last_line[0])
-            datafileobj.close()
-            # need a better way!
-            datafileobj = open(datafile, "a")
-            print("Type of bid object:")
-            print(type(self.last_received_bid))
-            print("Last received bid:")
-            print(self.last_received_bid)
-            print("Last received bid's issues:")
-            print(self.last_received_bid.getIssues())
-            vals = ""
-            for issue in self.last_received_bid.getIssues():
-                print(f"{issue}'s value:")
-                print(self.last_received_bid.getValue(issue))
-                datafileobj.write(str(issue) + ": " + str(self.last_received_bid.getValue(issue)) + "\n")
-                vals += str(self.last_received_bid.getValue(issue)) + ","
-            print(vals)
-            self.storelastbid(lastbid=vals)
-            #input("Press Enter to continue...")
-            datafileobj.write("End of round:\n")
-            datafileobj.write(f"{str(_r + 1)}\n")
-        # print at around the end?
-        if progress > 0.95:
-            print(self.returncollectionofbids())
+        # store the values of the received bid, the store writes them when the session finishes
+        vals = {issue: str(bid.getValue(issue)) for issue in bid.getIssues()}
+        self.storelastbid(lastbid=vals)
         # very basic approach that accepts if the offer is valued above 0.7 and
         # 95% of the time towards the deadline has passed
         conditions = [
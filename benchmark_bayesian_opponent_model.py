@@ -0,0 +1,52 @@
+import time
+
+import numpy as np
+from geniusweb.bidspace.AllBidsList import AllBidsList
+
+from agents.template_agent.utils.bayesian_opponent_model import BayesianOpponentModel
+from utils.runners import get_utility_function
+
+# Measures the cost of the Bayesian opponent model on the largest domain (10395 bids):
+#   - the posterior update per received offer, which should stay below 1 ms
+#   - a batch prediction over all bids of the domain
+PROFILE = "domains/domain01/profileB.json"
+NUM_OFFERS = 200
+UPDATE_TARGET_MS = 1.0
+# standard deviation of the noise on the rank of every offer, in ranks
+RANK_NOISE = 20
+
+profile = get_utility_function(f"file:{PROFILE}")
+domain = profile.getDomain()
+all_bids = AllBidsList(domain)
+bids = [all_bids.get(i) for i in range(all_bids.size())]
+
+model = BayesianOpponentModel(domain, seed=0)
+
+# the opponent offers its bids from best to worst, with some noise
+utilities = np.array([float(profile.getUtility(bid)) for bid in bids])
+order = np.argsort(-utilities)
+ranks = np.linspace(0, len(order) // 4, NUM_OFFERS) + np.random.default_rng(0).normal(0, RANK_NOISE, NUM_OFFERS)
+offers = [bids[i] for i in order[np.clip(np.round(ranks), 0, len(order) - 1).astype(int)]]
+
+update_times = []
+for i, bid in enumerate(offers):
+    start = time.perf_counter()
+    model.update(bid, progress=i / NUM_OFFERS)
+    update_times.append(time.perf_counter() - start)
+
+codes = model.encode(bids)
+start = time.perf_counter()
+predicted = model.predict_codes(codes)
+predict_time = time.perf_counter() - start
+
+rank_correlation = np.corrcoef(np.argsort(np.argsort(predicted)), np.argsort(np.argsort(utilities)))[0, 1]
+
+print(f"hypotheses:              {len(model.posterior)}")
+print(f"update per offer (mean): {1000 * np.mean(update_times):.3f} ms")
+print(f"update per offer (max):  {1000 * np.max(update_times):.3f} ms")
+print(f"predict {len(bids)} bids:     {1000 * predict_time:.3f} ms")
+print(f"rank correlation:        {rank_correlation:.3f}")
+print(
+    f"update target:           {'PASS' if 1000 * np.mean(update_times) < UPDATE_TARGET_MS else 'FAIL'}"
+    f" (mean below {UPDATE_TARGET_MS:.1f} ms)"
+)
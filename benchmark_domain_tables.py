@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+import resource
+import tempfile
+
+import numpy as np
+
+from agents.template_agent.utils.domain_tables import TABLES_DIR_ENV, get_domain_table, publish_table
+from utils.runners import get_utility_function
+
+# Compares the memory of tournament workers that build their own domain tables (before) with workers
+# that attach the tables published by the runner (after):
+#   - peak RSS per worker, which also counts the shared pages of the attached tables
+#   - private memory per worker at the end (linux only), which does not
+PROFILES = [f"domains/domain{i:02d}/profile{side}.json" for i in range(50) for side in "AB"]
+WORKERS = 4
+
+
+def private_mb():
+    # private memory of the process in MB, from /proc/self/smaps_rollup, None where it is missing
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        return None
+    with open("/proc/self/smaps_rollup", encoding="utf-8") as f:
+        fields = dict(line.split(":", 1) for line in f if ":" in line)
+    return sum(int(fields[key].split()[0]) for key in ("Private_Clean", "Private_Dirty")) / 1024
+
+
+def worker(tables_dir, results):
+    if tables_dir is not None:
+        os.environ[TABLES_DIR_ENV] = tables_dir
+    for path in PROFILES:
+        table = get_domain_table(get_utility_function(f"file:{os.path.abspath(path)}"))
+        # touch the arrays as the agents do, the sorted utilities and the best bids
+        table.cutoff(0.0)
+        table.codes[table.order[:100]].sum()
+    results.send((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, private_mb()))
+
+
+def run_workers(tables_dir):
+    readers, processes = [], []
+    for _ in range(WORKERS):
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=worker, args=(tables_dir, writer))
+        process.start()
+        writer.close()
+        readers.append(reader)
+        processes.append(process)
+    measurements = [reader.recv() for reader in readers]
+    for process in processes:
+        process.join()
+    return measurements
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tables_dir:
+        for path in PROFILES:
+            publish_table(get_utility_function(f"file:{os.path.abspath(path)}"), tables_dir)
+
+        for name, directory in (("built per worker", None), ("attached", tables_dir)):
+            peak_rss, private = zip(*run_workers(directory))
+            print(f"{name}:")
+            print(f"  peak RSS per worker (mean):  {np.mean(peak_rss):.1f} MB")
+            print(f"  peak RSS per worker (max):   {np.max(peak_rss):.1f} MB")
+            if None not in private:
+                print(f"  private memory per worker:   {np.mean(private):.1f} MB")
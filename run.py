@@ -4,6 +4,7 @@ from pathlib import Path
 
 from utils.plot_trace import plot_trace
 from utils.runners import run_session
+from utils.trace_spans import span, start_tracing, stop_tracing
 
 RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
 
@@ -15,6 +16,8 @@ if not RESULTS_DIR.exists():
 #   You need to specify the classpath of 2 agents to start a negotiation. Parameters for the agent can be added as a dict (see example)
 #   You need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
 #   You need to specify a time deadline (is milliseconds (ms)) we are allowed to negotiate before we end without agreement
+#   Optionally, a Chrome trace of the session is saved with the time spent in every phase of the session,
+#   open it in chrome://tracing or ui.perfetto.dev.
 settings = {
     "agents": [
         {
@@ -27,14 +30,23 @@ settings = {
     ],
     "profiles": ["domains/domain00/profileA.json", "domains/domain00/profileB.json"],
     "deadline_time_ms": 10000,
+    "trace_path": None,  # e.g. RESULTS_DIR.joinpath("chrome_trace.json")
 }
 
+# record the time spent in every phase of the session
+if settings["trace_path"] is not None:
+    start_tracing("session")
+
 # run a session and obtain results in dictionaries
 session_results_trace, session_results_summary = run_session(settings)
 
 # plot trace to html file
 if not session_results_trace["error"]:
-    plot_trace(session_results_trace, RESULTS_DIR.joinpath("trace_plot.html"))
+    with span("plot_trace"):
+        plot_trace(session_results_trace, RESULTS_DIR.joinpath("trace_plot.html"))
+
+if settings["trace_path"] is not None:
+    stop_tracing().save(settings["trace_path"])
 
 # write results to file
 with open(RESULTS_DIR.joinpath("session_results_trace.json"), "w", encoding="utf-8") as f:
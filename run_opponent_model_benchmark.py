@@ -0,0 +1,32 @@
+import time
+from pathlib import Path
+
+from utils.opponent_model_benchmark import run_opponent_model_benchmark
+
+RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
+
+# Settings to benchmark the opponent models:
+#   The models receive the offers of a synthetic time-dependent opponent that uses the given profile,
+#   their predictions are compared with the true utilities of that profile.
+#   Recorded sessions (session_results_trace.json files saved by run.py) can be replayed by adding them to "traces".
+benchmark_settings = {
+    "profiles": [f"domains/domain{i:02d}/profileB.json" for i in range(50)],
+    "traces": [],
+    "num_offers": 200,
+    "max_eval_bids": 2000,
+}
+
+# the benchmark runs in worker processes, which import this script again on platforms that spawn them
+if __name__ == "__main__":
+    # create results directory if it does not exist
+    if not RESULTS_DIR.exists():
+        RESULTS_DIR.mkdir(parents=True)
+
+    # run the benchmark and obtain the results per profile and per model
+    benchmark_results, benchmark_summary = run_opponent_model_benchmark(benchmark_settings)
+
+    print(benchmark_summary.to_string())
+
+    # save the benchmark results
+    benchmark_results.to_csv(RESULTS_DIR.joinpath("opponent_model_benchmark_results.csv"), index=False)
+    benchmark_summary.to_csv(RESULTS_DIR.joinpath("opponent_model_benchmark_summary.csv"))
@@ -7,14 +7,32 @@ from utils.runners import run_tournament
 
 RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
 
-# create results directory if it does not exist
-if not RESULTS_DIR.exists():
-    RESULTS_DIR.mkdir(parents=True)
-
 # Settings to run a negotiation session:
 #   You need to specify the classpath of 2 agents to start a negotiation. Parameters for the agent can be added as a dict (see example)
 #   You need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
 #   You need to specify a time deadline (is milliseconds (ms)) we are allowed to negotiate before we end without agreement.
+#   Optionally, a cache directory can be specified. Sessions are then only run if the code of one of the agents, the profiles,
+#   the deadline, the seed or the limits changed since the session was last run, otherwise the cached results are reused.
+#   Sessions with an agent that has a storage directory are always run, as the agent learns from earlier sessions.
+#   Optionally, sessions can run in parallel on a number of worker processes. Session durations are then recorded in a ledger,
+#   so that later tournaments can start the longest sessions first. A report on the utilization of the workers is saved.
+#   The sorted bid tables of all profiles are then published once in the domain tables directory and shared by all workers.
+#   Optionally, the progress of the tournament is written to a JSON status file, a Prometheus textfile and/or a terminal line.
+#   Optionally, a Chrome trace of the tournament is saved, with spans for every phase of every session per worker process.
+#   Optionally, the notifyChange calls of some agents are profiled over all their sessions. A pstats file and a collapsed stack file
+#   (for flame graphs) are then saved per agent. Cached results are not used while profiling.
+#   Optionally, the peak memory of every agent is added to the session results. With a memory budget (in MB per agent), sessions
+#   in which an agent exceeds the budget are recorded as ERROR.
+#   Optionally, runaway agents are stopped by CPU time limits per session and per turn (notifyChange call), and by a wall time
+#   limit per session. Sessions with a wall time limit run in supervised worker processes that are killed when the limit is
+#   exceeded. Stopped sessions are recorded as ERROR, with the reason and the stack of the stuck agent.
+#   Optionally, agents get learning rounds: the sessions then run in batches of "learn_every" sessions, and between the batches
+#   every agent with the "Learn" behaviour receives the Learn protocol in a process of its own, with a time budget of
+#   "learn_time_ms". This allows agents to analyse the data in their storage directory outside of the negotiations.
+#   Cached results are not used with learning rounds.
+#   Optionally, the "MOPAC" protocol can be used instead of "SAOP" for multilateral sessions. Every session then has "party_count"
+#   agents, for every combination of agents and every rotation of the profiles, and the profile sets need "party_count" profiles.
+#   Set "interactive" to False to skip the confirmation of large tournaments, e.g. on a headless server.
 tournament_settings = {
     "agents": [
         # {
@@ -131,16 +149,43 @@ tournament_settings = {
         ["domains/domain46/profileA.json", "domains/domain46/profileB.json"],
     ],
     "deadline_time_ms": 10000,
+    "protocol": "SAOP",
+    "party_count": 2,
+    "cache_dir": None,  # e.g. "results/session_cache"
+    "workers": 1,
+    "ledger_path": "results/session_ledger.jsonl",
+    "pool_report": RESULTS_DIR.joinpath("pool_report.json"),
+    "domain_tables_dir": "results/domain_tables",
+    "status_path": RESULTS_DIR.joinpath("status.json"),
+    "prometheus_path": RESULTS_DIR.joinpath("tournament.prom"),
+    "progress_line": True,
+    "trace_path": None,  # e.g. RESULTS_DIR.joinpath("chrome_trace.json")
+    "profile_agents": [],
+    "profile_dir": RESULTS_DIR.joinpath("profiles"),
+    "memory_accounting": False,
+    "memory_budget_mb": None,
+    "session_wall_limit_s": None,
+    "session_cpu_limit_s": None,
+    "turn_cpu_limit_s": None,
+    "learn_every": None,
+    "learn_time_ms": 60000,
+    "learn_report": RESULTS_DIR.joinpath("learn_report.json"),
 }
 
-# run a session and obtain results in dictionaries
-tournament_steps, tournament_results, tournament_results_summary = run_tournament(tournament_settings)
+# worker processes import this script again on platforms that spawn them (macOS, Windows)
+if __name__ == "__main__":
+    # create results directory if it does not exist
+    if not RESULTS_DIR.exists():
+        RESULTS_DIR.mkdir(parents=True)
+
+    # run a session and obtain results in dictionaries
+    tournament_steps, tournament_results, tournament_results_summary = run_tournament(tournament_settings)
 
-# save the tournament settings for reference
-with open(RESULTS_DIR.joinpath("tournament_steps.json"), "w", encoding="utf-8") as f:
-    f.write(json.dumps(tournament_steps, indent=2))
-# save the tournament results
-with open(RESULTS_DIR.joinpath("tournament_results.json"), "w", encoding="utf-8") as f:
-    f.write(json.dumps(tournament_results, indent=2))
-# save the tournament results summary
-tournament_results_summary.to_csv(RESULTS_DIR.joinpath("tournament_results_summary.csv"))
+    # save the tournament settings for reference
+    with open(RESULTS_DIR.joinpath("tournament_steps.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(tournament_steps, indent=2))
+    # save the tournament results
+    with open(RESULTS_DIR.joinpath("tournament_results.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(tournament_results, indent=2))
+    # save the tournament results summary
+    tournament_results_summary.to_csv(RESULTS_DIR.joinpath("tournament_results_summary.csv"))
@@ -0,0 +1,201 @@
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.runners import (
+    create_tournament_sessions,
+    process_tournament_results,
+    run_sessions,
+)
+from utils.session_cache import SessionCache
+
+METRICS = ["utility", "nash_product"]
+
+
+def agent_name(agent: dict) -> str:
+    # agents are identified by their class name in the results summaries
+    return agent["class"].split(".")[-1]
+
+
+def session_agent_stats(results_summary: dict) -> Dict[str, Dict[str, float]]:
+    """Extracts the metrics of every agent in a session results summary."""
+    stats = {}
+    for key, agent in results_summary.items():
+        if key.startswith("agent_"):
+            position = key.split("_")[1]
+            stats[agent] = {
+                "utility": results_summary[f"utility_{position}"],
+                "nash_product": results_summary["nash_product"],
+            }
+    return stats
+
+
+def bootstrap_means(values: List[float], num_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """Bootstrap distribution of the mean of a sample."""
+    values = np.asarray(values, dtype=np.float64)
+    samples = rng.integers(0, len(values), size=(num_resamples, len(values)))
+    return values[samples].mean(axis=1)
+
+
+def uncertain_pairs(
+    agent_values: Dict[str, Dict[str, List[float]]],
+    confidence: float,
+    tolerance: float,
+    num_resamples: int,
+    rng: np.random.Generator,
+) -> Tuple[List[Tuple[str, str]], Dict[str, Dict[str, Tuple[float, float]]]]:
+    """Finds the agent pairs whose ordering is not settled yet.
+
+    The ordering of two agents is settled on a metric if the bootstrap confidence interval of the
+    difference of their means excludes zero, or if it lies within [-tolerance, tolerance] so that
+    the agents are equivalent for practical purposes. A pair is uncertain if it is not settled on
+    every metric.
+
+    Returns:
+        Tuple[List[Tuple[str, str]], Dict[str, Dict[str, Tuple[float, float]]]]: the uncertain pairs
+            and the confidence interval of the mean of every agent and metric
+    """
+    alpha = (1 - confidence) / 2
+    boots = {
+        agent: {metric: bootstrap_means(values[metric], num_resamples, rng) for metric in METRICS}
+        for agent, values in agent_values.items()
+    }
+    intervals = {
+        agent: {metric: tuple(np.quantile(boot[metric], [alpha, 1 - alpha])) for metric in METRICS}
+        for agent, boot in boots.items()
+    }
+
+    pairs = []
+    for agent_a, agent_b in combinations(sorted(boots), 2):
+        for metric in METRICS:
+            low, high = np.quantile(boots[agent_a][metric] - boots[agent_b][metric], [alpha, 1 - alpha])
+            separated = low > 0 or high < 0
+            equivalent = low >= -tolerance and high <= tolerance
+            if not (separated or equivalent):
+                pairs.append((agent_a, agent_b))
+                break
+
+    return pairs, intervals
+
+
+def balanced_round(
+    uncertain_agents: List[str],
+    played: Dict[Tuple[str, str], int],
+    remaining: Dict[Tuple[str, str], int],
+    sessions_per_pair: int,
+) -> Dict[Tuple[str, str], int]:
+    """Number of sessions to play per agent pair, for extra sessions of the uncertain agents.
+
+    The metrics are means over all opponents of an agent, so an uncertain agent plays against the full
+    field: every pair of the agent is brought to `sessions_per_pair` sessions above its least played
+    pair. Agents for which some pair has run out of sessions get no extra sessions, as they could no
+    longer keep their opponents balanced.
+
+    Args:
+        uncertain_agents (List[str]): agents in an uncertain pair
+        played (Dict[Tuple[str, str], int]): sessions played per unordered agent pair
+        remaining (Dict[Tuple[str, str], int]): sessions left to play per unordered agent pair
+        sessions_per_pair (int): sessions to add to the least played pair of an agent
+
+    Returns:
+        Dict[Tuple[str, str], int]: sessions to play per unordered agent pair
+    """
+    take = defaultdict(int)
+    for agent in uncertain_agents:
+        agent_pairs = [pair for pair in played if agent in pair]
+        target = min(played[pair] for pair in agent_pairs) + sessions_per_pair
+        if any(played[pair] + remaining[pair] < target for pair in agent_pairs):
+            continue
+        for pair in agent_pairs:
+            take[pair] = max(take[pair], target - played[pair])
+    return {pair: count for pair, count in take.items() if count > 0}
+
+
+def run_adaptive_tournament(tournament_settings: dict) -> Tuple[list, list, pd.DataFrame]:
+    """Runs a tournament in rounds, until the ranking of the agents is settled.
+
+    The first round plays every ordered agent pair on `initial_sessions` profile sets. After every
+    round, bootstrap confidence intervals on the agents' average utility and nash product decide
+    which agent pairs still have an uncertain ordering. In the next round, the agents of those pairs
+    play more sessions against every opponent in a balanced rotation (see `balanced_round`), as the
+    metrics are means over all opponents. The tournament stops when no pair is uncertain, when the
+    uncertain agents cannot play more balanced sessions, or when `max_sessions` sessions were played.
+
+    Args:
+        tournament_settings (dict): settings as for `run_tournament`, with the optional keys
+            "confidence": confidence level of the intervals (default: 0.95)
+            "tolerance": differences in means below this are considered equivalent (default: 0.01)
+            "initial_sessions": sessions per ordered agent pair in the first round (default: 2)
+            "sessions_per_round": sessions per ordered agent pair of an uncertain agent in later rounds (default: 1)
+            "max_sessions": maximum number of sessions (default: the full round robin)
+            "num_resamples": number of bootstrap resamples (default: 1000)
+            "bootstrap_seed": seed of the session order and the bootstrap (default: 0), separate from
+                the "seed" of the sessions, so the resampling can vary without changing the agents' behaviour
+
+    Returns:
+        Tuple[list, list, pd.DataFrame]: the played sessions, their results summaries and the tournament
+            results summary with the confidence interval bounds of every agent as additional columns
+    """
+    confidence = tournament_settings.get("confidence", 0.95)
+    tolerance = tournament_settings.get("tolerance", 0.01)
+    initial_sessions = tournament_settings.get("initial_sessions", 2)
+    sessions_per_round = tournament_settings.get("sessions_per_round", 1)
+    num_resamples = tournament_settings.get("num_resamples", 1000)
+    rng = np.random.default_rng(tournament_settings.get("bootstrap_seed", 0))
+
+    cache = None
+    if tournament_settings.get("cache_dir") is not None:
+        cache = SessionCache(tournament_settings["cache_dir"])
+
+    # pool of remaining sessions per unordered agent pair, in random order
+    pools = defaultdict(list)
+    all_sessions = create_tournament_sessions(tournament_settings)
+    for index in rng.permutation(len(all_sessions)):
+        settings = all_sessions[index]
+        names = [agent_name(agent) for agent in settings["agents"]]
+        pools[tuple(sorted(names))].append(settings)
+    max_sessions = tournament_settings.get("max_sessions", len(all_sessions))
+
+    tournament_steps = []
+    tournament_results = []
+    agent_values = defaultdict(lambda: defaultdict(list))
+
+    # both orders of an agent pair are in the same pool, so a pair plays twice per round
+    played = {pair: 0 for pair in pools}
+    scheduled = {pair: 2 * initial_sessions for pair in pools}
+    intervals = {}
+    while scheduled and len(tournament_steps) < max_sessions:
+        batch = []
+        for pair, count in scheduled.items():
+            take = min(count, len(pools[pair]), max_sessions - len(tournament_steps) - len(batch))
+            batch.extend(pools[pair][:take])
+            del pools[pair][:take]
+            played[pair] += take
+        if not batch:
+            break
+
+        batch_results = run_sessions(batch, cache)
+        for results_summary in batch_results:
+            for agent, stats in session_agent_stats(results_summary).items():
+                for metric in METRICS:
+                    agent_values[agent][metric].append(stats[metric])
+        tournament_steps.extend(batch)
+        tournament_results.extend(batch_results)
+
+        pairs, intervals = uncertain_pairs(agent_values, confidence, tolerance, num_resamples, rng)
+        uncertain_agents = sorted({agent for pair in pairs for agent in pair})
+        remaining = {pair: len(pool) for pair, pool in pools.items()}
+        scheduled = balanced_round(uncertain_agents, played, remaining, 2 * sessions_per_round)
+
+    tournament_results_summary = process_tournament_results(tournament_results)
+    for metric in METRICS:
+        for bound, position in (("low", 0), ("high", 1)):
+            tournament_results_summary[f"avg_{metric}_ci_{bound}"] = [
+                intervals[agent][metric][position] if agent in intervals else np.nan
+                for agent in tournament_results_summary.index
+            ]
+
+    return tournament_steps, tournament_results, tournament_results_summary
@@ -0,0 +1,144 @@
+import cProfile
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from importlib import import_module
+from pathlib import Path
+from typing import Dict, List
+
+# profilers of the current process by agent class path, empty if profiling is off
+_active: Dict[str, "AgentProfiler"] = {}
+
+
+class AgentProfiler:
+    """Profiles the `notifyChange` calls of one agent class, accumulated over all its sessions.
+
+    Every call runs under a deterministic `cProfile` profiler, whose statistics are dumped as a
+    pstats file. In parallel, a sampling thread records the call stack of the agent every
+    `interval_s` seconds, the samples are written as collapsed stacks (one "frame;frame;frame count"
+    line per stack) that flame graph tools such as flamegraph.pl, speedscope or inferno read directly.
+    Only time spent inside `notifyChange` is profiled, the opponent and the protocol are left out.
+
+    Args:
+        class_path (str): python path of the agent class
+        interval_s (float, optional): sampling interval of the call stacks. Defaults to 0.001.
+    """
+
+    def __init__(self, class_path: str, interval_s: float = 0.001):
+        self.class_path = class_path
+        self.name = class_path.split(".")[-1]
+        self.interval_s = interval_s
+        self.profile = cProfile.Profile()
+        self.stacks = Counter()
+        self.calls = 0
+
+        self._thread_id = None
+        self._entry_code = None
+
+    def _sample(self, stop: threading.Event):
+        while not stop.wait(self.interval_s):
+            thread_id = self._thread_id
+            if thread_id is None:
+                continue
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self._entry_code:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).stem}:{getattr(code, 'co_qualname', code.co_name)}")
+                frame = frame.f_back
+            # only samples taken inside notifyChange reach the entry frame
+            if frame is not None and stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    @contextmanager
+    def instrument(self):
+        """Profiles the `notifyChange` calls of the agent class for the duration of the context."""
+        module, name = self.class_path.rsplit(".", 1)
+        cls = getattr(import_module(module), name)
+        original = cls.__dict__.get("notifyChange")
+        notify_change = cls.notifyChange
+
+        def profiled_notify_change(agent, info):
+            self.calls += 1
+            self._thread_id = threading.get_ident()
+            self.profile.enable()
+            try:
+                return notify_change(agent, info)
+            finally:
+                self.profile.disable()
+                self._thread_id = None
+
+        self._entry_code = profiled_notify_change.__code__
+        cls.notifyChange = profiled_notify_change
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(stop,), daemon=True)
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+            if original is None:
+                del cls.notifyChange
+            else:
+                cls.notifyChange = original
+
+    def save(self, directory: Path):
+        # writes <agent>.pstats and <agent>.collapsed to the directory
+        directory.mkdir(parents=True, exist_ok=True)
+        if self.calls > 0:
+            self.profile.dump_stats(directory.joinpath(f"{self.name}.pstats"))
+        with open(directory.joinpath(f"{self.name}.collapsed"), "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+
+def start_profiling(class_paths: List[str]):
+    _active.clear()
+    _active.update({class_path: AgentProfiler(class_path) for class_path in class_paths})
+
+
+def stop_profiling() -> Dict[str, AgentProfiler]:
+    profilers = dict(_active)
+    _active.clear()
+    return profilers
+
+
+@contextmanager
+def profile_agents(class_paths: List[str]):
+    # instruments the agents of a session that are being profiled, does nothing if profiling is off
+    with ExitStack() as stack:
+        for class_path in dict.fromkeys(class_paths):
+            if class_path in _active:
+                stack.enter_context(_active[class_path].instrument())
+        yield
+
+
+def merge_profiles(directories: List[Path], directory: Path):
+    """Merges the pstats and collapsed stack files of several processes, per agent."""
+    directory.mkdir(parents=True, exist_ok=True)
+    names = {path.stem for source in directories for path in source.glob("*.collapsed")}
+    for name in sorted(names):
+        stats = None
+        stacks = Counter()
+        for source in directories:
+            pstats_file = source.joinpath(f"{name}.pstats")
+            if pstats_file.exists():
+                if stats is None:
+                    stats = pstats.Stats(str(pstats_file))
+                else:
+                    stats.add(str(pstats_file))
+            collapsed_file = source.joinpath(f"{name}.collapsed")
+            if collapsed_file.exists():
+                with open(collapsed_file, encoding="utf-8") as f:
+                    for line in f:
+                        stack, count = line.rsplit(" ", 1)
+                        stacks[stack] += int(count)
+
+        if stats is not None:
+            stats.dump_stats(directory.joinpath(f"{name}.pstats"))
+        with open(directory.joinpath(f"{name}.collapsed"), "w", encoding="utf-8") as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
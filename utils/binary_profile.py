@@ -0,0 +1,246 @@
+import json
+import os
+import time
+from glob import glob
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+# loaded profiles by path of the JSON profile, shared by the sessions of a worker process
+_profiles: Dict[str, "BinaryProfile"] = {}
+
+
+def binary_profile_paths(profile_path: str):
+    # the binary profile and its JSON sidecar with names, next to the JSON profile
+    path = Path(profile_path)
+    return path.with_suffix(".npz"), path.with_suffix(".names.json")
+
+
+def write_binary_profile(profile: dict, profile_path: str):
+    """Writes the binary form of a JSON profile next to it, see `BinaryProfile`.
+
+    Args:
+        profile (dict): JSON profile, with a "LinearAdditiveUtilitySpace"
+        profile_path (str): path of the JSON profile
+    """
+    raw = profile["LinearAdditiveUtilitySpace"]
+    issues = list(raw["domain"]["issuesValues"].keys())
+    values = [raw["domain"]["issuesValues"][issue]["values"] for issue in issues]
+    value_utilities = [
+        raw["issueUtilities"][issue]["DiscreteValueSetUtilities"]["valueUtilities"] for issue in issues
+    ]
+
+    npz_path, names_path = binary_profile_paths(profile_path)
+    np.savez(
+        npz_path,
+        issue_weights=np.array([raw["issueWeights"][issue] for issue in issues], dtype=np.float64),
+        value_utilities=np.array(
+            [utilities[value] for issue_values, utilities in zip(values, value_utilities) for value in issue_values],
+            dtype=np.float64,
+        ),
+        offsets=np.cumsum([0] + [len(issue_values) for issue_values in values], dtype=np.int32),
+    )
+    with open(names_path, "w", encoding="utf-8") as f:
+        json.dump({"name": raw["name"], "domain": raw["domain"]["name"], "issues": issues, "values": values}, f)
+
+
+class BinaryProfile:
+    """Linear additive profile in a compact binary form, to score bids without the geniusweb objects.
+
+    The binary form is an `.npz` file with the issue weights, the utilities of the values of all
+    issues in one flat array and the offset of every issue in that array, in the order of the
+    domain. The names of the issues and values are kept in a JSON sidecar. Reading it takes a
+    fraction of the time that pyson's `ObjectMapper` needs for the JSON profile, which embeds the
+    whole domain and parses every utility to a Decimal.
+
+    `getUtility` scores a geniusweb `Bid` as a float, `utilities` scores bids encoded as value indices
+    in batch. The `LinearAdditiveUtilitySpace` is only built by `utility_space`, when a caller needs it.
+
+    Args:
+        name (str): name of the profile
+        domain (str): name of the domain
+        issues (List[str]): issues in the order of the domain
+        values (List[List[str]]): values of every issue, in the order of the domain
+        issue_weights (np.ndarray): weight of every issue
+        value_utilities (np.ndarray): utilities of the values of all issues, issue after issue
+        offsets (np.ndarray): index of the first value of every issue in value_utilities, and the total
+    """
+
+    def __init__(
+        self,
+        name: str,
+        domain: str,
+        issues: List[str],
+        values: List[List[str]],
+        issue_weights: np.ndarray,
+        value_utilities: np.ndarray,
+        offsets: np.ndarray,
+    ):
+        self.name = name
+        self.domain = domain
+        self.issues = issues
+        self.values = values
+        self.issue_weights = issue_weights
+        self.value_utilities = value_utilities
+        self.offsets = offsets
+
+        # weighted utility of every value, by issue and value name
+        self._weighted = {
+            issue: {
+                value: float(weight * utility)
+                for value, utility in zip(issue_values, value_utilities[start:end])
+            }
+            for issue, issue_values, weight, start, end in zip(
+                issues, values, issue_weights, offsets[:-1], offsets[1:]
+            )
+        }
+        self._utility_space = None
+
+    @classmethod
+    def from_file(cls, profile_path: str) -> "BinaryProfile":
+        """Reads the binary form of a JSON profile, or the JSON profile if the binary form is missing or outdated."""
+        npz_path, names_path = binary_profile_paths(profile_path)
+        if (
+            npz_path.exists()
+            and names_path.exists()
+            and npz_path.stat().st_mtime >= os.stat(profile_path).st_mtime
+        ):
+            with open(names_path, encoding="utf-8") as f:
+                names = json.load(f)
+            with np.load(npz_path) as arrays:
+                return cls(
+                    names["name"],
+                    names["domain"],
+                    names["issues"],
+                    names["values"],
+                    arrays["issue_weights"],
+                    arrays["value_utilities"],
+                    arrays["offsets"],
+                )
+
+        with open(profile_path, encoding="utf-8") as f:
+            raw = json.load(f)["LinearAdditiveUtilitySpace"]
+        issues = list(raw["domain"]["issuesValues"].keys())
+        values = [raw["domain"]["issuesValues"][issue]["values"] for issue in issues]
+        return cls(
+            raw["name"],
+            raw["domain"]["name"],
+            issues,
+            values,
+            np.array([raw["issueWeights"][issue] for issue in issues], dtype=np.float64),
+            np.array(
+                [
+                    raw["issueUtilities"][issue]["DiscreteValueSetUtilities"]["valueUtilities"][value]
+                    for issue, issue_values in zip(issues, values)
+                    for value in issue_values
+                ],
+                dtype=np.float64,
+            ),
+            np.cumsum([0] + [len(issue_values) for issue_values in values], dtype=np.int32),
+        )
+
+    def getUtility(self, bid) -> float:
+        # utility of a geniusweb Bid, same interface as LinearAdditiveUtilitySpace but as a float
+        return sum(self._weighted[issue][value.getValue()] for issue, value in bid.getIssueValues().items())
+
+    def utilities(self, codes: np.ndarray) -> np.ndarray:
+        """Utilities of bids encoded as value indices, one row per bid and one column per issue."""
+        return self.value_utilities[codes + self.offsets[:-1]] @ self.issue_weights
+
+    def to_json(self) -> dict:
+        # the JSON profile that this binary profile was written from
+        issue_utilities = {
+            issue: {
+                "DiscreteValueSetUtilities": {
+                    "valueUtilities": {
+                        value: float(utility)
+                        for value, utility in zip(issue_values, self.value_utilities[start:end])
+                    }
+                }
+            }
+            for issue, issue_values, start, end in zip(self.issues, self.values, self.offsets[:-1], self.offsets[1:])
+        }
+        return {
+            "LinearAdditiveUtilitySpace": {
+                "issueUtilities": issue_utilities,
+                "issueWeights": {issue: float(weight) for issue, weight in zip(self.issues, self.issue_weights)},
+                "domain": {
+                    "name": self.domain,
+                    "issuesValues": {issue: {"values": values} for issue, values in zip(self.issues, self.values)},
+                },
+                "name": self.name,
+            }
+        }
+
+    def utility_space(self):
+        """The profile as geniusweb `LinearAdditiveUtilitySpace`, built on the first call."""
+        if self._utility_space is None:
+            from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
+                LinearAdditiveUtilitySpace,
+            )
+            from pyson.ObjectMapper import ObjectMapper
+
+            self._utility_space = ObjectMapper().parse(self.to_json(), LinearAdditiveUtilitySpace)
+        return self._utility_space
+
+
+def load_profile(profile_uri: str) -> BinaryProfile:
+    """Loads a profile by path or file URI, once per process."""
+    path = str(Path(profile_uri.replace("file:", "", 1)).absolute())
+    if path not in _profiles:
+        _profiles[path] = BinaryProfile.from_file(path)
+    return _profiles[path]
+
+
+def export_binary_profiles(domains_dir: str) -> List[str]:
+    """Writes the binary form of every JSON profile in the domain directories, returns their paths."""
+    profile_paths = sorted(glob(os.path.join(domains_dir, "*", "profile*.json")))
+    profile_paths = [path for path in profile_paths if not path.endswith(".names.json")]
+    for path in profile_paths:
+        with open(path, encoding="utf-8") as f:
+            write_binary_profile(json.load(f), path)
+    return profile_paths
+
+
+def benchmark_profile_loading(profile_paths: List[str], repeat: int = 3) -> Dict[str, float]:
+    """Average time in milliseconds to load a profile, through geniusweb and from the binary form.
+
+    "geniusweb" is the profile connection that the agents and `process_results` used before, the
+    binary variants read the binary form without the per process cache, with and without building
+    the `LinearAdditiveUtilitySpace` afterwards.
+    """
+    from geniusweb.profileconnection.ProfileConnectionFactory import (
+        ProfileConnectionFactory,
+    )
+    from geniusweb.simplerunner.NegoRunner import StdOutReporter
+    from uri.uri import URI
+
+    def geniusweb(path):
+        connection = ProfileConnectionFactory.create(URI(f"file:{Path(path).absolute()}"), StdOutReporter())
+        connection.getProfile()
+        connection.close()
+
+    loaders = {
+        "geniusweb": geniusweb,
+        "binary": BinaryProfile.from_file,
+        "binary + utility space": lambda path: BinaryProfile.from_file(path).utility_space(),
+    }
+    timings = {}
+    for name, loader in loaders.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for path in profile_paths:
+                loader(path)
+        timings[name] = (time.perf_counter() - start) * 1000 / (repeat * len(profile_paths))
+    return timings
+
+
+def main():
+    profile_paths = export_binary_profiles("domains/")
+    for name, load_time_ms in benchmark_profile_loading(profile_paths).items():
+        print(f"{name}: {load_time_ms:.3f} ms per profile")
+
+
+if __name__ == "__main__":
+    main()
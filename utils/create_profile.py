@@ -10,6 +10,8 @@ import numpy as np
 import plotly.graph_objects as go
 from numpy.random import dirichlet
 
+from utils.binary_profile import write_binary_profile
+
 
 def main():
     for i in range(50):
@@ -87,8 +89,11 @@ class Profile:
         domain_name = self.profile["LinearAdditiveUtilitySpace"]["domain"]["name"]
         profile_name = self.profile["LinearAdditiveUtilitySpace"]["name"]
         path = os.path.join(parent_path, domain_name)
-        with open(os.path.join(path, f"{profile_name}.json"), "w") as f:
+        profile_path = os.path.join(path, f"{profile_name}.json")
+        with open(profile_path, "w") as f:
             f.write(json.dumps(self.profile, indent=2))
+        # compact form for the runners, that do not need to parse the domain
+        write_binary_profile(self.profile, profile_path)
 
     def get_issues_values(self):
         return self.profile["LinearAdditiveUtilitySpace"]["domain"]["issuesValues"]
@@ -0,0 +1,176 @@
+import multiprocessing
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from importlib import import_module
+from multiprocessing.connection import wait
+from pathlib import Path
+from threading import Event
+from typing import List
+
+from geniusweb.actions.Action import Action
+from geniusweb.actions.LearningDone import LearningDone
+from geniusweb.actions.PartyId import PartyId
+from geniusweb.connection.ConnectionEnd import ConnectionEnd
+from geniusweb.inform.Inform import Inform
+from geniusweb.inform.Settings import Settings
+from geniusweb.progress.ProgressTime import ProgressTime
+from geniusweb.references.Parameters import Parameters
+from geniusweb.references.ProfileRef import ProfileRef
+from geniusweb.references.ProtocolRef import ProtocolRef
+from tudelft.utilities.listener.DefaultListenable import DefaultListenable
+from uri.uri import URI
+
+# time that a learning agent may take beyond its budget to report back before it is killed
+LEARN_GRACE_S = 1.0
+
+
+class LearnConnection(DefaultListenable[Inform], ConnectionEnd[Inform, Action]):
+    """Connection of a party in a learning round, which only waits for the party to send `LearningDone`."""
+
+    def __init__(self):
+        super().__init__()
+        self.done = Event()
+
+    def send(self, data: Action):
+        if isinstance(data, LearningDone):
+            self.done.set()
+
+    def getReference(self):
+        return None
+
+    def getRemoteURI(self):
+        return None
+
+    def getError(self):
+        return None
+
+    def close(self):
+        pass
+
+
+def learning_agents(tournament_settings: dict) -> List[dict]:
+    # every agent class of the tournament once, with its parameters (and so its storage directory)
+    agents = {}
+    for agent in tournament_settings["agents"]:
+        agents.setdefault(agent["class"], agent)
+    return list(agents.values())
+
+
+def learn(agent: dict, profile: str, learn_time_ms: int) -> dict:
+    """Runs the Learn protocol for one agent, in the current process.
+
+    The agent receives `Settings` for the "Learn" protocol with its parameters and a time budget
+    as progress, as it would from geniusweb. Agents that do not have the "Learn" behaviour are
+    skipped, the others should send `LearningDone` before their budget is used up.
+
+    Args:
+        agent (dict): agent as in the tournament settings, with its class path and parameters
+        profile (str): path of a profile of the agent, only passed as reference
+        learn_time_ms (int): time budget of the agent
+
+    Returns:
+        dict: result of the agent, "done", "timeout" or "skipped", with the duration in seconds
+    """
+    start = time.time()
+    parameters = agent.get("parameters", {})
+    if "storage_dir" in parameters:
+        Path(parameters["storage_dir"]).mkdir(parents=True, exist_ok=True)
+
+    module, name = agent["class"].rsplit(".", 1)
+    party = getattr(import_module(module), name)()
+    if "Learn" not in party.getCapabilities().getBehaviours():
+        return {"agent": name, "result": "skipped", "duration_s": time.time() - start}
+
+    connection = LearnConnection()
+    party.connect(connection)
+    party.notifyChange(
+        Settings(
+            PartyId(f"{name}_learn"),
+            ProfileRef(URI(f"file:{Path(profile).absolute()}")),
+            ProtocolRef(URI("Learn")),
+            ProgressTime(learn_time_ms, datetime.now()),
+            Parameters(parameters),
+        )
+    )
+    # the agent may learn in notifyChange, or in a thread of its own
+    done = connection.done.wait(max(learn_time_ms / 1000 - (time.time() - start), 0))
+    party.terminate()
+    return {"agent": name, "result": "done" if done else "timeout", "duration_s": time.time() - start}
+
+
+def _learner(agent: dict, profile: str, learn_time_ms: int, results):
+    try:
+        result = learn(agent, profile, learn_time_ms)
+    except Exception:
+        result = {"agent": agent["class"].split(".")[-1], "result": "ERROR", "error": traceback.format_exc()}
+    results.send(result)
+
+
+def run_learning_round(agents: List[dict], profile: str, learn_time_ms: int, workers: int = 1) -> List[dict]:
+    """Gives every agent a learning phase, in parallel worker processes with a time budget each.
+
+    Every agent learns in a process of its own, at most `workers` at the same time. An agent that
+    has not reported back shortly after its budget ran out is killed and recorded as a timeout.
+
+    Args:
+        agents (List[dict]): agents as in the tournament settings
+        profile (str): path of a profile, passed to the agents as reference
+        learn_time_ms (int): time budget of every agent
+        workers (int, optional): number of agents that learn at the same time. Defaults to 1.
+
+    Returns:
+        List[dict]: result of every agent, in the order of `agents`
+    """
+    results = [None] * len(agents)
+    pending = deque(range(len(agents)))
+    # reader of every running learner, with its index, process, start time and deadline
+    running = {}
+
+    def start(index: int):
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=_learner, args=(agents[index], profile, learn_time_ms, writer), daemon=True
+        )
+        process.start()
+        writer.close()
+        started = time.time()
+        running[reader] = (index, process, started, started + learn_time_ms / 1000 + LEARN_GRACE_S)
+
+    try:
+        while pending or running:
+            while pending and len(running) < max(workers, 1):
+                start(pending.popleft())
+
+            timeout = max(min(deadline for _, _, _, deadline in running.values()) - time.time(), 0)
+            for reader in wait(list(running), timeout):
+                index, process, _, _ = running.pop(reader)
+                try:
+                    results[index] = reader.recv()
+                except EOFError:
+                    # the learner died without reporting, e.g. killed by the OS
+                    results[index] = {"agent": agents[index]["class"].split(".")[-1], "result": "ERROR",
+                                      "error": f"learning process exited with code {process.exitcode}"}
+                process.join()
+
+            now = time.time()
+            for reader, (index, process, started, deadline) in list(running.items()):
+                if now >= deadline:
+                    process.kill()
+                    process.join()
+                    del running[reader]
+                    results[index] = {"agent": agents[index]["class"].split(".")[-1], "result": "timeout",
+                                      "duration_s": now - started}
+    finally:
+        for _, process, _, _ in running.values():
+            process.kill()
+
+    return results
+
+
+def format_learning_round(number: int, results: List[dict]) -> str:
+    counts = {}
+    for result in results:
+        counts[result["result"]] = counts.get(result["result"], 0) + 1
+    return f"learning round {number}: " + ", ".join(f"{count} {result}" for result, count in sorted(counts.items()))
@@ -0,0 +1,148 @@
+import logging
+import os
+import tracemalloc
+from contextlib import contextmanager
+from importlib import import_module
+from typing import Dict, List, Optional
+
+MB = 2 ** 20
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBudgetExceeded(MemoryError):
+    pass
+
+
+class MemoryAccountant:
+    """Tracks the Python memory that the agents of a session allocate, with tracemalloc.
+
+    Memory is attributed to an agent class while its constructor or `notifyChange` runs. The
+    memory retained by an agent is the sum of what its calls left allocated, its peak is the
+    highest retained plus transient memory during any call. This is an estimate: memory that an
+    agent frees from the other agent's allocations is subtracted from it as well.
+
+    If an agent's peak exceeds `budget_mb`, the call that exceeded it raises `MemoryBudgetExceeded`
+    and the accountant records the reason, so the session can be recorded as an ERROR.
+
+    Args:
+        class_paths (List[str]): python paths of the agent classes in the session
+        budget_mb (float, optional): memory budget per agent in MB. Defaults to None.
+    """
+
+    def __init__(self, class_paths: List[str], budget_mb: Optional[float] = None):
+        self.class_paths = list(dict.fromkeys(class_paths))
+        self.budget = budget_mb * MB if budget_mb is not None else None
+        self.retained: Dict[str, int] = {class_path.split(".")[-1]: 0 for class_path in self.class_paths}
+        self.peak: Dict[str, int] = dict(self.retained)
+        self.exceeded: Optional[str] = None
+
+    @contextmanager
+    def _measure(self, name: str):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak[name] = max(self.peak[name], self.retained[name] + peak - before)
+            self.retained[name] += current - before
+
+        if self.budget is not None and self.peak[name] > self.budget:
+            if self.exceeded is None:
+                self.exceeded = f"{name} exceeded its memory budget of {self.budget / MB:.0f}MB ({self.peak[name] / MB:.0f}MB)"
+            raise MemoryBudgetExceeded(self.exceeded)
+
+    @contextmanager
+    def instrument(self):
+        """Measures the constructor and `notifyChange` calls of the agent classes during the context."""
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+
+        patched = []
+        for class_path in self.class_paths:
+            module, name = class_path.rsplit(".", 1)
+            cls = getattr(import_module(module), name)
+            init, notify_change = cls.__dict__.get("__init__"), cls.__dict__.get("notifyChange")
+
+            def measured_init(agent, *args, _init=cls.__init__, _name=name, **kwargs):
+                with self._measure(_name):
+                    _init(agent, *args, **kwargs)
+
+            def measured_notify_change(agent, info, _notify_change=cls.notifyChange, _name=name):
+                with self._measure(_name):
+                    return _notify_change(agent, info)
+
+            cls.__init__ = measured_init
+            cls.notifyChange = measured_notify_change
+            patched.append((cls, init, notify_change))
+        try:
+            yield
+        finally:
+            for cls, init, notify_change in patched:
+                for attribute, original in (("__init__", init), ("notifyChange", notify_change)):
+                    if original is None:
+                        delattr(cls, attribute)
+                    else:
+                        setattr(cls, attribute, original)
+            if started:
+                tracemalloc.stop()
+
+    def add_to_summary(self, results_summary: dict):
+        # adds the peak and retained memory per agent position, next to the utilities
+        for key, agent in list(results_summary.items()):
+            if key.startswith("agent_") and agent in self.peak:
+                position = key.split("_")[1]
+                results_summary[f"peak_memory_mb_{position}"] = self.peak[agent] / MB
+                results_summary[f"retained_memory_mb_{position}"] = self.retained[agent] / MB
+        if self.exceeded is not None:
+            results_summary["result"] = "ERROR"
+            results_summary["error"] = self.exceeded
+
+
+def _address_space() -> int:
+    # current virtual memory size of this process in bytes
+    with open("/proc/self/statm", encoding="utf-8") as f:
+        return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+
+
+@contextmanager
+def address_space_limit(budget_mb: Optional[float], num_agents: int = 2):
+    """Limits the address space of the process to its current size plus the budget of every agent.
+
+    Allocations beyond the limit raise a MemoryError instead of making the machine swap. This is a
+    backstop for allocations that the accountant only sees after the call, and is only meant for
+    worker processes that run one session at a time. Where the address space cannot be limited,
+    such as on Windows, only the accountant enforces the budget.
+    """
+    if budget_mb is None:
+        yield
+        return
+
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is None or not os.path.exists("/proc/self/statm"):
+        logger.warning("the address space cannot be limited on this platform, the memory budget is not backstopped")
+        yield
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = _address_space() + int(num_agents * budget_mb * MB)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def account_memory(settings: dict):
+    # memory accountant for a session if its settings ask for it, otherwise None
+    if not settings.get("memory_accounting") and settings.get("memory_budget_mb") is None:
+        return None
+    return MemoryAccountant([agent["class"] for agent in settings["agents"]], settings.get("memory_budget_mb"))
+
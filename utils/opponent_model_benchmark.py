@@ -0,0 +1,326 @@
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+import pandas as pd
+from geniusweb.actions.Offer import Offer
+from geniusweb.actions.PartyId import PartyId
+from geniusweb.bidspace.AllBidsList import AllBidsList
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+from pyson.ObjectMapper import ObjectMapper
+from scipy.stats import spearmanr
+
+from utils.runners import get_utility_function
+
+OPPONENT = PartyId("opponent")
+
+
+class ModelAdapter:
+    """Uniform interface around the different opponent model APIs in this repository.
+
+    Args:
+        class_path (str): import path of the opponent model class
+        create (Callable): creates the model from (model class, domain)
+        update (Callable): updates the model with (model, bid, progress), returns the updated model
+        predict (Callable): predicts the opponent utility with (model, bid) as a float
+    """
+
+    def __init__(self, class_path: str, create: Callable, update: Callable, predict: Callable):
+        self.class_path = class_path
+        self.create = create
+        self.update = update
+        self.predict = predict
+
+    def model_class(self):
+        module, name = self.class_path.rsplit(".", 1)
+        return getattr(import_module(module), name)
+
+
+def _geniusweb_adapter(class_path: str, after_update: Callable = None) -> ModelAdapter:
+    # models that follow the geniusweb OpponentModel interface (create, With, WithAction, getUtility)
+    def update(model, bid, progress):
+        model = model.WithAction(Offer(OPPONENT, bid), None)
+        if after_update is not None:
+            after_update(model)
+        return model
+
+    return ModelAdapter(
+        class_path,
+        create=lambda cls, domain: cls.create().With(domain, None),
+        update=update,
+        predict=lambda model, bid: float(model.getUtility(bid)),
+    )
+
+
+def _agent2_create(cls, domain):
+    model = cls()
+    model.set_domain(domain)
+    return model
+
+
+def _agent68_create(cls, domain):
+    model = cls()
+    model.init_domain(domain)
+    return model
+
+
+def _update_with(method: str) -> Callable:
+    def update(model, bid, progress):
+        getattr(model, method)(bid)
+        return model
+
+    return update
+
+
+# opponent models that can be benchmarked outside of their agent. Agent3 and agent22 keep their
+# opponent model inside the agent class and can not be constructed on their own.
+OPPONENT_MODELS = {
+    "template": ModelAdapter(
+        "agents.template_agent.utils.opponent_model.OpponentModel",
+        create=lambda cls, domain: cls(domain),
+        update=_update_with("update"),
+        predict=lambda model, bid: float(model.get_predicted_utility(bid)),
+    ),
+    "bayesian": ModelAdapter(
+        "agents.template_agent.utils.bayesian_opponent_model.BayesianOpponentModel",
+        create=lambda cls, domain: cls(domain, seed=0),
+        update=lambda model, bid, progress: model.update(bid, progress) or model,
+        predict=lambda model, bid: float(model.get_predicted_utility(bid)),
+    ),
+    "frequency": _geniusweb_adapter(
+        "agents.template_agent.utils.frequency_table.MutableFrequencyOpponentModel"
+    ),
+    "agent2": ModelAdapter(
+        "agents.CSE3210.agent2.group2_frequency_analyzer.FrequencyAnalyzer",
+        create=_agent2_create,
+        update=_update_with("add_bid"),
+        predict=lambda model, bid: float(model.get_utility(bid)) if model.frequency_table else 0.0,
+    ),
+    "agent11": _geniusweb_adapter("agents.CSE3210.agent11.MyOpponentModel.MyOpponentModel"),
+    "agent43": _geniusweb_adapter(
+        "agents.CSE3210.agent43.frequency_opponent_model_group_43.FrequencyOpponentModel"
+    ),
+    "agent52": _geniusweb_adapter(
+        "agents.CSE3210.agent52.FreqModelWeighted.FreqModelWeighted",
+        after_update=lambda model: model.updateIssueWeights(),
+    ),
+    "agent55": _geniusweb_adapter("agents.CSE3210.agent55.Group55OpponentModel.FrequencyOpponentModel"),
+    "agent58": ModelAdapter(
+        "agents.CSE3210.agent58.opponentmodels.OpponentModel.OpponentModel",
+        create=lambda cls, domain: cls(domain),
+        update=_update_with("update_frequencies"),
+        predict=lambda model, bid: float(model.utility(bid)),
+    ),
+    "agent68": ModelAdapter(
+        "agents.CSE3210.agent68.opponent.opponent.Opponent",
+        create=_agent68_create,
+        update=_update_with("log_bid"),
+        predict=lambda model, bid: float(model.get_utility(bid)),
+    ),
+}
+
+
+def synthetic_offers(
+    opponent_profile, bids: List[Bid], num_offers: int, exponent: float = 1.0, noise: float = 0.05, seed: int = 0
+) -> List[Tuple[Bid, float]]:
+    """Offer sequence of a time-dependent opponent that concedes from 1.0 to 0.5 of its true utility.
+
+    Args:
+        opponent_profile: true utility function of the opponent
+        bids (List[Bid]): all bids of the domain
+        num_offers (int): length of the sequence
+        exponent (float): concession exponent, < 1 is boulware, > 1 is conceder
+        noise (float): width of the utility band around the target that bids are drawn from
+        seed (int): seed of the random bid choice
+
+    Returns:
+        List[Tuple[Bid, float]]: offered bids with the progress at which they were offered
+    """
+    rng = np.random.default_rng(seed)
+    utilities = np.array([float(opponent_profile.getUtility(bid)) for bid in bids])
+    order = np.argsort(utilities)
+    sorted_utilities = utilities[order]
+
+    offers = []
+    for i in range(num_offers):
+        progress = i / num_offers
+        target = 1.0 - 0.5 * progress ** (1 / exponent)
+        low = np.searchsorted(sorted_utilities, target - noise)
+        high = np.searchsorted(sorted_utilities, target + noise, side="right")
+        if high <= low:
+            # no bid in the band, take the closest one above the target
+            low, high = min(low, len(order) - 1), min(low, len(order) - 1) + 1
+        offers.append((bids[order[rng.integers(low, high)]], progress))
+
+    return offers
+
+
+def recorded_offers(results_trace: dict, actor: str) -> List[Tuple[Bid, float]]:
+    """Offer sequence of one party in a trace that was saved by `run.py`.
+
+    Args:
+        results_trace (dict): session results trace
+        actor (str): party id of the opponent, as used in the trace
+
+    Returns:
+        List[Tuple[Bid, float]]: offered bids with the progress at which they were offered,
+            measured as the fraction of actions
+    """
+    actions = results_trace["actions"]
+    offers = []
+    for index, action in enumerate(actions):
+        if "Offer" in action and action["Offer"]["actor"] == actor:
+            bid = ObjectMapper().parse(action["Offer"]["bid"], Bid)
+            offers.append((bid, index / len(actions)))
+
+    return offers
+
+
+def benchmark_model(
+    model_name: str, domain: Domain, opponent_profile, offers: List[Tuple[Bid, float]], eval_bids: List[Bid]
+) -> dict:
+    """Replays an offer sequence through an opponent model and scores its predictions.
+
+    Args:
+        model_name (str): key in OPPONENT_MODELS
+        domain (Domain): domain of the negotiation
+        opponent_profile: true utility function of the opponent
+        offers (List[Tuple[Bid, float]]): offer sequence with progress
+        eval_bids (List[Bid]): bids on which the predictions are scored
+
+    Returns:
+        dict: accuracy and latency of the model
+    """
+    adapter = OPPONENT_MODELS[model_name]
+    model = adapter.create(adapter.model_class(), domain)
+
+    update_times = []
+    for bid, progress in offers:
+        start = time.perf_counter()
+        model = adapter.update(model, bid, progress)
+        update_times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    predicted = np.array([adapter.predict(model, bid) for bid in eval_bids])
+    query_time = (time.perf_counter() - start) / len(eval_bids)
+
+    true = np.array([float(opponent_profile.getUtility(bid)) for bid in eval_bids])
+    rank_correlation = spearmanr(predicted, true).correlation if np.ptp(predicted) > 0 else 0.0
+
+    return {
+        "model": model_name,
+        "rank_correlation": rank_correlation,
+        "mae": float(np.mean(np.abs(predicted - true))),
+        "update_ms": 1000 * float(np.mean(update_times)) if update_times else 0.0,
+        "update_max_ms": 1000 * float(np.max(update_times)) if update_times else 0.0,
+        "query_ms": 1000 * query_time,
+    }
+
+
+def _benchmark_domain(args) -> List[dict]:
+    profile_file, models, num_offers, max_eval_bids, seed = args
+    opponent_profile = get_utility_function(f"file:{Path(profile_file).absolute()}")
+    domain = opponent_profile.getDomain()
+
+    all_bids = AllBidsList(domain)
+    bids = [all_bids.get(i) for i in range(all_bids.size())]
+    offers = synthetic_offers(opponent_profile, bids, num_offers, seed=seed)
+
+    rng = np.random.default_rng(seed)
+    if len(bids) > max_eval_bids:
+        eval_bids = [bids[i] for i in rng.choice(len(bids), max_eval_bids, replace=False)]
+    else:
+        eval_bids = bids
+
+    results = []
+    for model_name in models:
+        try:
+            result = benchmark_model(model_name, domain, opponent_profile, offers, eval_bids)
+        except Exception as e:
+            result = {"model": model_name, "error": repr(e)}
+        result["profile"] = profile_file
+        results.append(result)
+
+    return results
+
+
+def _benchmark_trace(args) -> List[dict]:
+    trace_file, models, max_eval_bids, seed = args
+    with open(trace_file, encoding="utf-8") as f:
+        results_trace = json.load(f)
+
+    results = []
+    for actor, party_profile in results_trace["partyprofiles"].items():
+        opponent_profile = get_utility_function(party_profile["profile"])
+        domain = opponent_profile.getDomain()
+        offers = recorded_offers(results_trace, actor)
+        if not offers:
+            continue
+
+        all_bids = AllBidsList(domain)
+        rng = np.random.default_rng(seed)
+        num_eval_bids = min(all_bids.size(), max_eval_bids)
+        eval_bids = [all_bids.get(int(i)) for i in rng.choice(all_bids.size(), num_eval_bids, replace=False)]
+
+        for model_name in models:
+            try:
+                result = benchmark_model(model_name, domain, opponent_profile, offers, eval_bids)
+            except Exception as e:
+                result = {"model": model_name, "error": repr(e)}
+            result["profile"] = party_profile["profile"]
+            result["trace"] = f"{trace_file}:{actor}"
+            results.append(result)
+
+    return results
+
+
+def run_opponent_model_benchmark(benchmark_settings: dict) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Benchmarks opponent models on recorded or synthetic offer sequences against the true opponent profiles.
+
+    Args:
+        benchmark_settings (dict): with keys
+            "profiles": opponent profile files to generate synthetic offer sequences for, the models learn
+                the utility function of these profiles
+            "traces": session results trace files saved by `run.py` (optional), the offers of every party
+                in a trace are replayed against its own profile
+            "models": keys of OPPONENT_MODELS to benchmark (default: all)
+            "num_offers": number of offers per sequence (default: 200)
+            "max_eval_bids": maximum number of bids to score predictions on (default: 2000)
+            "seed": seed for the offer sequences and the evaluation bids (default: 0)
+            "workers": number of worker processes (default: number of CPUs)
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: results per model and profile, and averaged per model
+    """
+    models = benchmark_settings.get("models", list(OPPONENT_MODELS))
+    num_offers = benchmark_settings.get("num_offers", 200)
+    max_eval_bids = benchmark_settings.get("max_eval_bids", 2000)
+    seed = benchmark_settings.get("seed", 0)
+
+    with ProcessPoolExecutor(max_workers=benchmark_settings.get("workers")) as executor:
+        futures = [
+            executor.submit(_benchmark_domain, (profile, models, num_offers, max_eval_bids, seed))
+            for profile in benchmark_settings.get("profiles", [])
+        ]
+        futures += [
+            executor.submit(_benchmark_trace, (trace, models, max_eval_bids, seed))
+            for trace in benchmark_settings.get("traces", [])
+        ]
+        results = [row for future in futures for row in future.result()]
+
+    results = pd.DataFrame(results)
+    if "error" not in results:
+        results["error"] = None
+
+    metrics = ["rank_correlation", "mae", "update_ms", "update_max_ms", "query_ms"]
+    valid = results[results["error"].isna()]
+    summary = valid.groupby("model")[metrics].mean()
+    summary["errors"] = results.groupby("model")["error"].count()
+    summary = summary.fillna(0).sort_values("rank_correlation", ascending=False)
+
+    return results, summary
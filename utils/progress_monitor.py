@@ -0,0 +1,153 @@
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+
+def _write_atomic(path: Path, content: str):
+    # readers never see a half written file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class ProgressMonitor:
+    """Non-interactive progress of a tournament, for long runs on headless machines.
+
+    The monitor is updated with the results summary of every finished session. At most every
+    `interval_s` seconds, and when the tournament finishes, it rewrites a JSON status file and a
+    Prometheus textfile (for the node exporter textfile collector), and redraws a progress line on
+    the terminal. Sessions loaded from the cache count as done, but are left out of the throughput.
+
+    Args:
+        total (int): number of sessions in the tournament
+        status_path (str, optional): JSON status file. Defaults to None.
+        prometheus_path (str, optional): Prometheus textfile, should end in ".prom". Defaults to None.
+        terminal (bool, optional): draw a progress line on stderr. Defaults to True.
+        interval_s (float, optional): minimum time between two rewrites. Defaults to 2.0.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        status_path: str = None,
+        prometheus_path: str = None,
+        terminal: bool = True,
+        interval_s: float = 2.0,
+    ):
+        self.total = total
+        self.status_path = Path(status_path) if status_path else None
+        self.prometheus_path = Path(prometheus_path) if prometheus_path else None
+        self.terminal = terminal
+        self.interval_s = interval_s
+
+        self.start_time = time.time()
+        self.done = 0
+        self.cached = 0
+        self.results = defaultdict(int)
+        self.agent_utility = defaultdict(float)
+        self.agent_nash_product = defaultdict(float)
+        self.agent_sessions = defaultdict(int)
+        self._last_write = 0.0
+
+    def update(self, results_summary: dict, cached: bool = False):
+        self.done += 1
+        self.cached += cached
+        self.results[results_summary["result"]] += 1
+        for key, agent in results_summary.items():
+            if key.startswith("agent_"):
+                self.agent_utility[agent] += results_summary[f"utility_{key.split('_')[1]}"]
+                self.agent_nash_product[agent] += results_summary["nash_product"]
+                self.agent_sessions[agent] += 1
+
+        if time.time() - self._last_write >= self.interval_s or self.done == self.total:
+            self.write()
+
+    def status(self) -> dict:
+        elapsed = time.time() - self.start_time
+        run = self.done - self.cached
+        rate = run / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        return {
+            "done": self.done,
+            "total": self.total,
+            "cached": self.cached,
+            "elapsed_s": elapsed,
+            "sessions_per_s": rate,
+            "eta_s": remaining / rate if rate > 0 else (0.0 if remaining == 0 else None),
+            "results": dict(self.results),
+            "agents": {
+                agent: {
+                    "sessions": count,
+                    "avg_utility": self.agent_utility[agent] / count,
+                    "avg_nash_product": self.agent_nash_product[agent] / count,
+                }
+                for agent, count in self.agent_sessions.items()
+            },
+            "updated": time.time(),
+        }
+
+    def prometheus(self, status: dict) -> str:
+        lines = [
+            "# HELP tournament_sessions_total Sessions scheduled in the tournament.",
+            "# TYPE tournament_sessions_total gauge",
+            f"tournament_sessions_total {status['total']}",
+            "# HELP tournament_sessions_done Sessions finished or loaded from the cache.",
+            "# TYPE tournament_sessions_done gauge",
+            f"tournament_sessions_done {status['done']}",
+            "# HELP tournament_sessions_cached Sessions loaded from the cache.",
+            "# TYPE tournament_sessions_cached gauge",
+            f"tournament_sessions_cached {status['cached']}",
+            "# HELP tournament_sessions_per_second Throughput of the sessions that were run.",
+            "# TYPE tournament_sessions_per_second gauge",
+            f"tournament_sessions_per_second {status['sessions_per_s']:.6f}",
+            "# HELP tournament_eta_seconds Expected time until the tournament finishes.",
+            "# TYPE tournament_eta_seconds gauge",
+            f"tournament_eta_seconds {status['eta_s'] if status['eta_s'] is not None else 'NaN'}",
+            "# HELP tournament_session_results Finished sessions per result.",
+            "# TYPE tournament_session_results gauge",
+        ]
+        for result in ("agreement", "failed", "ERROR"):
+            lines.append(f'tournament_session_results{{result="{result}"}} {status["results"].get(result, 0)}')
+        lines += [
+            "# HELP tournament_agent_avg_utility Running average utility per agent.",
+            "# TYPE tournament_agent_avg_utility gauge",
+        ]
+        for agent, stats in sorted(status["agents"].items()):
+            lines.append(f'tournament_agent_avg_utility{{agent="{agent}"}} {stats["avg_utility"]:.6f}')
+        lines += [
+            "# HELP tournament_agent_sessions Finished sessions per agent.",
+            "# TYPE tournament_agent_sessions gauge",
+        ]
+        for agent, stats in sorted(status["agents"].items()):
+            lines.append(f'tournament_agent_sessions{{agent="{agent}"}} {stats["sessions"]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        self._last_write = time.time()
+        status = self.status()
+        if self.status_path is not None:
+            _write_atomic(self.status_path, json.dumps(status, indent=2))
+        if self.prometheus_path is not None:
+            _write_atomic(self.prometheus_path, self.prometheus(status))
+        if self.terminal:
+            results = " ".join(f"{result} {count}" for result, count in sorted(status["results"].items()))
+            line = (
+                f"\r[{status['done']}/{status['total']}] {status['sessions_per_s']:.2f} sessions/s, "
+                f"ETA {_format_duration(status['eta_s'])}, {results}"
+            )
+            end = "\n" if self.done == self.total else ""
+            print(line, end=end, file=sys.stderr, flush=True)
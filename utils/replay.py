@@ -0,0 +1,37 @@
+from typing import List
+
+from agents.replay_agent.replay_agent import load_trace
+
+REPLAY_AGENT = "agents.replay_agent.replay_agent.ReplayAgent"
+
+
+def replay_sessions(agent: dict, trace_paths: List[str], accept: str = "recorded", deadline_time_ms: int = None) -> list:
+    """Creates sessions of an agent against the recorded parties of a library of sessions.
+
+    Every recorded session yields two sessions, one per recorded party: the `ReplayAgent` replays
+    the offers of that party with its profile, and the agent takes the other position and profile.
+    Only the agent computes anything, so a configuration of the agent is evaluated at the cost of
+    a single agent, against opponents that behave the same in every evaluation.
+
+    Args:
+        agent (dict): agent as in the session settings, with its class path and parameters
+        trace_paths (List[str]): recorded results traces (session_results_trace.json or session cache entries)
+        accept (str, optional): acceptance policy of the replayed parties. Defaults to "recorded".
+        deadline_time_ms (int, optional): deadline of the sessions. Defaults to the recorded deadline.
+
+    Returns:
+        list: session settings dicts as passed to `run_session` or `run_sessions`
+    """
+    sessions = []
+    for path in trace_paths:
+        trace = load_trace(path)
+        connections = trace["connections"]
+        profiles = [trace["partyprofiles"][actor]["profile"].replace("file:", "", 1) for actor in connections]
+        deadline = deadline_time_ms or trace["settings"]["SAOPSettings"]["deadline"]["DeadlineTime"]["durationms"]
+
+        for position in (1, 2):
+            replay = {"class": REPLAY_AGENT, "parameters": {"trace": path, "position": position, "accept": accept}}
+            agents = [replay, agent] if position == 1 else [agent, replay]
+            sessions.append({"agents": agents, "profiles": profiles, "deadline_time_ms": deadline})
+
+    return sessions
@@ -1,10 +1,15 @@
+import json
+import os
+import random
 import shutil
 from collections import defaultdict
-from itertools import permutations
-from math import factorial, prod
+from contextlib import nullcontext
+from itertools import combinations, permutations
+from math import prod
 from pathlib import Path
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
 from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
     LinearAdditiveUtilitySpace,
@@ -13,6 +18,7 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
     ProfileConnectionFactory,
 )
 from geniusweb.protocol.NegoSettings import NegoSettings
+from geniusweb.protocol.session.mopac.MOPACState import MOPACState
 from geniusweb.protocol.session.saop.SAOPState import SAOPState
 from geniusweb.simplerunner.ClassPathConnectionFactory import ClassPathConnectionFactory
 from geniusweb.simplerunner.NegoRunner import StdOutReporter
@@ -20,131 +26,361 @@ from geniusweb.simplerunner.Runner import Runner
 from pyson.ObjectMapper import ObjectMapper
 from uri.uri import URI
 
+from agents.template_agent.utils.domain_tables import TABLES_DIR_ENV, publish_table
+from utils.binary_profile import load_profile
+from utils.agent_profiler import merge_profiles, profile_agents, start_profiling, stop_profiling
 from utils.ask_proceed import ask_proceed
+from utils.learning import format_learning_round, learning_agents, run_learning_round
+from utils.memory_accounting import MemoryBudgetExceeded, account_memory
+from utils.progress_monitor import ProgressMonitor
+from utils.session_cache import SessionCache
+from utils.session_pool import DurationLedger, format_pool_report, run_session_pool
+from utils.trace_spans import get_tracer, merge_traces, span, start_tracing, stop_tracing
+from utils.watchdog import LimitExceeded, session_watchdog
 
 
 def run_session(settings) -> Tuple[dict, dict]:
     agents = settings["agents"]
     profiles = settings["profiles"]
     deadline_time_ms = settings["deadline_time_ms"]
+    protocol = settings.get("protocol", "SAOP")
 
     # quick and dirty checks
-    assert isinstance(agents, list) and len(agents) == 2
-    assert isinstance(profiles, list) and len(profiles) == 2
+    assert protocol in ("SAOP", "MOPAC")
+    assert isinstance(agents, list) and (len(agents) == 2 if protocol == "SAOP" else len(agents) >= 2)
+    assert isinstance(profiles, list) and len(profiles) == len(agents)
     assert isinstance(deadline_time_ms, int) and deadline_time_ms > 0
     assert all(["class" in agent for agent in agents])
 
     for agent in agents:
         if "parameters" in agent:
             if "storage_dir" in agent["parameters"]:
-                storage_dir = Path(agent["parameters"]["storage_dir"])
-                if not storage_dir.exists():
-                    storage_dir.mkdir(parents=True)
+                # sessions of a tournament may create the same directory in parallel
+                Path(agent["parameters"]["storage_dir"]).mkdir(parents=True, exist_ok=True)
 
     # file path to uri
     profiles_uri = [f"file:{x}" for x in profiles]
 
     # create full settings dictionary that geniusweb requires
-    settings_full = {
-        "SAOPSettings": {
-            "participants": [
-                {
-                    "TeamInfo": {
-                        "parties": [
-                            {
-                                "party": {
-                                    "partyref": f"pythonpath:{agents[0]['class']}",
-                                    "parameters": agents[0]["parameters"]
-                                    if "parameters" in agents[0]
-                                    else {},
-                                },
-                                "profile": profiles_uri[0],
-                            }
-                        ]
+    participants = [
+        {
+            "TeamInfo": {
+                "parties": [
+                    {
+                        "party": {
+                            "partyref": f"pythonpath:{agent['class']}",
+                            "parameters": agent["parameters"]
+                            if "parameters" in agent
+                            else {},
+                        },
+                        "profile": profile_uri,
                     }
-                },
-                {
-                    "TeamInfo": {
-                        "parties": [
-                            {
-                                "party": {
-                                    "partyref": f"pythonpath:{agents[1]['class']}",
-                                    "parameters": agents[1]["parameters"]
-                                    if "parameters" in agents[1]
-                                    else {},
-                                },
-                                "profile": profiles_uri[1],
-                            }
-                        ]
-                    }
-                },
-            ],
-            # "deadline": {"DeadlineRounds": {"rounds": rounds, "durationms": 60000}},
-            "deadline": {"DeadlineTime": {"durationms": deadline_time_ms}},
+                ]
+            }
+        }
+        for agent, profile_uri in zip(agents, profiles_uri)
+    ]
+    if protocol == "SAOP":
+        settings_full = {
+            "SAOPSettings": {
+                "participants": participants,
+                # "deadline": {"DeadlineRounds": {"rounds": rounds, "durationms": 60000}},
+                "deadline": {"DeadlineTime": {"durationms": deadline_time_ms}},
+            }
+        }
+    else:
+        # every phase of a MOPAC session ends in an agreement between the largest group of parties
+        settings_full = {
+            "MOPACSettings": {
+                "participants": participants,
+                "deadline": {"DeadlineTime": {"durationms": deadline_time_ms}},
+                "votingevaluator": {"LargestAgreement": {}},
+            }
         }
-    }
-
-    # parse settings dict to settings object
-    settings_obj = ObjectMapper().parse(settings_full, NegoSettings)
 
-    # create the negotiation session runner object
-    runner = Runner(settings_obj, ClassPathConnectionFactory(), StdOutReporter(), 0)
+    agent_names = [agent["class"].split(".")[-1] for agent in agents]
+    with span("session", agents=agent_names, profiles=profiles):
+        # parse settings dict to settings object
+        with span("parse settings"):
+            settings_obj = ObjectMapper().parse(settings_full, NegoSettings)
+
+        # create the negotiation session runner object
+        runner = Runner(settings_obj, ClassPathConnectionFactory(), StdOutReporter(), 0)
+
+        # seed the random generators that the agents use, if a seed is provided
+        if "seed" in settings:
+            random.seed(settings["seed"])
+            np.random.seed(settings["seed"])
+
+        # run the negotiation session, the time outside of the agent spans is protocol overhead
+        class_paths = [agent["class"] for agent in agents]
+        tracer = get_tracer()
+        instrument = tracer.instrument_agents(class_paths) if tracer else nullcontext()
+        accountant = account_memory(settings)
+        measure_memory = accountant.instrument() if accountant else nullcontext()
+        watchdog = session_watchdog(settings)
+        limits = watchdog.limits() if watchdog else nullcontext()
+        with profile_agents(class_paths), measure_memory, limits, instrument, span("negotiation"):
+            try:
+                runner.run()
+            except (MemoryBudgetExceeded, LimitExceeded):
+                # the session is recorded as an ERROR below
+                pass
+
+        # get results from the session in class format and dict format
+        with span("process_results"):
+            results_class = runner.getProtocol().getState()
+            if protocol == "SAOP":
+                results_dict: dict = ObjectMapper().toJson(results_class)["SAOPState"]
+                # add utilities to the results and create a summary
+                results_trace, results_summary = process_results(results_class, results_dict)
+            else:
+                results_dict: dict = ObjectMapper().toJson(results_class)["MOPACState"]
+                results_trace, results_summary = process_mopac_results(results_class, results_dict)
 
-    # run the negotiation session
-    runner.run()
+        if accountant is not None:
+            accountant.add_to_summary(results_summary)
+        if watchdog is not None:
+            watchdog.add_to_summary(results_summary)
 
-    # get results from the session in class format and dict format
-    results_class: SAOPState = runner.getProtocol().getState()
-    results_dict: dict = ObjectMapper().toJson(results_class)["SAOPState"]
+    return results_trace, results_summary
 
-    # add utilities to the results and create a summary
-    results_trace, results_summary = process_results(results_class, results_dict)
 
-    return results_trace, results_summary
+def error_results_summary(settings: dict, error: str) -> dict:
+    # results summary of a session that could not be completed, in the format of `process_results`
+    results_summary = {"num_offers": 0}
+    for position, agent in enumerate(settings["agents"], start=1):
+        results_summary[f"agent_{position}"] = agent["class"].split(".")[-1]
+        results_summary[f"utility_{position}"] = 0
+    results_summary["nash_product"] = 0
+    results_summary["social_welfare"] = 0
+    results_summary["result"] = "ERROR"
+    results_summary["error"] = error
+    return results_summary
 
 
-def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
+def create_tournament_sessions(tournament_settings: dict) -> list:
     # create agent permutations, ensures that every agent plays against every other agent on both sides of a profile set.
+    # MOPAC tournaments have a session for every combination of `party_count` agents and every rotation of the profiles.
     agents = tournament_settings["agents"]
     profile_sets = tournament_settings["profile_sets"]
     deadline_time_ms = tournament_settings["deadline_time_ms"]
+    protocol = tournament_settings.get("protocol", "SAOP")
+    party_count = tournament_settings.get("party_count", 2)
 
-    num_sessions = (factorial(len(agents)) // factorial(len(agents) - 2)) * len(
-        profile_sets
-    )
-    if num_sessions > 100:
-        message = (
-            f"WARNING: this would run {num_sessions} negotiation sessions. Proceed?"
-        )
-        if not ask_proceed(message):
-            print("Exiting script")
-            exit()
-
-    tournament_results = []
     tournament_steps = []
     for profiles in profile_sets:
         # quick an dirty check
-        assert isinstance(profiles, list) and len(profiles) == 2
-        for agent_duo in permutations(agents, 2):
+        if protocol == "SAOP":
+            assert isinstance(profiles, list) and len(profiles) == 2
+            groups = [(list(agent_duo), profiles) for agent_duo in permutations(agents, 2)]
+        else:
+            assert isinstance(profiles, list) and len(profiles) == party_count
+            rotations = []
+            for r in range(party_count):
+                rotation = [profiles[(i + r) % party_count] for i in range(party_count)]
+                if rotation not in rotations:
+                    rotations.append(rotation)
+            groups = [
+                (list(agent_group), rotation)
+                for agent_group in combinations(agents, party_count)
+                for rotation in rotations
+            ]
+
+        for session_agents, session_profiles in groups:
             # create session settings dict
             settings = {
-                "agents": list(agent_duo),
-                "profiles": profiles,
+                "agents": session_agents,
+                "profiles": session_profiles,
                 "deadline_time_ms": deadline_time_ms,
             }
+            for key in (
+                "protocol",
+                "seed",
+                "memory_accounting",
+                "memory_budget_mb",
+                "session_wall_limit_s",
+                "session_cpu_limit_s",
+                "turn_cpu_limit_s",
+            ):
+                if key in tournament_settings:
+                    settings[key] = tournament_settings[key]
+            tournament_steps.append(settings)
 
-            # run a single negotiation session
-            _, session_results_summary = run_session(settings)
+    return tournament_steps
 
-            # assemble results
-            tournament_steps.append(settings)
-            tournament_results.append(session_results_summary)
 
-    tournament_results_summary = process_tournament_results(tournament_results)
+def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
+    tournament_steps = create_tournament_sessions(tournament_settings)
+
+    # sessions with a known fingerprint are loaded from the cache instead of being run again, except
+    # when profiling or learning, as cached sessions would not be profiled or depend on what was learned
+    cache = None
+    if (
+        tournament_settings.get("cache_dir") is not None
+        and not tournament_settings.get("profile_agents")
+        and not tournament_settings.get("learn_every")
+    ):
+        cache = SessionCache(tournament_settings["cache_dir"])
+
+    num_sessions = len(tournament_steps)
+    if cache is not None:
+        num_sessions -= sum(cache.contains(settings) for settings in tournament_steps)
+    # non-interactive runs (e.g. on headless servers) skip the confirmation
+    if num_sessions > 100 and tournament_settings.get("interactive", True):
+        message = (
+            f"WARNING: this would run {num_sessions} negotiation sessions. Proceed?"
+        )
+        if not ask_proceed(message):
+            print("Exiting script")
+            exit()
+
+    monitor = None
+    if any(key in tournament_settings for key in ("status_path", "prometheus_path", "progress_line")):
+        monitor = ProgressMonitor(
+            len(tournament_steps),
+            status_path=tournament_settings.get("status_path"),
+            prometheus_path=tournament_settings.get("prometheus_path"),
+            terminal=tournament_settings.get("progress_line", False),
+        )
+
+    # the notifyChange calls of the chosen agents are profiled over all their sessions
+    profile_dir = None
+    if tournament_settings.get("profile_agents"):
+        profile_dir = Path(tournament_settings.get("profile_dir", "results/profiles"))
+        start_profiling(tournament_settings["profile_agents"])
+
+    # spans of all phases of the tournament are recorded in a Chrome trace, one row per process
+    trace_path = tournament_settings.get("trace_path")
+    if trace_path is not None:
+        start_tracing("tournament")
+
+    # with learning rounds, the sessions run in batches and every agent learns between the batches
+    learn_every = tournament_settings.get("learn_every")
+    batches = [tournament_steps]
+    if learn_every:
+        batches = [tournament_steps[i:i + learn_every] for i in range(0, len(tournament_steps), learn_every)]
+
+    tournament_results = []
+    trace_files = []
+    pool_reports = []
+    learn_reports = []
+    # sessions with a wall time limit run in supervised workers, also in a serial tournament
+    use_pool = tournament_settings.get("workers", 1) > 1 or tournament_settings.get("session_wall_limit_s") is not None
+    if use_pool:
+        # run the sessions in parallel, longest expected sessions first and grouped by domain
+        if "domain_tables_dir" in tournament_settings:
+            with span("publish domain tables"):
+                publish_domain_tables(tournament_steps, tournament_settings["domain_tables_dir"])
+        ledger = None
+        if "ledger_path" in tournament_settings:
+            ledger = DurationLedger(tournament_settings["ledger_path"])
+        trace_dir = Path(f"{trace_path}.workers") if trace_path is not None else None
+
+    for number, batch in enumerate(batches):
+        if number > 0:
+            with span("learning round", number=number):
+                learn_results = run_learning_round(
+                    learning_agents(tournament_settings),
+                    tournament_settings["profile_sets"][0][0],
+                    tournament_settings.get("learn_time_ms", 60000),
+                    tournament_settings.get("workers", 1),
+                )
+            print(format_learning_round(number, learn_results))
+            learn_reports.append({"round": number, "after_session": len(tournament_results), "agents": learn_results})
+
+        if use_pool:
+            # every batch runs on fresh workers, which write their traces and profiles to a directory per batch
+            batch_trace_dir = trace_dir.joinpath(f"batch-{number}") if trace_dir is not None else None
+            batch_profile_dir = profile_dir.joinpath(f"batch-{number}") if profile_dir is not None else None
+            batch_results, pool_report = run_session_pool(
+                batch,
+                tournament_settings.get("workers", 1),
+                cache,
+                ledger,
+                monitor,
+                batch_trace_dir,
+                tournament_settings.get("profile_agents"),
+                batch_profile_dir,
+            )
+            trace_files.extend(pool_report.pop("trace_files", []))
+            profile_dirs = pool_report.pop("profile_dirs", [])
+            if profile_dirs:
+                # the profiles of earlier batches are merged with the new ones
+                merge_profiles(profile_dirs + ([profile_dir] if number > 0 else []), profile_dir)
+                shutil.rmtree(batch_profile_dir)
+            print(format_pool_report(pool_report))
+            pool_reports.append(pool_report)
+        else:
+            batch_results = run_sessions(batch, cache, monitor)
+        tournament_results.extend(batch_results)
+
+    if pool_reports and "pool_report" in tournament_settings:
+        with open(tournament_settings["pool_report"], "w", encoding="utf-8") as f:
+            f.write(json.dumps(pool_reports[0] if len(pool_reports) == 1 else pool_reports, indent=2))
+    if learn_reports and "learn_report" in tournament_settings:
+        with open(tournament_settings["learn_report"], "w", encoding="utf-8") as f:
+            f.write(json.dumps(learn_reports, indent=2))
+
+    profilers = stop_profiling()
+    if not use_pool:
+        for profiler in profilers.values():
+            profiler.save(profile_dir)
+
+    with span("process_tournament_results"):
+        tournament_results_summary = process_tournament_results(tournament_results)
+
+    if trace_path is not None:
+        stop_tracing().save(trace_path)
+        if trace_files:
+            merge_traces([trace_path] + trace_files, trace_path)
+            shutil.rmtree(trace_dir)
 
     return tournament_steps, tournament_results, tournament_results_summary
 
 
+def publish_domain_tables(sessions: list, directory: str):
+    """Publishes the domain tables of all profiles in a batch of sessions for the worker processes.
+
+    Worker processes inherit the environment of this process, so agents in any worker attach the
+    published tables read-only instead of building their own copy.
+    """
+    profiles = {profile for settings in sessions for profile in settings["profiles"]}
+    for profile in sorted(profiles):
+        publish_table(get_utility_function(f"file:{Path(profile).absolute()}"), directory)
+    os.environ[TABLES_DIR_ENV] = str(Path(directory).absolute())
+
+
+def run_sessions(sessions: list, cache: SessionCache = None, monitor: ProgressMonitor = None) -> list:
+    """Runs a batch of negotiation sessions.
+
+    Args:
+        sessions (list): session settings dicts as passed to `run_session`
+        cache (SessionCache, optional): store of earlier session results. Sessions found in the
+            cache are not run again, new results are added to it. Defaults to None.
+
+    Returns:
+        list: results summary of every session, in the order of `sessions`
+    """
+    results_summaries = []
+    for settings in sessions:
+        with span("cache lookup"):
+            cached = cache.get(settings) if cache is not None else None
+        if cached is not None:
+            _, session_results_summary = cached
+        else:
+            # run a single negotiation session
+            session_results_trace, session_results_summary = run_session(settings)
+            if cache is not None:
+                cache.put(settings, session_results_trace, session_results_summary)
+
+        results_summaries.append(session_results_summary)
+        if monitor is not None:
+            monitor.update(session_results_summary, cached=cached is not None)
+
+    return results_summaries
+
+
 def process_results(results_class: SAOPState, results_dict: dict):
     # dict to translate geniusweb agent reference to Python class name
     agent_translate = {
@@ -157,10 +393,11 @@ def process_results(results_class: SAOPState, results_dict: dict):
     # check if there are any actions (could have crashed)
     if results_dict["actions"]:
         # obtain utility functions
-        utility_funcs = {
-            k: get_utility_function(v["profile"])
-            for k, v in results_dict["partyprofiles"].items()
-        }
+        with span("load profiles"):
+            utility_funcs = {
+                k: load_profile(v["profile"])
+                for k, v in results_dict["partyprofiles"].items()
+            }
 
         # iterate both action classes and dict entries
         actions_iter = zip(results_class.getActions(), results_dict["actions"])
@@ -208,6 +445,62 @@ def process_results(results_class: SAOPState, results_dict: dict):
     return results_dict, results_summary
 
 
+def process_mopac_results(results_class: MOPACState, results_dict: dict):
+    # MOPAC counterpart of `process_results`, for any number of parties
+    parties = sorted(results_dict["partyprofiles"], key=lambda actor: int(actor.split("_")[-1]))
+    agent_translate = {
+        k: v["party"]["partyref"].split(".")[-1]
+        for k, v in results_dict["partyprofiles"].items()
+    }
+
+    results_summary = {"num_offers": 0}
+
+    # check if there are any actions (could have crashed)
+    if results_dict["actions"]:
+        with span("load profiles"):
+            utility_funcs = {
+                k: load_profile(v["profile"])
+                for k, v in results_dict["partyprofiles"].items()
+            }
+
+        # only offers carry a single bid, votes are kept as they are
+        for action_class, action_dict in zip(results_class.getActions(), results_dict["actions"]):
+            if "Offer" not in action_dict:
+                continue
+            bid = action_class.getBid()
+            if bid is None:
+                raise ValueError(
+                    f"Found `None` value in sequence of actions: {action_class}"
+                )
+            action_dict["Offer"]["utilities"] = {
+                k: float(v.getUtility(bid)) for k, v in utility_funcs.items()
+            }
+            results_summary["num_offers"] += 1
+
+        # parties that are not part of an agreement get nothing
+        agreements = {
+            str(party): bid for party, bid in results_class.getAgreements().getMap().items()
+        }
+        utilities_final = [
+            float(utility_funcs[party].getUtility(agreements[party])) if party in agreements else 0
+            for party in parties
+        ]
+        result = "agreement" if agreements else "failed"
+    else:
+        utilities_final = [0] * len(parties)
+        result = "ERROR"
+
+    for actor, utility in zip(parties, utilities_final):
+        position = actor.split("_")[-1]
+        results_summary[f"agent_{position}"] = agent_translate[actor]
+        results_summary[f"utility_{position}"] = utility
+    results_summary["nash_product"] = prod(utilities_final)
+    results_summary["social_welfare"] = sum(utilities_final)
+    results_summary["result"] = result
+
+    return results_dict, results_summary
+
+
 def get_utility_function(profile_uri) -> LinearAdditiveUtilitySpace:
     profile_connection = ProfileConnectionFactory.create(
         URI(profile_uri), StdOutReporter()
@@ -0,0 +1,187 @@
+import ast
+import hashlib
+import json
+import os
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Callable, Optional, Set, Tuple
+
+# bump this when a change to the runners changes the results of a session
+CACHE_VERSION = 1
+
+# session settings that limit the agents, see `utils.memory_accounting` and `utils.watchdog`
+LIMIT_KEYS = (
+    "memory_accounting",
+    "memory_budget_mb",
+    "session_wall_limit_s",
+    "session_cpu_limit_s",
+    "turn_cpu_limit_s",
+)
+
+
+def agent_source_dirs(class_path: str) -> Set[Path]:
+    """Finds the source directories that an agent depends on.
+
+    The directory of the agent's module is always included. Every absolute import of
+    another `agents.*` module in its source files adds the directory of that module as
+    well (e.g. agents that import `agents.template_agent.utils`), recursively.
+
+    Args:
+        class_path (str): python path of the agent class, e.g. "agents.boulware_agent.boulware_agent.BoulwareAgent"
+
+    Returns:
+        Set[Path]: source directories of the agent
+    """
+    module = class_path.rsplit(".", 1)[0]
+    dirs: Set[Path] = set()
+    pending = [module]
+    seen_modules = set()
+
+    while pending:
+        module = pending.pop()
+        if module in seen_modules:
+            continue
+        seen_modules.add(module)
+
+        spec = find_spec(module)
+        if spec is None or spec.origin is None:
+            continue
+        source_dir = Path(spec.origin).parent
+        if source_dir in dirs:
+            continue
+        dirs.add(source_dir)
+
+        for file in sorted(source_dir.rglob("*.py")):
+            tree = ast.parse(file.read_bytes(), filename=str(file))
+            for node in ast.walk(tree):
+                if isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                    names = [node.module]
+                elif isinstance(node, ast.Import):
+                    names = [alias.name for alias in node.names]
+                else:
+                    continue
+                pending.extend(name for name in names if name.startswith("agents."))
+
+    return dirs
+
+
+def hash_agent(class_path: str) -> str:
+    """Hashes the source files of an agent and of the agent modules it imports."""
+    digest = hashlib.sha256()
+    for source_dir in sorted(agent_source_dirs(class_path)):
+        for file in sorted(source_dir.rglob("*.py")):
+            digest.update(str(file.relative_to(source_dir.parent)).encode())
+            digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def cacheable(settings: dict) -> bool:
+    # agents with a storage directory learn from earlier sessions, so their results are not reproducible
+    return not any("storage_dir" in agent.get("parameters", {}) for agent in settings["agents"])
+
+
+def session_fingerprint(settings: dict, agent_hash: Callable[[str], str] = hash_agent) -> str:
+    """Fingerprint of a session, equal fingerprints are expected to give equal results.
+
+    The fingerprint covers the source trees and parameters of both agents, the contents of
+    both profile files, the deadline, the seed, the protocol and the memory and time limits
+    of the session.
+
+    Args:
+        settings (dict): session settings as passed to `run_session`
+        agent_hash (Callable[[str], str]): function that hashes the sources of an agent class
+
+    Returns:
+        str: hex digest of the fingerprint
+    """
+    fingerprint = {
+        "version": CACHE_VERSION,
+        "agents": [
+            {
+                "class": agent["class"],
+                "source": agent_hash(agent["class"]),
+                "parameters": agent.get("parameters", {}),
+            }
+            for agent in settings["agents"]
+        ],
+        "profiles": [hash_file(profile) for profile in settings["profiles"]],
+        "deadline_time_ms": settings["deadline_time_ms"],
+        "seed": settings.get("seed"),
+    }
+    # only multilateral sessions name their protocol, which keeps the fingerprints of SAOP sessions
+    if settings.get("protocol", "SAOP") != "SAOP":
+        fingerprint["protocol"] = settings["protocol"]
+    # the limits can turn a session into an ERROR, they are only added when set to keep the other fingerprints
+    limits = {key: settings[key] for key in LIMIT_KEYS if settings.get(key)}
+    if limits:
+        fingerprint["limits"] = limits
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+
+
+class SessionCache:
+    """Local content-addressed store of session results.
+
+    Every session is stored as one JSON file named after its fingerprint, containing the
+    settings, the results summary and the results trace of the session. Agent source hashes
+    are computed once per cache instance. Sessions with an agent that has a storage directory
+    are never cached, as their results depend on what the agent stored before.
+
+    Args:
+        cache_dir (str): directory of the store, created if it does not exist
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._agent_hashes = {}
+
+    def _hash_agent(self, class_path: str) -> str:
+        # agent sources do not change during a tournament, so their hashes are memoised
+        if class_path not in self._agent_hashes:
+            self._agent_hashes[class_path] = hash_agent(class_path)
+        return self._agent_hashes[class_path]
+
+    def fingerprint(self, settings: dict) -> str:
+        return session_fingerprint(settings, self._hash_agent)
+
+    def _path(self, fingerprint: str) -> Path:
+        return self.cache_dir.joinpath(fingerprint[:2], f"{fingerprint}.json")
+
+    def contains(self, settings: dict) -> bool:
+        return cacheable(settings) and self._path(self.fingerprint(settings)).exists()
+
+    def get(self, settings: dict) -> Optional[Tuple[dict, dict]]:
+        """Returns the cached (trace, summary) of a session, or None if it was not run before."""
+        if not cacheable(settings):
+            return None
+        path = self._path(self.fingerprint(settings))
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+        return entry["trace"], entry["summary"]
+
+    def put(self, settings: dict, results_trace: dict, results_summary: dict):
+        """Stores the results of a session. Sessions that ended in an ERROR are not cached, nor are learning agents."""
+        if results_summary.get("result") == "ERROR" or not cacheable(settings):
+            return
+        fingerprint = self.fingerprint(settings)
+        path = self._path(fingerprint)
+        path.parent.mkdir(exist_ok=True)
+
+        entry = {
+            "fingerprint": fingerprint,
+            "settings": settings,
+            "summary": results_summary,
+            "trace": results_trace,
+        }
+
+        # write to a temporary file first, so that an interrupted run never leaves a corrupt entry
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
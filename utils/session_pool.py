@@ -0,0 +1,389 @@
+import faulthandler
+import json
+import multiprocessing
+import shutil
+import tempfile
+import time
+import traceback
+from collections import defaultdict, deque
+from multiprocessing.connection import wait
+from pathlib import Path
+from statistics import mean
+from typing import List, Optional, Tuple
+
+from utils.agent_profiler import start_profiling, stop_profiling
+from utils.memory_accounting import address_space_limit
+from utils.progress_monitor import ProgressMonitor
+from utils.session_cache import SessionCache
+from utils.trace_spans import span, start_tracing, stop_tracing
+from utils.watchdog import session_wall_limit
+
+# how often the pool checks for sessions that overran their wall time, and how long it waits for
+# the stacks of a stuck session to be dumped before it kills the worker
+WATCHDOG_INTERVAL_S = 0.5
+WATCHDOG_GRACE_S = 1.0
+
+
+def session_domain(settings: dict) -> str:
+    # sessions are grouped by the directory of their profiles, e.g. "domains/domain02"
+    return str(Path(settings["profiles"][0]).parent)
+
+
+def session_agents(settings: dict) -> Tuple[str, ...]:
+    return tuple(agent["class"] for agent in settings["agents"])
+
+
+class DurationLedger:
+    """Append-only record of session durations, used to predict the duration of future sessions.
+
+    Every run session adds one JSON line with its agents, domain, deadline and wall time. The
+    expected duration of a session is the mean duration of earlier sessions with the same agents on
+    the same domain. If there are none, it falls back to the slowest of the two agents' mean
+    durations, then to the domain's mean duration, and finally to the deadline of the session.
+
+    Args:
+        path (str): ledger file, created if it does not exist
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._by_session = defaultdict(list)
+        self._by_agent = defaultdict(list)
+        self._by_domain = defaultdict(list)
+
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add(json.loads(line))
+
+    def _add(self, entry: dict):
+        agents = tuple(entry["agents"])
+        duration = entry["duration_s"]
+        self._by_session[(agents, entry["domain"])].append(duration)
+        for agent in agents:
+            self._by_agent[agent].append(duration)
+        self._by_domain[entry["domain"]].append(duration)
+
+    def estimate(self, settings: dict) -> float:
+        agents = session_agents(settings)
+        domain = session_domain(settings)
+        if self._by_session[(agents, domain)]:
+            return mean(self._by_session[(agents, domain)])
+        agent_means = [mean(self._by_agent[agent]) for agent in agents if self._by_agent[agent]]
+        if agent_means:
+            return max(agent_means)
+        if self._by_domain[domain]:
+            return mean(self._by_domain[domain])
+        return settings["deadline_time_ms"] / 1000
+
+    def record(self, settings: dict, duration: float):
+        entry = {
+            "agents": list(session_agents(settings)),
+            "domain": session_domain(settings),
+            "deadline_time_ms": settings["deadline_time_ms"],
+            "duration_s": duration,
+        }
+        self._add(entry)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def _worker(
+    worker_id: int,
+    tasks,
+    results,
+    stack_file: Path,
+    trace_dir: Path = None,
+    profile_agents: Optional[List[str]] = None,
+    profile_dir: Path = None,
+):
+    # runs sessions until it receives None, one worker process per pool slot
+    # imported here, as the runners import this module to run tournaments on a pool
+    from utils.runners import error_results_summary, run_session
+
+    # a forked worker inherits the recorder of the parent, every worker records its own spans instead
+    stop_tracing()
+    if trace_dir is not None:
+        start_tracing(f"worker {worker_id}")
+    stop_profiling()
+    if profile_agents:
+        start_profiling(profile_agents)
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            if trace_dir is not None:
+                stop_tracing().save(trace_dir.joinpath(f"worker-{worker_id}.json"))
+            for profiler in stop_profiling().values():
+                profiler.save(profile_dir.joinpath(f"worker-{worker_id}"))
+            break
+        index, settings = task
+        start = time.time()
+
+        # the stacks are dumped just before the pool kills a session that overran its wall time
+        wall_limit = session_wall_limit(settings)
+        with open(stack_file, "w", encoding="utf-8") as stacks:
+            if wall_limit is not None:
+                faulthandler.dump_traceback_later(wall_limit, file=stacks)
+            results_trace = None
+            try:
+                # allocations beyond the memory budget fail the session instead of the machine
+                with address_space_limit(settings.get("memory_budget_mb")):
+                    results_trace, results_summary = run_session(settings)
+            except Exception:
+                results_summary = error_results_summary(settings, traceback.format_exc())
+            finally:
+                faulthandler.cancel_dump_traceback_later()
+
+        results.send((index, results_trace, results_summary, start, time.time(), _peak_rss_kb()))
+
+
+def _peak_rss_kb() -> Optional[int]:
+    # peak resident set size of the process so far, in kilobytes on linux, None where `resource` is missing (Windows)
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def assign_domains(sessions: list, estimates: List[float], workers: int) -> List[deque]:
+    """Assigns the sessions to worker queues, keeping the sessions of a domain on one worker.
+
+    Domains are assigned longest expected total first to the least loaded worker. Within a worker
+    queue, sessions are ordered longest expected duration first.
+
+    Returns:
+        List[deque]: queue of session indices per worker
+    """
+    domains = defaultdict(list)
+    for index, settings in enumerate(sessions):
+        domains[session_domain(settings)].append(index)
+
+    loads = [0.0] * workers
+    queues = [[] for _ in range(workers)]
+    domain_totals = {domain: sum(estimates[i] for i in indices) for domain, indices in domains.items()}
+    for domain in sorted(domains, key=domain_totals.get, reverse=True):
+        worker = loads.index(min(loads))
+        queues[worker].extend(domains[domain])
+        loads[worker] += domain_totals[domain]
+
+    return [deque(sorted(queue, key=lambda i: estimates[i], reverse=True)) for queue in queues]
+
+
+def run_session_pool(
+    sessions: list,
+    workers: int,
+    cache: SessionCache = None,
+    ledger: DurationLedger = None,
+    monitor: ProgressMonitor = None,
+    trace_dir: Path = None,
+    profile_agents: Optional[List[str]] = None,
+    profile_dir: Path = None,
+) -> Tuple[list, dict]:
+    """Runs a batch of negotiation sessions on a pool of worker processes.
+
+    Every worker gets a queue of sessions that share its domains, longest expected session first, so
+    per-domain state in a worker process stays warm and long sessions do not end up in the tail of
+    the run. A worker that runs out of sessions takes the shortest pending session of the worker with
+    the most expected work left.
+
+    A watchdog kills the worker of a session that overruns its wall time limit ("session_wall_limit_s"
+    in the session settings) or that died, records the session as an ERROR with the stacks of the stuck
+    worker, and replaces the worker, so the other sessions keep running.
+
+    Args:
+        sessions (list): session settings dicts as passed to `run_session`
+        workers (int): number of worker processes
+        cache (SessionCache, optional): store of earlier session results, see `run_sessions`. Defaults to None.
+        ledger (DurationLedger, optional): durations of earlier sessions. Defaults to None, in which case
+            every session is expected to run until its deadline.
+        monitor (ProgressMonitor, optional): progress surface, updated after every session. Defaults to None.
+        trace_dir (Path, optional): directory for the Chrome trace of every worker. Their files are listed
+            in the report under "trace_files". Defaults to None.
+        profile_agents (List[str], optional): class paths of the agents to profile, see `AgentProfiler`. Defaults to None.
+        profile_dir (Path, optional): directory for the profiles of every worker. Their directories are listed in
+            the report under "profile_dirs". Defaults to None.
+
+    Returns:
+        Tuple[list, dict]: results summary of every session in the order of `sessions`, and a report on the
+            utilization of the pool
+    """
+    results_summaries = [None] * len(sessions)
+    pending = []
+    for index, settings in enumerate(sessions):
+        with span("cache lookup"):
+            cached = cache.get(settings) if cache is not None else None
+        if cached is not None:
+            results_summaries[index] = cached[1]
+            if monitor is not None:
+                monitor.update(cached[1], cached=True)
+        else:
+            pending.append(index)
+
+    report = {"workers": workers, "sessions": len(pending), "cached": len(sessions) - len(pending)}
+    if not pending:
+        return results_summaries, report
+
+    estimates = {}
+    for index in pending:
+        estimates[index] = ledger.estimate(sessions[index]) if ledger is not None else sessions[index]["deadline_time_ms"] / 1000
+    workers = min(workers, len(pending))
+    pending_sessions = [sessions[index] for index in pending]
+    queues = [
+        deque(pending[i] for i in queue)
+        for queue in assign_domains(pending_sessions, [estimates[index] for index in pending], workers)
+    ]
+
+    if trace_dir is not None:
+        trace_dir.mkdir(parents=True, exist_ok=True)
+    stack_dir = Path(tempfile.mkdtemp(prefix="session_stacks_"))
+
+    # every worker has its own task queue and result pipe, so killing a stuck worker leaves the others intact
+    tasks = [None] * workers
+    readers = [None] * workers
+    processes = [None] * workers
+
+    def start_worker(worker_id: int):
+        tasks[worker_id] = multiprocessing.Queue()
+        readers[worker_id], writer = multiprocessing.Pipe(duplex=False)
+        processes[worker_id] = multiprocessing.Process(
+            target=_worker,
+            args=(
+                worker_id,
+                tasks[worker_id],
+                writer,
+                stack_dir.joinpath(f"worker-{worker_id}.txt"),
+                trace_dir,
+                profile_agents,
+                profile_dir,
+            ),
+            daemon=True,
+        )
+        processes[worker_id].start()
+        writer.close()
+
+    # session index and start time of the session that every busy worker runs
+    running = {}
+
+    def dispatch(worker_id: int):
+        queue = queues[worker_id]
+        if not queue:
+            # steal the shortest session of the worker with the most expected work left
+            donor = max(queues, key=lambda q: sum(estimates[i] for i in q))
+            if not donor:
+                return
+            queue.append(donor.pop())
+        index = queue.popleft()
+        tasks[worker_id].put((index, sessions[index]))
+        running[worker_id] = (index, time.time())
+
+    run_start = time.time()
+    busy = [0.0] * workers
+    last_finish = [run_start] * workers
+    peak_rss = [0] * workers
+    rss_known = True
+    killed = 0
+
+    def finish(worker_id: int, index: int, results_trace, results_summary, start: float, end: float):
+        del running[worker_id]
+        busy[worker_id] += end - start
+        last_finish[worker_id] = end
+
+        results_summaries[index] = results_summary
+        if cache is not None and results_trace is not None:
+            cache.put(sessions[index], results_trace, results_summary)
+        if ledger is not None:
+            ledger.record(sessions[index], end - start)
+        if monitor is not None:
+            monitor.update(results_summary)
+
+    for worker_id in range(workers):
+        start_worker(worker_id)
+        dispatch(worker_id)
+
+    # imported here, as the runners import this module to run tournaments on a pool
+    from utils.runners import error_results_summary
+
+    try:
+        while running:
+            ready = wait([readers[worker_id] for worker_id in running], timeout=WATCHDOG_INTERVAL_S)
+            for reader in ready:
+                worker_id = readers.index(reader)
+                try:
+                    index, results_trace, results_summary, start, end, rss = reader.recv()
+                except EOFError:
+                    # the worker died, it is handled by the watchdog below
+                    continue
+                if rss is None:
+                    rss_known = False
+                else:
+                    peak_rss[worker_id] = max(peak_rss[worker_id], rss)
+                finish(worker_id, index, results_trace, results_summary, start, end)
+                dispatch(worker_id)
+
+            # the watchdog kills workers that overran the wall time limit of their session or died
+            now = time.time()
+            for worker_id, (index, start) in list(running.items()):
+                wall_limit = session_wall_limit(sessions[index])
+                overran = wall_limit is not None and now - start > wall_limit + WATCHDOG_GRACE_S
+                if not overran and processes[worker_id].is_alive():
+                    continue
+
+                processes[worker_id].kill()
+                processes[worker_id].join()
+                killed += 1
+                stack_file = stack_dir.joinpath(f"worker-{worker_id}.txt")
+                stacks = stack_file.read_text(encoding="utf-8") if stack_file.exists() else ""
+                if overran:
+                    reason = f"session killed after exceeding its wall time limit of {wall_limit}s"
+                else:
+                    reason = f"worker died with exit code {processes[worker_id].exitcode}"
+                results_summary = error_results_summary(sessions[index], f"{reason}\n{stacks}")
+                finish(worker_id, index, None, results_summary, start, now)
+
+                start_worker(worker_id)
+                dispatch(worker_id)
+    finally:
+        # workers that still run a session were interrupted, they are not waited for
+        for worker_id in running:
+            processes[worker_id].kill()
+        for worker_id in range(workers):
+            tasks[worker_id].put(None)
+        for process in processes:
+            process.join()
+        shutil.rmtree(stack_dir, ignore_errors=True)
+
+    makespan = max(last_finish) - run_start
+    report.update(
+        {
+            "makespan_s": makespan,
+            "busy_s": busy,
+            "utilization": sum(busy) / (workers * makespan) if makespan > 0 else 1.0,
+            # time that workers sat idle after their last session, while others were still running
+            "tail_idle_s": sum(max(last_finish) - finish for finish in last_finish),
+            "expected_s": sum(estimates.values()),
+            "peak_rss_mb": [rss / 1024 for rss in peak_rss] if rss_known else None,
+            "killed": killed,
+            "trace_files": [str(trace_dir.joinpath(f"worker-{i}.json")) for i in range(workers)] if trace_dir else [],
+            "profile_dirs": [profile_dir.joinpath(f"worker-{i}") for i in range(workers)] if profile_agents else [],
+        }
+    )
+    return results_summaries, report
+
+
+def format_pool_report(report: dict) -> str:
+    if "makespan_s" not in report:
+        return f"pool: all {report['cached']} sessions were cached"
+    if report["peak_rss_mb"] is None:
+        peak_rss = "peak RSS unknown"
+    else:
+        peak_rss = f"peak RSS per worker up to {max(report['peak_rss_mb']):.0f}MB"
+    return (
+        f"pool: {report['sessions']} sessions ({report['cached']} cached) on {report['workers']} workers in "
+        f"{report['makespan_s']:.1f}s, utilization {report['utilization']:.0%}, "
+        f"tail idle {report['tail_idle_s']:.1f}s, {peak_rss}, "
+        f"{report['killed']} sessions killed"
+    )
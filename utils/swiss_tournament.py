@@ -0,0 +1,151 @@
+from math import ceil, log2
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.adaptive_tournament import agent_name
+from utils.runners import process_tournament_results, run_sessions
+from utils.session_cache import SessionCache
+
+
+def elo_expected(rating: float, opponent_rating: float) -> float:
+    # expected score of an agent against an opponent under the Elo model
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def session_scores(results_summary: dict) -> Dict[str, float]:
+    """Scores of both agents in a session: 1 for the higher utility, 0 for the lower and 0.5 for a draw."""
+    utilities = {
+        agent: results_summary[f"utility_{key.split('_')[1]}"]
+        for key, agent in results_summary.items()
+        if key.startswith("agent_")
+    }
+    (agent_a, utility_a), (agent_b, utility_b) = utilities.items()
+    if utility_a == utility_b:
+        return {agent_a: 0.5, agent_b: 0.5}
+    return {agent_a: float(utility_a > utility_b), agent_b: float(utility_b > utility_a)}
+
+
+def swiss_pairing(
+    ranking: List[str], played: Dict[str, set], had_bye: Set[str] = frozenset()
+) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """Pairs every agent with the closest ranked agent that it did not play yet.
+
+    With an odd number of agents, the lowest ranked agent that did not have a bye yet gets the bye,
+    or the lowest ranked agent if all of them had one.
+
+    Args:
+        ranking (List[str]): agents, ordered from the highest to the lowest rating
+        played (Dict[str, set]): opponents that every agent already played
+        had_bye (Set[str], optional): agents that had a bye in an earlier round
+
+    Returns:
+        Tuple[List[Tuple[str, str]], List[str]]: the pairs, and the agent that got the bye if any
+    """
+    unpaired = list(ranking)
+    pairs = []
+    byes = []
+    if len(unpaired) % 2 == 1:
+        bye = next((agent for agent in reversed(unpaired) if agent not in had_bye), unpaired[-1])
+        unpaired.remove(bye)
+        byes.append(bye)
+    while len(unpaired) > 1:
+        agent = unpaired.pop(0)
+        # the closest ranked new opponent, or the closest ranked one if all were played already
+        opponent = next((other for other in unpaired if other not in played[agent]), unpaired[0])
+        unpaired.remove(opponent)
+        pairs.append((agent, opponent))
+    return pairs, byes
+
+
+def run_swiss_tournament(tournament_settings: dict) -> Tuple[list, list, pd.DataFrame]:
+    """Ranks a large pool of agents with a Swiss-system tournament and Elo ratings.
+
+    Every round, the agents are sorted by rating and paired with the closest ranked agent they did not
+    play yet. Every pair plays a randomly drawn profile set from both sides, and the agent with the higher
+    utility in a session wins it. Ratings are updated after every session. With an odd number of agents,
+    one agent per round gets a bye, no agent gets two unless all had one. Next to the ratings, every agent
+    collects the usual Swiss points: its average score over the sessions of a round, and 1 for a bye.
+    With the default number of
+    rounds, this takes in the order of N log N sessions for N agents, instead of the N (N - 1) sessions
+    per profile set of a round robin.
+
+    Args:
+        tournament_settings (dict): settings as for `run_tournament`, with the optional keys
+            "rounds": number of Swiss rounds (default: 2 * ceil(log2(number of agents)))
+            "initial_rating": rating of every agent at the start (default: 1500)
+            "k_factor": maximum rating change per session (default: 32)
+            "pairing_seed": seed of the profile set draws (default: None), separate from the "seed" of the
+                sessions, so the draws can vary without changing the agents' behaviour
+            "seed": seed of the sessions, passed to the sessions if provided
+
+    Returns:
+        Tuple[list, list, pd.DataFrame]: the played sessions, their results summaries and the tournament
+            results summary with the final rating, Swiss points and number of byes of every agent as
+            additional columns, sorted by rating
+    """
+    agents = tournament_settings["agents"]
+    profile_sets = tournament_settings["profile_sets"]
+    deadline_time_ms = tournament_settings["deadline_time_ms"]
+    num_rounds = tournament_settings.get("rounds", 2 * ceil(log2(max(len(agents), 2))))
+    k_factor = tournament_settings.get("k_factor", 32)
+    rng = np.random.default_rng(tournament_settings.get("pairing_seed"))
+
+    cache = None
+    if tournament_settings.get("cache_dir") is not None:
+        cache = SessionCache(tournament_settings["cache_dir"])
+
+    agents_by_name = {agent_name(agent): agent for agent in agents}
+    ratings = {name: float(tournament_settings.get("initial_rating", 1500)) for name in agents_by_name}
+    played = {name: set() for name in agents_by_name}
+    points = {name: 0.0 for name in agents_by_name}
+    byes = {name: 0 for name in agents_by_name}
+
+    tournament_steps = []
+    tournament_results = []
+    for _ in range(num_rounds):
+        ranking = sorted(ratings, key=ratings.get, reverse=True)
+        pairs, round_byes = swiss_pairing(ranking, played, {name for name, count in byes.items() if count > 0})
+        for name in round_byes:
+            byes[name] += 1
+            points[name] += 1.0
+
+        round_steps = []
+        for agent_a, agent_b in pairs:
+            played[agent_a].add(agent_b)
+            played[agent_b].add(agent_a)
+            profiles = profile_sets[rng.integers(len(profile_sets))]
+            for agent_duo in ((agent_a, agent_b), (agent_b, agent_a)):
+                settings = {
+                    "agents": [agents_by_name[name] for name in agent_duo],
+                    "profiles": profiles,
+                    "deadline_time_ms": deadline_time_ms,
+                }
+                if "seed" in tournament_settings:
+                    settings["seed"] = tournament_settings["seed"]
+                round_steps.append(settings)
+
+        round_results = run_sessions(round_steps, cache)
+        for results_summary in round_results:
+            if results_summary["result"] == "ERROR":
+                continue
+            scores = session_scores(results_summary)
+            (agent_a, score_a), (agent_b, score_b) = scores.items()
+            # every pair plays two sessions per round
+            points[agent_a] += score_a / 2
+            points[agent_b] += score_b / 2
+            expected_a = elo_expected(ratings[agent_a], ratings[agent_b])
+            ratings[agent_a] += k_factor * (score_a - expected_a)
+            ratings[agent_b] += k_factor * (score_b - (1 - expected_a))
+
+        tournament_steps.extend(round_steps)
+        tournament_results.extend(round_results)
+
+    tournament_results_summary = process_tournament_results(tournament_results)
+    tournament_results_summary["rating"] = [ratings[agent] for agent in tournament_results_summary.index]
+    tournament_results_summary["points"] = [points[agent] for agent in tournament_results_summary.index]
+    tournament_results_summary["byes"] = [byes[agent] for agent in tournament_results_summary.index]
+    tournament_results_summary.sort_values("rating", ascending=False, inplace=True)
+
+    return tournament_steps, tournament_results, tournament_results_summary
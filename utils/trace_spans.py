@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from importlib import import_module
+from pathlib import Path
+from typing import List, Optional
+
+# recorder of the current process, None if tracing is off
+_active: Optional["TraceRecorder"] = None
+
+
+def _now_us() -> int:
+    # wall clock in microseconds, comparable between the worker processes of a tournament
+    return time.time_ns() // 1000
+
+
+class TraceRecorder:
+    """Collects timed spans in the Chrome trace event format.
+
+    Every span is a complete ("X") event on the process and thread that recorded it, so a
+    tournament run on a pool shows up as one row per worker in a trace viewer such as
+    chrome://tracing or https://ui.perfetto.dev.
+
+    Args:
+        process_name (str): name shown for the process in the trace viewer
+    """
+
+    def __init__(self, process_name: str):
+        self.pid = os.getpid()
+        self.events: List[dict] = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": process_name}}
+        ]
+
+    @contextmanager
+    def span(self, name: str, cat: str = "runner", **args):
+        start = _now_us()
+        try:
+            yield
+        finally:
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "X",
+                    "ts": start,
+                    "dur": _now_us() - start,
+                    "pid": self.pid,
+                    "tid": threading.get_ident(),
+                    "args": args,
+                }
+            )
+
+    @contextmanager
+    def instrument_agents(self, class_paths: List[str]):
+        """Records spans for the construction and every `notifyChange` call of the agent classes.
+
+        The methods are wrapped on the classes for the duration of the context, the first call
+        with a `Settings` inform shows the initialisation of an agent, `YourTurn` calls show the
+        compute per turn.
+        """
+        patched = []
+        for class_path in dict.fromkeys(class_paths):
+            module, name = class_path.rsplit(".", 1)
+            cls = getattr(import_module(module), name)
+            init, notify_change = cls.__dict__.get("__init__"), cls.__dict__.get("notifyChange")
+
+            def traced_init(agent, *args, _init=cls.__init__, _name=name, **kwargs):
+                with self.span(f"{_name}.__init__", cat="agent"):
+                    _init(agent, *args, **kwargs)
+
+            def traced_notify_change(agent, info, _notify_change=cls.notifyChange, _name=name):
+                with self.span(f"{_name}.notifyChange", cat="agent", inform=type(info).__name__):
+                    return _notify_change(agent, info)
+
+            cls.__init__ = traced_init
+            cls.notifyChange = traced_notify_change
+            patched.append((cls, init, notify_change))
+        try:
+            yield
+        finally:
+            for cls, init, notify_change in patched:
+                for attribute, original in (("__init__", init), ("notifyChange", notify_change)):
+                    if original is None:
+                        delattr(cls, attribute)
+                    else:
+                        setattr(cls, attribute, original)
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+def start_tracing(process_name: str) -> TraceRecorder:
+    global _active
+    _active = TraceRecorder(process_name)
+    return _active
+
+
+def stop_tracing() -> Optional[TraceRecorder]:
+    global _active
+    recorder, _active = _active, None
+    return recorder
+
+
+def get_tracer() -> Optional[TraceRecorder]:
+    return _active
+
+
+def span(name: str, cat: str = "runner", **args):
+    # span on the active recorder, does nothing if tracing is off
+    if _active is None:
+        return nullcontext()
+    return _active.span(name, cat, **args)
+
+
+def merge_traces(paths: List[str], path: str):
+    """Merges the trace files of several processes into one trace file."""
+    events = []
+    for trace_path in paths:
+        with open(trace_path, encoding="utf-8") as f:
+            events.extend(json.load(f)["traceEvents"])
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
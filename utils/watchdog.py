@@ -0,0 +1,125 @@
+import signal
+import sys
+import threading
+import traceback
+from contextlib import ExitStack, contextmanager
+from importlib import import_module
+from typing import List, Optional
+
+
+class LimitExceeded(Exception):
+    pass
+
+
+def format_stacks() -> str:
+    # stacks of all threads, the stuck agent may run outside of the thread that got the signal
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    return "\n".join(
+        f"Thread {names.get(thread_id, thread_id)}:\n" + "".join(traceback.format_stack(frame))
+        for thread_id, frame in sys._current_frames().items()
+    )
+
+
+class Watchdog:
+    """CPU time limits for the agents of a session, enforced with interval timers.
+
+    The session limit counts the user CPU time of the whole session (ITIMER_VIRTUAL), the turn
+    limit counts the CPU time of every single `notifyChange` call (ITIMER_PROF). When a limit is
+    hit, the signal handler records the reason with the stacks of all threads and raises
+    `LimitExceeded` to abort the agent. Wall time limits can not be enforced from within a stuck
+    process, the session pool takes care of those.
+
+    The timers use signals, so the watchdog must be used from the main thread of the process.
+
+    Args:
+        class_paths (List[str]): python paths of the agent classes in the session
+        session_cpu_s (float, optional): CPU time limit of the session in seconds. Defaults to None.
+        turn_cpu_s (float, optional): CPU time limit of a single notifyChange call in seconds. Defaults to None.
+    """
+
+    def __init__(self, class_paths: List[str], session_cpu_s: Optional[float] = None, turn_cpu_s: Optional[float] = None):
+        self.class_paths = list(dict.fromkeys(class_paths))
+        self.session_cpu_s = session_cpu_s
+        self.turn_cpu_s = turn_cpu_s
+        self.violation: Optional[str] = None
+        self._agent: Optional[str] = None
+
+    def _trip(self, reason: str):
+        if self.violation is None:
+            self.violation = f"{reason}\n{format_stacks()}"
+        raise LimitExceeded(reason)
+
+    def _on_session_limit(self, signum, frame):
+        self._trip(f"session exceeded its CPU limit of {self.session_cpu_s}s in {self._agent or 'the protocol'}")
+
+    def _on_turn_limit(self, signum, frame):
+        self._trip(f"{self._agent} exceeded the CPU limit of {self.turn_cpu_s}s for a single turn")
+
+    @contextmanager
+    def _session_timer(self):
+        previous = signal.signal(signal.SIGVTALRM, self._on_session_limit)
+        signal.setitimer(signal.ITIMER_VIRTUAL, self.session_cpu_s)
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_VIRTUAL, 0)
+            signal.signal(signal.SIGVTALRM, previous)
+
+    @contextmanager
+    def _turn_timers(self):
+        previous = signal.signal(signal.SIGPROF, self._on_turn_limit)
+        patched = []
+        for class_path in self.class_paths:
+            module, name = class_path.rsplit(".", 1)
+            cls = getattr(import_module(module), name)
+
+            def limited_notify_change(agent, info, _notify_change=cls.notifyChange, _name=name):
+                self._agent = _name
+                signal.setitimer(signal.ITIMER_PROF, self.turn_cpu_s)
+                try:
+                    return _notify_change(agent, info)
+                finally:
+                    signal.setitimer(signal.ITIMER_PROF, 0)
+                    self._agent = None
+
+            patched.append((cls, cls.__dict__.get("notifyChange")))
+            cls.notifyChange = limited_notify_change
+        try:
+            yield
+        finally:
+            for cls, original in patched:
+                if original is None:
+                    del cls.notifyChange
+                else:
+                    cls.notifyChange = original
+            signal.signal(signal.SIGPROF, previous)
+
+    @contextmanager
+    def limits(self):
+        with ExitStack() as stack:
+            if self.session_cpu_s is not None:
+                stack.enter_context(self._session_timer())
+            if self.turn_cpu_s is not None:
+                stack.enter_context(self._turn_timers())
+            yield
+
+    def add_to_summary(self, results_summary: dict):
+        if self.violation is not None:
+            results_summary["result"] = "ERROR"
+            results_summary["error"] = self.violation
+
+
+def session_watchdog(settings: dict) -> Optional[Watchdog]:
+    # watchdog for a session if its settings set a CPU limit, otherwise None
+    if settings.get("session_cpu_limit_s") is None and settings.get("turn_cpu_limit_s") is None:
+        return None
+    return Watchdog(
+        [agent["class"] for agent in settings["agents"]],
+        settings.get("session_cpu_limit_s"),
+        settings.get("turn_cpu_limit_s"),
+    )
+
+
+def session_wall_limit(settings: dict) -> Optional[float]:
+    # wall time after which the pool kills a session, None for no limit
+    return settings.get("session_wall_limit_s")